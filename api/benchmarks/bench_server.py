@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+"""
+Throughput benchmark: development server vs production launcher.
+
+Starts each server mode on its own port, drives `/api/v1/health` with a fixed
+number of concurrent keep-alive connections and reports requests/second and
+latency percentiles.
+
+Run from the project root: `python -m api.benchmarks.bench_server`
+"""
+import argparse
+import asyncio
+from concurrent.futures import ProcessPoolExecutor
+import os
+import signal
+import statistics
+import subprocess
+import sys
+import time
+
+import httpx
+
+PATH = "/api/v1/health"
+
+
+def start_server(mode: str, port: int) -> subprocess.Popen:
+    env = dict(
+        os.environ,
+        PORT=str(port),
+        HOST="127.0.0.1",
+        SERVER_MODE=mode,
+        DEBUG="false",
+        RATE_LIMIT_ENABLED="false",
+    )
+    return subprocess.Popen(
+        [sys.executable, "-m", "api.run"],
+        env=env,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+        start_new_session=True,
+    )
+
+
+def wait_until_ready(url: str, timeout: float = 30.0) -> None:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            if httpx.get(url, timeout=1.0).status_code == 200:
+                return
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.2)
+    raise RuntimeError(f"Server at {url} did not become ready")
+
+
+async def drive(url: str, concurrency: int, duration: float) -> list:
+    latencies = []
+    deadline = time.monotonic() + duration
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+
+    async with httpx.AsyncClient(limits=limits) as client:
+        async def worker():
+            while time.monotonic() < deadline:
+                started = time.perf_counter()
+                response = await client.get(url)
+                response.raise_for_status()
+                latencies.append(time.perf_counter() - started)
+
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return latencies
+
+
+def drive_process(url: str, concurrency: int, duration: float) -> list:
+    return asyncio.run(drive(url, concurrency, duration))
+
+
+def bench(mode: str, port: int, concurrency: int, duration: float, clients: int) -> dict:
+    """Load the server from several client processes so the client is not the bottleneck"""
+    server = start_server(mode, port)
+    url = f"http://127.0.0.1:{port}{PATH}"
+    try:
+        wait_until_ready(url)
+        per_client = max(1, concurrency // clients)
+        with ProcessPoolExecutor(max_workers=clients) as pool:
+            list(pool.map(drive_process, [url] * clients, [per_client] * clients, [1.0] * clients))  # warm-up
+            runs = pool.map(drive_process, [url] * clients, [per_client] * clients, [duration] * clients)
+            latencies = [latency for run in runs for latency in run]
+    finally:
+        os.killpg(server.pid, signal.SIGTERM)
+        server.wait(timeout=60)
+
+    latencies.sort()
+    return {
+        "mode": mode,
+        "requests": len(latencies),
+        "rps": len(latencies) / duration,
+        "p50_ms": statistics.median(latencies) * 1000,
+        "p99_ms": latencies[int(len(latencies) * 0.99) - 1] * 1000,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--concurrency", type=int, default=64)
+    parser.add_argument("--duration", type=float, default=10.0)
+    parser.add_argument("--clients", type=int, default=max(1, (os.cpu_count() or 2) // 2),
+                        help="Load generator processes")
+    parser.add_argument("--port", type=int, default=8100)
+    args = parser.parse_args()
+
+    results = [
+        bench("development", args.port, args.concurrency, args.duration, args.clients),
+        bench("production", args.port + 1, args.concurrency, args.duration, args.clients),
+    ]
+
+    print(f"{'mode':<12} {'requests':>9} {'req/s':>9} {'p50 ms':>8} {'p99 ms':>8}")
+    for r in results:
+        print(f"{r['mode']:<12} {r['requests']:>9} {r['rps']:>9.0f} {r['p50_ms']:>8.2f} {r['p99_ms']:>8.2f}")
+    print(f"\nSpeed-up: {results[1]['rps'] / results[0]['rps']:.2f}x")
+
+
+if __name__ == "__main__":
+    main()
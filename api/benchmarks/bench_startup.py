@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+"""
+Startup-time budget for the API.
+
+Imports `api.main` in fresh interpreters, reports the median wall time, the
+slowest imports from a `-X importtime` profile, and checks that modules meant
+to load lazily are not imported at startup. Exits non-zero when the median
+exceeds the budget or a lazy module leaks into startup, so it can gate CI.
+
+Run from the project root: `python -m api.benchmarks.bench_startup`
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+from api.server import LAZY_MODULES
+
+PROBE = (
+    "import sys, api.main; "
+    "print(','.join(m for m in {modules!r} if m in sys.modules))"
+)
+
+
+def run_probe(importtime: bool = False) -> subprocess.CompletedProcess:
+    command = [sys.executable]
+    if importtime:
+        command += ["-X", "importtime"]
+    command += ["-c", PROBE.format(modules=LAZY_MODULES)]
+    env = dict(os.environ, PYTHONWARNINGS="ignore")
+    return subprocess.run(command, capture_output=True, text=True, env=env, check=True)
+
+
+def parse_importtime(stderr: str):
+    """Yield (cumulative_us, self_us, module) rows from an importtime report"""
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        self_us, cumulative_us, module = line[len("import time:"):].split("|")
+        yield int(cumulative_us), int(self_us), module.rstrip()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="API startup-time budget")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--budget-ms", type=float, default=float(os.getenv("STARTUP_BUDGET_MS", "2000")))
+    parser.add_argument("--top", type=int, default=15, help="Slowest imports to list")
+    args = parser.parse_args()
+
+    timings = []
+    leaked = ""
+    for _ in range(args.runs):
+        started = time.perf_counter()
+        result = run_probe()
+        timings.append((time.perf_counter() - started) * 1000)
+        leaked = result.stdout.strip()
+
+    profile = run_probe(importtime=True)
+    rows = sorted(parse_importtime(profile.stderr), reverse=True)
+    # importtime indents nested imports by two spaces per level; keep api.main and its direct imports
+    top_level = [row for row in rows if len(row[2]) - len(row[2].lstrip()) <= 3]
+
+    print(f"Slowest startup imports (of {len(rows)} modules):")
+    print(f"{'cumulative ms':>14} {'self ms':>9}  module")
+    for cumulative_us, self_us, module in top_level[:args.top]:
+        print(f"{cumulative_us / 1000:>14.1f} {self_us / 1000:>9.1f}  {module.strip()}")
+
+    median = statistics.median(timings)
+    print(f"\nStartup: median {median:.0f} ms, min {min(timings):.0f} ms over {args.runs} runs "
+          f"(budget {args.budget_ms:.0f} ms)")
+
+    failed = False
+    if leaked:
+        print(f"❌ Modules meant to load lazily were imported at startup: {leaked}")
+        failed = True
+    if median > args.budget_ms:
+        print("❌ Startup budget exceeded")
+        failed = True
+    if not failed:
+        print("✅ Within startup budget")
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
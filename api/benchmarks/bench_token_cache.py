@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+"""
+Per-request authentication cost: full JWT verification vs the verified-token cache.
+
+Issues a token the way `/auth/login` does, then resolves it through
+`get_current_user` repeatedly, once with the cache disabled (jwt.decode and
+User validation on every call) and once with it enabled (one SHA-256 and a
+dict lookup after the first call). Reports microseconds per call.
+
+Run from the project root: `python -m api.benchmarks.bench_token_cache`
+"""
+import argparse
+import asyncio
+import statistics
+import time
+from datetime import timedelta
+
+from fastapi.security import HTTPAuthorizationCredentials
+
+from api.middleware.auth import create_access_token, get_current_user, token_cache
+
+TOKEN_DATA = {
+    "sub": "jane.doe@example.com",
+    "user_id": "E1001",
+    "name": "Jane Doe",
+    "department": "Engineering",
+    "position": "Staff Engineer",
+    "role": "employee",
+    "company": "Enterprise",
+}
+
+
+async def time_calls(credentials: HTTPAuthorizationCredentials, calls: int) -> float:
+    """Microseconds per get_current_user call"""
+    started = time.perf_counter()
+    for _ in range(calls):
+        await get_current_user(credentials)
+    return (time.perf_counter() - started) / calls * 1e6
+
+
+async def run(calls: int, rounds: int):
+    token = create_access_token(TOKEN_DATA, expires_delta=timedelta(minutes=30))
+    credentials = HTTPAuthorizationCredentials(scheme="Bearer", credentials=token)
+
+    size = token_cache.max_entries
+    uncached, cached = [], []
+    for _ in range(rounds):
+        # max_entries=0 turns the cache off: every call verifies the signature again
+        token_cache.max_entries = 0
+        token_cache.clear()
+        uncached.append(await time_calls(credentials, calls))
+        token_cache.max_entries = size
+        await get_current_user(credentials)  # warm the cache
+        cached.append(await time_calls(credentials, calls))
+    return statistics.median(uncached), statistics.median(cached)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Verified-token cache benchmark")
+    parser.add_argument("--calls", type=int, default=20000, help="get_current_user calls per round")
+    parser.add_argument("--rounds", type=int, default=5)
+    args = parser.parse_args()
+
+    uncached, cached = asyncio.run(run(args.calls, args.rounds))
+    print(f"jwt.decode + User per call: {uncached:8.2f} µs")
+    print(f"verified-token cache hit:   {cached:8.2f} µs")
+    print(f"saved per request:          {uncached - cached:8.2f} µs ({uncached / cached:.1f}x faster)")
+
+
+if __name__ == "__main__":
+    main()
@@ -7,7 +7,16 @@ class Settings(BaseSettings):
     # Server Configuration
     HOST: str = "0.0.0.0"
     PORT: int = 8000
-    DEBUG: bool = True
+    DEBUG: bool = False  # auto-reload in development mode; never used by the production runner
+
+    # Production Server Configuration (used when SERVER_MODE=production)
+    SERVER_MODE: str = "development"  # "development" (single process, reload when DEBUG) or "production"
+    WORKERS: int = 0  # 0 sizes the worker pool to the available cores
+    PRELOAD_APP: bool = True
+    BACKLOG: int = 2048
+    KEEP_ALIVE_TIMEOUT: int = 5
+    GRACEFUL_SHUTDOWN_TIMEOUT: int = 30
+    WORKER_TIMEOUT: int = 120
     
     # CORS Configuration - handled as property
     _cors_origins_str: str = "http://localhost:3000,http://127.0.0.1:3000,http://localhost:3001,http://127.0.0.1:3001"
@@ -26,6 +35,33 @@ class Settings(BaseSettings):
     ELASTICSEARCH_INDEX: str = ""
     ELASTICSEARCH_SEARCH_APPLICATION: str = ""
     ELASTICSEARCH_USE_SEARCH_APPLICATION: bool = False
+    ES_CONNECTIONS_PER_NODE: int = 25
+    ES_REQUEST_TIMEOUT: float = 10.0
+    ES_MAX_RETRIES: int = 2
+    # Matches counted exactly per search; beyond this totals are reported as a lower bound ("10,000+")
+    SEARCH_TRACK_TOTAL_HITS: int = 10000
+
+    # In-memory Org Graph Configuration (serves hierarchy views without ES round trips)
+    ORG_GRAPH_ENABLED: bool = True
+    ORG_GRAPH_REFRESH_SECONDS: int = 60
+    # Snapshot written by python/build_hierarchy_snapshot.py; mmapped instead of scanning ES when present
+    ORG_GRAPH_SNAPSHOT_PATH: str = ""
+    ORG_GRAPH_SNAPSHOT_POLL_SECONDS: int = 5
+    # /employees/org-chart: deepest tree and most nodes returned per request, and nodes per chunk of a streamed export
+    ORG_CHART_MAX_DEPTH: int = 5
+    ORG_CHART_MAX_NODES: int = 2000
+    ORG_CHART_EXPORT_CHUNK: int = 1000
+
+    # In-memory Employee Typeahead (built from new_people, refreshed by `modified`)
+    TYPEAHEAD_ENABLED: bool = True
+    TYPEAHEAD_MAX_RESULTS: int = 20
+    TYPEAHEAD_REFRESH_SECONDS: int = 30
+    TYPEAHEAD_FULL_RELOAD_SECONDS: int = 3600
+
+    # In-memory login email directory (built from new_people, refreshed by `modified`)
+    EMAIL_DIRECTORY_ENABLED: bool = True
+    EMAIL_DIRECTORY_REFRESH_SECONDS: int = 60
+    EMAIL_DIRECTORY_FULL_RELOAD_SECONDS: int = 3600
     
     # Semantic Search Configuration
     ELASTICSEARCH_SEMANTIC_ENABLED: bool = False
@@ -37,12 +73,87 @@ class Settings(BaseSettings):
     OPENAI_API_KEY: str = ""
     OPENAI_ENDPOINT: str = "https://api.openai.com/v1/chat/completions"
     OPENAI_MODEL: str = "gpt-3.5-turbo"
+    # Shared provider client: one keep-alive pool, fast connect, long read for big completions
+    LLM_HTTP2: bool = True
+    LLM_CONNECT_TIMEOUT: float = 5.0
+    LLM_READ_TIMEOUT: float = 120.0
+    # Room for BULKHEAD_LLM_MAX_LIMIT calls plus BULKHEAD_LLM_STREAM_LIMIT open streams
+    LLM_MAX_CONNECTIONS: int = 48
+    LLM_KEEPALIVE_SECONDS: float = 60.0
+    # Retries on 429/5xx and dropped connections (Retry-After honoured, else jittered exponential backoff)
+    LLM_MAX_RETRIES: int = 3
+    LLM_RETRY_BASE_DELAY: float = 0.5
+    LLM_RETRY_MAX_DELAY: float = 20.0
+    # Ask for token usage in the final chunk of streamed completions (stream_options.include_usage)
+    LLM_STREAM_USAGE: bool = True
+    # Summary cache keyed on prompt inputs (per-process LRU plus files under LLM_CACHE_DIR shared by workers)
+    LLM_CACHE_ENABLED: bool = True
+    LLM_CACHE_DIR: str = "data/llm_cache"
+    LLM_CACHE_TTL_SECONDS: int = 86400
+    LLM_CACHE_MEMORY_ENTRIES: int = 1000
+    LLM_CACHE_DISK_MAX_MB: int = 256
+    # Token budgets for document excerpts packed into prompts (most query-relevant passages first)
+    LLM_CONTEXT_SUMMARY_TOKENS: int = 800
+    LLM_CONTEXT_COMPREHENSIVE_TOKENS: int = 2400
+    LLM_CONTEXT_CHAT_TOKENS: int = 1000
+    LLM_CONTEXT_PASSAGE_TOKENS: int = 80
+    # Chat history: last N turns verbatim, older turns folded into a per-session summary in the background
+    LLM_HISTORY_KEEP_TURNS: int = 3
+    LLM_HISTORY_TOKENS: int = 1500
+    LLM_HISTORY_SUMMARY_TOKENS: int = 300
+    LLM_HISTORY_SESSIONS: int = 10000
     
     # Authentication Configuration
     API_SECRET_KEY: str = "development-secret-key"
     ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 30
-    
+    # Verified bearer tokens kept per worker until they expire (0 disables)
+    TOKEN_CACHE_SIZE: int = 10000
+    # Bearer token for Prometheus scrapes of /api/v1/metrics; when empty the endpoint
+    # needs an admin JWT. Keep the endpoint off public networks either way.
+    METRICS_TOKEN: str = ""
+
+    # HTTP Caching Configuration (Cache-Control policies for conditional GETs)
+    EMPLOYEE_CACHE_CONTROL: str = "private, max-age=60, must-revalidate"
+    HIERARCHY_CACHE_CONTROL: str = "private, max-age=300, stale-while-revalidate=600"
+    # Rendered /employees/{id}/hierarchy responses kept per worker (0 disables)
+    HIERARCHY_RESPONSE_CACHE_SIZE: int = 10000
+    # Read-through cache of employee docs for batch lookups (0 disables)
+    EMPLOYEE_CACHE_SIZE: int = 50000
+    EMPLOYEE_CACHE_TTL_SECONDS: int = 60
+    EMPLOYEE_BATCH_MAX_IDS: int = 500
+    CATALOG_CACHE_CONTROL: str = "public, max-age=3600, stale-while-revalidate=86400"
+    # Department/location catalogs: composite-aggregation page size and background refresh period
+    CATALOG_PAGE_SIZE: int = 1000
+    CATALOG_REFRESH_SECONDS: int = 300
+
+    # Rate Limiting Configuration (per-user token buckets; a *_PER_MINUTE of 0 leaves that budget unlimited)
+    RATE_LIMIT_ENABLED: bool = True
+    RATE_LIMIT_BACKEND: str = "memory"  # "memory" or "redis" for multi-worker deployments
+    RATE_LIMIT_REDIS_URL: str = "redis://localhost:6379/0"
+    RATE_LIMIT_SEARCH_PER_MINUTE: int = 120
+    RATE_LIMIT_SEARCH_BURST: int = 20
+    RATE_LIMIT_EMPLOYEES_PER_MINUTE: int = 300
+    RATE_LIMIT_EMPLOYEES_BURST: int = 50
+    RATE_LIMIT_LLM_PER_MINUTE: int = 20
+    RATE_LIMIT_LLM_BURST: int = 5
+    RATE_LIMIT_MAX_WAIT_SECONDS: float = 2.0
+    RATE_LIMIT_QUEUE_SIZE: int = 10
+
+    # Upstream Bulkhead Configuration (adaptive concurrency per upstream pool)
+    BULKHEAD_ES_SEARCH_LIMIT: int = 20
+    BULKHEAD_ES_SEARCH_MAX_LIMIT: int = 100
+    BULKHEAD_ES_SEARCH_LATENCY_TARGET: float = 0.5
+    BULKHEAD_ES_ADMIN_LIMIT: int = 4
+    BULKHEAD_ES_ADMIN_LATENCY_TARGET: float = 1.0
+    BULKHEAD_LLM_LIMIT: int = 8
+    BULKHEAD_LLM_MAX_LIMIT: int = 32
+    BULKHEAD_LLM_LATENCY_TARGET: float = 15.0
+    # Fixed cap on streamed completions; each holds a connection for its whole body
+    BULKHEAD_LLM_STREAM_LIMIT: int = 16
+    BULKHEAD_MAX_QUEUE: int = 50
+    BULKHEAD_QUEUE_TIMEOUT: float = 5.0
+
     model_config = {
         "env_file": ".env",
         "extra": "ignore"  # Ignore extra fields from .env
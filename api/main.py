@@ -2,16 +2,35 @@ from fastapi import FastAPI, HTTPException, Depends, status
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from contextlib import asynccontextmanager
-import uvicorn
 
 from api.config import settings
 from api.routers import search, llm, health, auth, employees, chats, summary
 from api.middleware.auth import get_current_user
+from api.services.es_client import init_es_client, close_es_client
+from api.services.llm_client import init_llm_client, close_llm_client
+from api.services.org_graph import org_graph_store
+from api.services.catalogs import catalog_store
+from api.services.typeahead import typeahead_store
+from api.services.email_directory import email_directory
+from api.services.history_compactor import history_compactor
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
+    await init_es_client()
+    await init_llm_client()
+    org_graph_store.start()
+    catalog_store.start()
+    typeahead_store.start()
+    email_directory.start()
     yield
+    await history_compactor.stop()
+    await email_directory.stop()
+    await typeahead_store.stop()
+    await catalog_store.stop()
+    await org_graph_store.stop()
+    await close_llm_client()
+    await close_es_client()
 
 app = FastAPI(
     title="Enterprise Search API",
@@ -41,9 +60,9 @@ async def root():
     return {"message": "Enterprise Search API", "version": "1.0.0"}
 
 if __name__ == "__main__":
-    uvicorn.run(
-        "api.main:app",
-        host=settings.HOST,
-        port=settings.PORT,
-        reload=settings.DEBUG
-    )
\ No newline at end of file
+    from api.server import run_development, run_production
+
+    if settings.SERVER_MODE == "production":
+        run_production()
+    else:
+        run_development()
\ No newline at end of file
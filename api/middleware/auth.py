@@ -1,16 +1,67 @@
-from fastapi import HTTPException, Depends, status
+from fastapi import HTTPException, Depends, Request, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
-from jose import JWTError, jwt
+from collections import OrderedDict
 from datetime import datetime, timedelta
-from typing import Optional
+from typing import Optional, Tuple
+import hashlib
 import json
 import os
+import threading
+import time
 
 from api.models.user import User, UserRole
 from api.config import settings
+from api.services.metrics import registry
 
 security = HTTPBearer()
 
+_token_cache_requests = registry.counter("token_cache_requests_total", "Verified-token cache lookups by result")
+
+
+class VerifiedTokenCache:
+    """
+    Bounded LRU of tokens that already passed signature verification, keyed by
+    the SHA-256 of the token (the raw token is never held) and kept only until
+    the token's `exp`. A hit skips jwt.decode and User validation; the cached
+    User is shared between requests and must be treated as read-only.
+    """
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[bytes, Tuple[User, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key(token: str) -> bytes:
+        return hashlib.sha256(token.encode("utf-8")).digest()
+
+    def get(self, token: str) -> Optional[User]:
+        key = self.key(token)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[1] <= time.time():
+                del self._entries[key]
+                entry = None
+            if entry is not None:
+                self._entries.move_to_end(key)
+        _token_cache_requests.inc(labels={"result": "hit" if entry is not None else "miss"})
+        return entry[0] if entry is not None else None
+
+    def put(self, token: str, user: User, expires_at: float) -> None:
+        if self.max_entries <= 0 or expires_at <= time.time():
+            return
+        with self._lock:
+            self._entries[self.key(token)] = (user, expires_at)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+token_cache = VerifiedTokenCache(settings.TOKEN_CACHE_SIZE)
+
 # User data will be provided by the frontend centralized user store
 # Backend only validates JWT tokens and extracts user info from the token payload
 # No hardcoded users - all user data comes from the frontend or external auth system
@@ -18,6 +69,8 @@ security = HTTPBearer()
 
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     """Create JWT access token"""
+    from jose import jwt
+
     to_encode = data.copy()
     if expires_delta:
         expire = datetime.utcnow() + expires_delta
@@ -31,6 +84,8 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
 
 def verify_token(token: str) -> dict:
     """Verify JWT token and return payload"""
+    from jose import JWTError, jwt
+
     try:
         payload = jwt.decode(token, settings.API_SECRET_KEY, algorithms=[settings.ALGORITHM])
         return payload
@@ -42,10 +97,33 @@ def verify_token(token: str) -> dict:
         )
 
 
-async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(security)) -> User:
-    """Get current user from JWT token payload"""
+async def get_current_user(
+    credentials: HTTPAuthorizationCredentials = Depends(security),
+    request: Request = None
+) -> User:
+    """
+    Get current user from JWT token payload. The user is kept on request.state,
+    so dependencies resolving it again in the same request (rate limiting, then
+    the endpoint itself) reuse it instead of decoding the token twice.
+    """
+    resolved = getattr(request.state, "user", None) if request is not None else None
+    if resolved is not None:
+        return resolved
+    user = _user_from_token(credentials.credentials)
+    if request is not None:
+        request.state.user = user
+    return user
+
+
+def _user_from_token(token: str) -> User:
+    from jose import JWTError
+
+    cached = token_cache.get(token)
+    if cached is not None:
+        return cached
+
     try:
-        payload = verify_token(credentials.credentials)
+        payload = verify_token(token)
         email: str = payload.get("sub")
         if email is None:
             raise HTTPException(
@@ -65,7 +143,11 @@ async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(s
             "company": payload.get("company", "Enterprise")
         }
         
-        return User(**user_data)
+        user = User(**user_data)
+        # jwt.decode has already rejected expired tokens; tokens without exp are not cached
+        if isinstance(payload.get("exp"), (int, float)):
+            token_cache.put(token, user, float(payload["exp"]))
+        return user
         
     except JWTError:
         raise HTTPException(
@@ -75,13 +157,16 @@ async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(s
         )
 
 
-async def get_optional_user(credentials: Optional[HTTPAuthorizationCredentials] = Depends(HTTPBearer(auto_error=False))) -> Optional[User]:
+async def get_optional_user(
+    request: Request,
+    credentials: Optional[HTTPAuthorizationCredentials] = Depends(HTTPBearer(auto_error=False))
+) -> Optional[User]:
     """Get current user if token provided, otherwise return None"""
     if credentials is None:
         return None
     
     try:
-        return await get_current_user(credentials)
+        return await get_current_user(credentials, request)
     except HTTPException:
         return None
 
@@ -0,0 +1,45 @@
+"""
+Conditional GET helpers: strong ETags, If-None-Match handling and Cache-Control.
+"""
+import hashlib
+from typing import Any, Optional
+
+from fastapi import Request, Response
+
+
+def make_etag(*parts: Any) -> str:
+    """Build a strong ETag from version tokens (seq_no, primary_term, generation...)"""
+    digest = hashlib.sha1("|".join(str(part) for part in parts).encode("utf-8")).hexdigest()
+    return f'"{digest}"'
+
+
+def doc_version(doc: dict) -> str:
+    """Version token of an Elasticsearch hit/get/mget doc"""
+    return f"{doc.get('_id')}:{doc.get('_primary_term')}:{doc.get('_seq_no')}"
+
+
+def etag_matches(request: Request, etag: str) -> bool:
+    """Check the request's If-None-Match header against an ETag"""
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    # If-None-Match uses the weak comparison function (RFC 9110 13.1.2)
+    candidates = [candidate.strip() for candidate in header.split(",")]
+    return any(candidate.removeprefix("W/") == etag for candidate in candidates)
+
+
+def set_cache_headers(response: Response, etag: str, cache_control: str) -> None:
+    """Attach validator and caching policy to an outgoing response"""
+    response.headers["ETag"] = etag
+    response.headers["Cache-Control"] = cache_control
+
+
+def not_modified(request: Request, etag: str, cache_control: str) -> Optional[Response]:
+    """Return a 304 response if the client already holds this representation"""
+    if not etag_matches(request, etag):
+        return None
+    response = Response(status_code=304)
+    set_cache_headers(response, etag, cache_control)
+    return response
@@ -0,0 +1,189 @@
+"""
+Per-user fair-share rate limiting.
+
+Each caller (JWT subject, or client address for anonymous calls) gets a token
+bucket per budget ("search", "employees", "llm"). Requests that find the bucket
+empty may wait in a small bounded queue for the next token; anything beyond
+that is rejected immediately with 429 and a Retry-After hint. A budget whose
+per-minute rate is 0 is not limited.
+"""
+import asyncio
+import math
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Dict, Optional, Tuple
+
+from fastapi import Depends, HTTPException, Request, status
+
+from api.config import settings
+from api.middleware.auth import get_optional_user
+from api.models.user import User
+
+
+@dataclass(frozen=True)
+class Budget:
+    capacity: float  # burst size
+    refill_rate: float  # tokens per second
+
+
+def _budget(per_minute: int, burst: int) -> Optional[Budget]:
+    """Budget for the given rate and burst, or None when per_minute is 0 (unlimited)"""
+    if per_minute == 0:
+        return None
+    if per_minute < 0 or burst < 1:
+        raise ValueError(f"Rate limits need a positive per-minute rate and a burst of at least 1, got {per_minute}/{burst}")
+    return Budget(capacity=float(burst), refill_rate=per_minute / 60.0)
+
+
+BUDGETS: Dict[str, Optional[Budget]] = {
+    "search": _budget(settings.RATE_LIMIT_SEARCH_PER_MINUTE, settings.RATE_LIMIT_SEARCH_BURST),
+    "employees": _budget(settings.RATE_LIMIT_EMPLOYEES_PER_MINUTE, settings.RATE_LIMIT_EMPLOYEES_BURST),
+    "llm": _budget(settings.RATE_LIMIT_LLM_PER_MINUTE, settings.RATE_LIMIT_LLM_BURST),
+}
+
+
+class InProcessBackend:
+    """Token buckets held in this worker's memory, least recently used dropped past MAX_KEYS"""
+
+    MAX_KEYS = 10000
+
+    def __init__(self):
+        # key -> (tokens, last refill timestamp), least recently used first
+        self._buckets: "OrderedDict[str, Tuple[float, float]]" = OrderedDict()
+
+    async def reserve(self, key: str, budget: Budget, max_wait: float) -> float:
+        """
+        Take one token, letting the bucket go negative by at most max_wait worth
+        of refill. Returns the seconds to wait before the token is usable, or
+        -retry_after (< 0) if the request must be rejected.
+        """
+        now = time.monotonic()
+        tokens, updated = self._buckets.get(key, (budget.capacity, now))
+        tokens = min(budget.capacity, tokens + (now - updated) * budget.refill_rate)
+
+        wait = max(0.0, (1.0 - tokens) / budget.refill_rate)
+        if wait > max_wait:
+            self._buckets[key] = (tokens, now)
+            self._buckets.move_to_end(key)
+            return -wait
+
+        self._buckets[key] = (tokens - 1.0, now)
+        self._buckets.move_to_end(key)
+        # The least recently used bucket has most likely refilled, so dropping it loses little
+        while len(self._buckets) > self.MAX_KEYS:
+            self._buckets.popitem(last=False)
+        return wait
+
+
+class RedisBackend:
+    """Token buckets shared by all workers through Redis (optional dependency)"""
+
+    SCRIPT = """
+    local capacity = tonumber(ARGV[1])
+    local rate = tonumber(ARGV[2])
+    local max_wait = tonumber(ARGV[3])
+    local now = tonumber(ARGV[4])
+    local state = redis.call('HMGET', KEYS[1], 'tokens', 'updated')
+    local tokens = tonumber(state[1]) or capacity
+    local updated = tonumber(state[2]) or now
+    tokens = math.min(capacity, tokens + (now - updated) * rate)
+    local wait = math.max(0, (1 - tokens) / rate)
+    if wait > max_wait then
+        redis.call('HSET', KEYS[1], 'tokens', tokens, 'updated', now)
+        redis.call('EXPIRE', KEYS[1], math.ceil(capacity / rate) + 1)
+        return tostring(-wait)
+    end
+    redis.call('HSET', KEYS[1], 'tokens', tokens - 1, 'updated', now)
+    redis.call('EXPIRE', KEYS[1], math.ceil(capacity / rate) + 1)
+    return tostring(wait)
+    """
+
+    def __init__(self, url: str):
+        try:
+            from redis import asyncio as redis_asyncio
+        except ImportError as e:
+            raise RuntimeError(
+                "RATE_LIMIT_BACKEND=redis requires the 'redis' package (pip install .[redis])"
+            ) from e
+        self._redis = redis_asyncio.from_url(url)
+        self._script = self._redis.register_script(self.SCRIPT)
+
+    async def reserve(self, key: str, budget: Budget, max_wait: float) -> float:
+        result = await self._script(
+            keys=[f"ratelimit:{key}"],
+            args=[budget.capacity, budget.refill_rate, max_wait, time.time()],
+        )
+        return float(result)
+
+
+class RateLimiter:
+    def __init__(self, backend, max_wait: float, queue_size: int):
+        self.backend = backend
+        self.max_wait = max_wait
+        self.queue_size = queue_size
+        self._waiting: Dict[str, int] = {}
+
+    async def acquire(self, name: str, subject: str) -> None:
+        budget = BUDGETS[name]
+        if budget is None:
+            return
+        key = f"{name}:{subject}"
+
+        # Callers already queued for this key may not be joined by more than queue_size others
+        max_wait = self.max_wait if self._waiting.get(key, 0) < self.queue_size else 0.0
+        wait = await self.backend.reserve(key, budget, max_wait)
+
+        if wait < 0:
+            raise HTTPException(
+                status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                detail=f"Rate limit exceeded for {name} requests",
+                headers={"Retry-After": str(max(1, math.ceil(-wait)))},
+            )
+
+        if wait > 0:
+            self._waiting[key] = self._waiting.get(key, 0) + 1
+            try:
+                await asyncio.sleep(wait)
+            finally:
+                self._waiting[key] -= 1
+                if not self._waiting[key]:
+                    del self._waiting[key]
+
+
+_limiter: Optional[RateLimiter] = None
+
+
+def get_rate_limiter() -> RateLimiter:
+    global _limiter
+    if _limiter is None:
+        if settings.RATE_LIMIT_BACKEND == "redis":
+            backend = RedisBackend(settings.RATE_LIMIT_REDIS_URL)
+        else:
+            backend = InProcessBackend()
+        _limiter = RateLimiter(
+            backend,
+            max_wait=settings.RATE_LIMIT_MAX_WAIT_SECONDS,
+            queue_size=settings.RATE_LIMIT_QUEUE_SIZE,
+        )
+    return _limiter
+
+
+def rate_limit(name: str):
+    """Dependency factory enforcing the named budget for the calling user"""
+    if name not in BUDGETS:
+        raise ValueError(f"Unknown rate limit budget: {name}")
+
+    async def limiter(
+        request: Request,
+        current_user: Optional[User] = Depends(get_optional_user)
+    ) -> None:
+        if not settings.RATE_LIMIT_ENABLED:
+            return
+        if current_user is not None:
+            subject = f"user:{current_user.email}"
+        else:
+            subject = f"ip:{request.client.host if request.client else 'unknown'}"
+        await get_rate_limiter().acquire(name, subject)
+
+    return limiter
@@ -23,6 +23,8 @@ class ChatRequest(BaseModel):
     message: str
     search_context: Optional[List[Dict[str, Any]]] = []  # More flexible - accepts any dict
     conversation_history: Optional[List[ChatMessage]] = []
+    # Lets older history be replaced by a summary kept for the session
+    session_id: Optional[str] = None
 
 
 class ChatResponse(BaseModel):
@@ -3,13 +3,15 @@ from fastapi.security import HTTPBearer
 from pydantic import BaseModel
 from typing import Dict, List, Optional
 from datetime import timedelta
-from elasticsearch import Elasticsearch
 
 from api.models.user import User
 from api.middleware.auth import (
     create_access_token, get_current_user
 )
 from api.config import settings
+from api.services.bulkhead import bulkheads
+from api.services.email_directory import email_directory
+from api.services.es_client import get_es_client
 
 router = APIRouter()
 
@@ -24,20 +26,11 @@ class LoginResponse(BaseModel):
     user: User
 
 
-def get_es_client():
-    """Get Elasticsearch client for employee validation"""
-    try:
-        es_url = settings.ELASTICSEARCH_URL or "http://localhost:9200"
-        es = Elasticsearch([es_url])
-        if not es.ping():
-            raise Exception("Cannot connect to Elasticsearch")
-        return es
-    except Exception as e:
-        raise HTTPException(status_code=503, detail=f"Elasticsearch connection failed: {str(e)}")
-
-
 async def validate_user_email(email: str) -> Optional[Dict]:
-    """Validate user email against Elasticsearch employee data"""
+    """Validate user email against the employee directory (Elasticsearch until it has loaded)"""
+    if email_directory.loaded:
+        return email_directory.lookup(email)
+
     try:
         es = get_es_client()
         
@@ -51,13 +44,16 @@ async def validate_user_email(email: str) -> Optional[Dict]:
             "size": 1
         }
         
-        result = es.search(index="new_people", body=search_body)
+        async with bulkheads["es_search"].acquire():
+            result = await es.search(index="new_people", **search_body)
         
         if result['hits']['total']['value'] > 0:
             # Return the employee data
             return result['hits']['hits'][0]['_source']
         
         return None
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"User validation failed: {str(e)}")
 
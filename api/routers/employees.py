@@ -1,22 +1,56 @@
 # api/routers/employees.py
-from fastapi import APIRouter, HTTPException, Query
-from typing import List, Optional, Dict, Any
-from elasticsearch import Elasticsearch, NotFoundError
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from fastapi.responses import JSONResponse, StreamingResponse
+from pydantic import BaseModel, Field
+from typing import List, Optional, Dict, Any, Tuple
 from api.config import settings
+from api.middleware.http_cache import make_etag, doc_version, not_modified, set_cache_headers
+from api.middleware.rate_limit import rate_limit
+from api.services.es_client import get_es_client, index_generation
+from api.services.bulkhead import bulkheads
+from api.services.org_graph import org_graph_store, project_source, HIERARCHY_INDEX, PROJECTED_FIELDS
+from api.services.hierarchy_cache import hierarchy_cache, CachedHierarchy
+from api.services.employee_cache import employee_cache
+from api.services.catalogs import catalog_store
+from api.services.typeahead import typeahead_store, SUGGESTION_FIELDS
+import asyncio
+import base64
+import json
 import math
 
-router = APIRouter(prefix="/employees", tags=["employees"])
+router = APIRouter(
+    prefix="/employees",
+    tags=["employees"],
+    dependencies=[Depends(rate_limit("employees"))]
+)
 
-def get_unified_es_client():
-    """Get Elasticsearch client"""
+async def _mget_docs(es, index: str, ids: List[str]) -> List[Dict[str, Any]]:
+    """Fetch docs by id, EMPLOYEE_BATCH_MAX_IDS per round trip; returns [] without calling ES for no ids"""
+    docs: List[Dict[str, Any]] = []
+    chunk = max(1, settings.EMPLOYEE_BATCH_MAX_IDS)
+    for start in range(0, len(ids), chunk):
+        async with bulkheads["es_search"].acquire():
+            response = await es.mget(index=index, ids=ids[start:start + chunk])
+        docs.extend(response['docs'])
+    return docs
+
+
+def _encode_cursor(sort_values: List[Any]) -> str:
+    return base64.urlsafe_b64encode(json.dumps(sort_values, separators=(",", ":")).encode("utf-8")).decode("ascii")
+
+
+def _decode_cursor(cursor: str) -> List[Any]:
     try:
-        es_url = settings.ELASTICSEARCH_URL or "http://localhost:9200"
-        es = Elasticsearch([es_url])
-        if not es.ping():
-            raise Exception("Cannot connect to Elasticsearch")
-        return es
-    except Exception as e:
-        raise HTTPException(status_code=503, detail=f"Elasticsearch connection failed: {str(e)}")
+        sort_values = json.loads(base64.urlsafe_b64decode(cursor.encode("ascii")))
+    except ValueError:
+        sort_values = None
+    if not isinstance(sort_values, list):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    return sort_values
+
+
+def _format_total(value: int, relation: str) -> str:
+    return f"{value:,}+" if relation == "gte" else str(value)
 
 
 @router.get("/search")
@@ -24,14 +58,20 @@ async def search_employees(
     q: str = Query(..., description="Search query"),
     page: int = Query(1, description="Page number for pagination", ge=1),
     size: int = Query(20, description="Number of results to return", le=100),
+    cursor: Optional[str] = Query(None, description="next_cursor from the previous page (replaces page)"),
     department: Optional[str] = Query(None, description="Filter by department"),
     location: Optional[str] = Query(None, description="Filter by location")
 ):
     """
-    Search employees with optional filters and pagination
+    Search employees with optional filters and pagination.
+
+    Pass the returned next_cursor to fetch the following page with
+    search_after, which costs the same at any depth; page numbers still work
+    for the first few pages. Totals are exact up to SEARCH_TRACK_TOTAL_HITS
+    and a lower bound ("10,000+") beyond it.
     """
     try:
-        es = get_unified_es_client()
+        es = get_es_client()
         
         query_should_clauses = [
             {
@@ -70,56 +110,563 @@ async def search_employees(
         if location:
             filters.append({"term": {"city.keyword": location}})
         
-        # Calculate 'from' for pagination
-        from_value = (page - 1) * size
-        
         search_body = {
             "query": { "bool": { "must": [query], "filter": filters if filters else [] } },
-            "from": from_value,
             "size": size,
-            "sort": [ {"_score": {"order": "desc"}}, {"fullName.keyword": {"order": "asc", "missing": "_last"}} ]
+            # employeeId breaks ties between equal scores and names, so every hit has a unique sort position
+            "sort": [
+                {"_score": {"order": "desc"}},
+                {"fullName.keyword": {"order": "asc", "missing": "_last"}},
+                {"employeeId": {"order": "asc"}}
+            ],
+            "track_total_hits": settings.SEARCH_TRACK_TOTAL_HITS
         }
+        if cursor:
+            search_body["search_after"] = _decode_cursor(cursor)
+        else:
+            search_body["from"] = (page - 1) * size
 
-        result = es.search(index="new_people", **search_body)
+        async with bulkheads["es_search"].acquire():
+            result = await es.search(index="new_people", **search_body)
         
-        employees = [hit['_source'] for hit in result['hits']['hits']]
+        hits = result['hits']['hits']
+        employees = [hit['_source'] for hit in hits]
         total_hits = result['hits']['total']['value']
+        total_relation = result['hits']['total']['relation']
+        # A full page means there may be more; the next query starts after its last sort position
+        next_cursor = _encode_cursor(hits[-1]['sort']) if hits and len(hits) == size else None
 
         return {
             "success": True,
-            "data": { "employees": employees, "total": total_hits, "pagination": { "page": page, "size": size, "total_pages": math.ceil(total_hits / size) if size > 0 else 0 } }
+            "data": {
+                "employees": employees,
+                "total": total_hits,
+                "total_relation": total_relation,
+                "total_display": _format_total(total_hits, total_relation),
+                "pagination": {
+                    "page": page,
+                    "size": size,
+                    # A lower bound when total_relation is "gte"
+                    "total_pages": math.ceil(total_hits / size) if size > 0 else 0,
+                    "next_cursor": next_cursor
+                }
+            }
         }
         
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Search failed: {str(e)}")
 
 
+@router.get("/typeahead")
+async def employee_typeahead(
+    q: str = Query(..., description="Name, LAN id or email prefix", min_length=1),
+    limit: int = Query(10, description="Number of suggestions to return", ge=1, le=settings.TYPEAHEAD_MAX_RESULTS)
+):
+    """
+    Suggest employees as the user types, most senior first
+    """
+    index = typeahead_store.index
+    if index is not None:
+        return {"success": True, "data": {"suggestions": index.search(q, limit)}}
+
+    # Index still building: answer with a prefix query instead
+    try:
+        es = get_es_client()
+        search_body = {
+            "query": {
+                "bool": {
+                    "should": [
+                        {"match_bool_prefix": {"fullName": q}},
+                        {"prefix": {"lanIds": {"value": q, "case_insensitive": True}}},
+                        {"prefix": {"emailAddress": {"value": q.lower()}}}
+                    ],
+                    "minimum_should_match": 1
+                }
+            },
+            "_source": list(SUGGESTION_FIELDS),
+            "size": limit
+        }
+        async with bulkheads["es_search"].acquire():
+            result = await es.search(index="new_people", **search_body)
+        return {"success": True, "data": {"suggestions": [hit['_source'] for hit in result['hits']['hits']]}}
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Typeahead failed: {str(e)}")
+
+
+class EmployeeBatchRequest(BaseModel):
+    ids: List[str] = Field(..., min_length=1, max_length=settings.EMPLOYEE_BATCH_MAX_IDS)
+    fields: Optional[List[str]] = Field(None, description="Source fields to return (default: all)")
+
+
+@router.post("/batch")
+async def get_employees_batch(batch: EmployeeBatchRequest):
+    """
+    Look up many employees at once: cached docs are served from memory and the
+    rest are fetched with one mget. Results follow the input order; ids that do
+    not exist come back with found=false.
+    """
+    try:
+        es = get_es_client()
+        docs = await employee_cache.get_many(es, batch.ids)
+
+        results = []
+        for employee_id in batch.ids:
+            source = docs.get(employee_id)
+            if source is not None and batch.fields:
+                source = {field: source[field] for field in batch.fields if field in source}
+            results.append({"id": employee_id, "found": source is not None, "employee": source})
+
+        return {
+            "success": True,
+            "data": {
+                "employees": results,
+                "missing": [employee_id for employee_id in dict.fromkeys(batch.ids) if docs.get(employee_id) is None]
+            }
+        }
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Batch lookup failed: {str(e)}")
+
+
+def _path_payload(from_chain, to_chain, common_manager, from_id, to_id):
+    """Chains run from each employee up to (and including) the common manager"""
+    targets = (from_id, to_id)
+
+    def chain_nodes(chain):
+        return [_format_node(doc, level, is_target=str(doc.get('employeeId')) in targets) for doc, level in chain]
+
+    return {
+        "success": True,
+        "data": {
+            "common_manager": _format_node(*common_manager) if common_manager else None,
+            "from_chain": chain_nodes(from_chain),
+            "to_chain": chain_nodes(to_chain),
+            # Reporting-line hops between the two employees; None when they share no manager
+            "distance": len(from_chain) + len(to_chain) - 2 if common_manager else None
+        }
+    }
+
+
+@router.get("/path")
+async def get_reporting_path(
+    from_id: str = Query(..., alias="from", description="Employee ID at one end of the path"),
+    to_id: str = Query(..., alias="to", description="Employee ID at the other end of the path")
+):
+    """
+    Get the lowest common manager of two employees and both reporting chains up to it
+    """
+    # In-memory graph: binary lifting answers the common manager in O(log depth)
+    graph = org_graph_store.graph
+    if graph is not None:
+        a, b = graph.lookup(from_id), graph.lookup(to_id)
+        if a is not None and b is not None:
+            lca = graph.lowest_common_manager(a, b)
+
+            def chain_up(node):
+                chain = []
+                while node >= 0:
+                    chain.append((graph.source(node), int(graph.depth[node])))
+                    if node == lca:
+                        break
+                    node = int(graph.parent[node])
+                return chain
+
+            common_manager = (graph.source(lca), int(graph.depth[lca])) if lca >= 0 else None
+            return _path_payload(chain_up(a), chain_up(b), common_manager, from_id, to_id)
+
+    # Fallback: compare the precomputed management chains from the hierarchy index
+    try:
+        es = get_es_client()
+        endpoints = await _mget_docs(es, HIERARCHY_INDEX, [from_id, to_id])
+        if not all(doc['found'] for doc in endpoints):
+            raise HTTPException(status_code=404, detail="Employee not found in hierarchy index")
+        chains = [doc['_source'].get('management_chain_ids') or [doc['_id']] for doc in endpoints]
+
+        shared = 0
+        while shared < min(map(len, chains)) and chains[0][shared] == chains[1][shared]:
+            shared += 1
+        # Keep each chain from the common manager (if any) down to the employee
+        start = shared - 1 if shared else 0
+        needed = list(dict.fromkeys(chains[0][start:] + chains[1][start:]))
+        docs = {doc['_id']: doc['_source'] for doc in await _mget_docs(es, HIERARCHY_INDEX, needed) if doc['found']}
+
+        def chain_up(chain):
+            return [(docs[emp_id], level) for level, emp_id in reversed(list(enumerate(chain))[start:]) if emp_id in docs]
+
+        lca_id = chains[0][shared - 1] if shared else None
+        common_manager = (docs[lca_id], shared - 1) if lca_id in docs else None
+        return _path_payload(chain_up(chains[0]), chain_up(chains[1]), common_manager, from_id, to_id)
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Path retrieval failed: {str(e)}")
+
+
+def _chart_node(graph, node: int) -> Dict[str, Any]:
+    return {
+        **graph.source(node),
+        "depth": int(graph.depth[node]),
+        "child_count": len(graph.children_of(node)),
+        "descendant_count": graph.descendant_count(node),
+    }
+
+
+def _expand(level: List[tuple], limit: int, budget: int) -> Tuple[List[List[Any]], int]:
+    """
+    Children to list under each (item, children) of a level: at most `limit`
+    per node and `budget` in all. Nodes cut short get has_more_children and the
+    next_offset to expand them from with `?root=<id>&offset=<next_offset>`.
+    """
+    taken = []
+    for item, children in level:
+        take = max(0, min(limit, len(children), budget))
+        budget -= take
+        item["has_more_children"] = take < len(children)
+        item["next_offset"] = take if take < len(children) else None
+        taken.append(children[:take])
+    return taken, budget
+
+
+def _chart_tree(graph, first_level, depth: int, limit: int, budget: int) -> List[Dict[str, Any]]:
+    """Nodes of first_level with `depth` levels below them, breadth-first within `budget` nodes"""
+    level = [(_chart_node(graph, int(n)), graph.children_of(int(n))) for n in first_level]
+    nodes = [item for item, _ in level]
+    budget -= len(level)
+    for _ in range(depth):
+        taken, budget = _expand(level, limit, budget)
+        next_level = []
+        for (item, _), children in zip(level, taken):
+            below = [(_chart_node(graph, int(child)), graph.children_of(int(child))) for child in children]
+            item["children"] = [child for child, _ in below]
+            next_level.extend(below)
+        level = next_level
+    return nodes
+
+
+def _chart_doc(source: Dict[str, Any]):
+    """Org-chart node from an employee_hierarchy doc, plus its report ids"""
+    item = {k: v for k, v in source.items() if k not in ("reports", "management_chain_ids", "org_stats")}
+    reports = source.get('reports') or []
+    headcount = (source.get('org_stats') or {}).get('headcount')
+    item["child_count"] = len(reports)
+    item["descendant_count"] = headcount - 1 if headcount is not None else None
+    return item, reports
+
+
+async def _chart_tree_es(es, sources: List[Dict[str, Any]], depth: int, limit: int, budget: int) -> List[Dict[str, Any]]:
+    """ES fallback for _chart_tree: one mget per level instead of one per node"""
+    level = [_chart_doc(source) for source in sources]
+    nodes = [item for item, _ in level]
+    budget -= len(level)
+    for _ in range(depth):
+        taken, budget = _expand(level, limit, budget)
+        ids = [report_id for reports in taken for report_id in reports]
+        docs = {doc['_id']: doc['_source'] for doc in await _mget_docs(es, HIERARCHY_INDEX, ids) if doc.get('found')}
+        next_level = []
+        for (item, _), reports in zip(level, taken):
+            below = [_chart_doc(docs[report_id]) for report_id in reports if report_id in docs]
+            item["children"] = [child for child, _ in below]
+            next_level.extend(below)
+        level = next_level
+    return nodes
+
+
+def _org_chart_payload(root, nodes, total, offset, limit):
+    return {
+        "success": True,
+        "data": {
+            "root": root,
+            "nodes": nodes,
+            "total": total,
+            "pagination": {
+                "offset": offset,
+                "limit": limit,
+                "next_offset": offset + limit if offset + limit < total else None,
+            },
+        },
+    }
+
+
+@router.get("/org-chart")
+async def get_org_chart(
+    request: Request,
+    response: Response,
+    root: Optional[str] = Query(None, description="Employee ID to expand (default: the top of the org)"),
+    depth: int = Query(2, description="Levels below the root to include", ge=1, le=settings.ORG_CHART_MAX_DEPTH),
+    offset: int = Query(0, description="Skip this many nodes of the first level", ge=0),
+    limit: int = Query(50, description="Nodes per level to list (the first level is paged)", ge=1, le=500)
+):
+    """
+    Browse the org chart from the top, a few levels at a time.
+
+    `nodes` is the first level under the root (the top-level employees when no
+    root is given), paged by offset/limit; each carries `depth - 1` further
+    levels. Every node has child_count and descendant_count so the UI can show
+    what is collapsed. A response holds at most ORG_CHART_MAX_NODES nodes,
+    filled level by level; a node whose children were cut at `limit` or by that
+    budget has has_more_children and next_offset: fetch
+    `?root=<id>&offset=<next_offset>` to expand it further. Whole-org dumps
+    belong to /org-chart/export.
+    """
+    from elasticsearch import NotFoundError
+
+    # The first level is paged, so it never takes more than the node budget by itself
+    limit = min(limit, settings.ORG_CHART_MAX_NODES)
+    graph = org_graph_store.graph
+    if graph is not None and (root is None or graph.lookup(root) is not None):
+        etag = make_etag("org-chart", graph.generation, request.url.query)
+        cached = not_modified(request, etag, settings.HIERARCHY_CACHE_CONTROL)
+        if cached:
+            return cached
+        if root is None:
+            root_item, first_level = None, graph.roots()
+        else:
+            node = graph.lookup(root)
+            root_item, first_level = _chart_node(graph, node), graph.children_of(node)
+        nodes = _chart_tree(graph, first_level[offset:offset + limit], depth - 1, limit, settings.ORG_CHART_MAX_NODES)
+        set_cache_headers(response, etag, settings.HIERARCHY_CACHE_CONTROL)
+        return _org_chart_payload(root_item, nodes, len(first_level), offset, limit)
+
+    try:
+        es = get_es_client()
+        async with bulkheads["es_admin"].acquire():
+            generation = await index_generation(es, HIERARCHY_INDEX)
+        etag = make_etag("org-chart", generation, request.url.query)
+        cached = not_modified(request, etag, settings.HIERARCHY_CACHE_CONTROL)
+        if cached:
+            return cached
+
+        if root is None:
+            async with bulkheads["es_search"].acquire():
+                result = await es.search(
+                    index=HIERARCHY_INDEX,
+                    query={"term": {"depth": 0}},
+                    sort=[{"pre": {"order": "asc"}}],
+                    from_=offset,
+                    size=limit,
+                    track_total_hits=True
+                )
+            root_item = None
+            sources = [hit['_source'] for hit in result['hits']['hits']]
+            total = result['hits']['total']['value']
+        else:
+            try:
+                async with bulkheads["es_search"].acquire():
+                    root_doc = await es.get(index=HIERARCHY_INDEX, id=root)
+            except NotFoundError:
+                raise HTTPException(status_code=404, detail="Employee not found in hierarchy index")
+            root_item, reports = _chart_doc(root_doc['_source'])
+            page_ids = reports[offset:offset + limit]
+            docs = {doc['_id']: doc['_source'] for doc in await _mget_docs(es, HIERARCHY_INDEX, page_ids) if doc.get('found')}
+            sources = [docs[i] for i in page_ids if i in docs]
+            total = len(reports)
+
+        nodes = await _chart_tree_es(es, sources, depth - 1, limit, settings.ORG_CHART_MAX_NODES)
+        set_cache_headers(response, etag, settings.HIERARCHY_CACHE_CONTROL)
+        return _org_chart_payload(root_item, nodes, total, offset, limit)
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Org chart retrieval failed: {str(e)}")
+
+
+def _export_graph(graph, start: int, end: int):
+    """Chunked JSON of a pre-order range, built one chunk at a time"""
+    chunk = settings.ORG_CHART_EXPORT_CHUNK
+    yield '{"success":true,"data":{"nodes":['
+    for first in range(start, end, chunk):
+        nodes = (json.dumps(_chart_node(graph, n)) for n in range(first, min(first + chunk, end)))
+        yield ("," if first > start else "") + ",".join(nodes)
+    yield ']}}'
+
+
+async def _export_es(es, root_doc: Optional[Dict[str, Any]]):
+    """Chunked JSON of the hierarchy index in pre-order, paged with search_after"""
+    query = {"match_all": {}}
+    if root_doc is not None:
+        query = {"bool": {"filter": [
+            {"range": {"pre": {"gte": root_doc['pre']}}},
+            {"range": {"post": {"lte": root_doc['post']}}},
+        ]}}
+    yield '{"success":true,"data":{"nodes":['
+    search_after, first = None, True
+    while True:
+        async with bulkheads["es_search"].acquire():
+            result = await es.search(
+                index=HIERARCHY_INDEX,
+                query=query,
+                source_excludes=["management_chain_ids"],
+                sort=[{"pre": {"order": "asc"}}],
+                size=settings.ORG_CHART_EXPORT_CHUNK,
+                search_after=search_after
+            )
+        hits = result['hits']['hits']
+        if not hits:
+            break
+        nodes = ",".join(json.dumps(_chart_doc(hit['_source'])[0]) for hit in hits)
+        yield ("" if first else ",") + nodes
+        first = False
+        search_after = hits[-1]['sort']
+    yield ']}}'
+
+
+@router.get("/org-chart/export")
+async def export_org_chart(
+    root: Optional[str] = Query(None, description="Employee ID whose subtree to export (default: the whole org)")
+):
+    """
+    Stream the org chart (or one subtree) as a flat JSON list of nodes in
+    org-chart order. Each node carries managerEmpId, depth, child_count and
+    descendant_count; the body is written in chunks so memory stays bounded
+    regardless of org size.
+    """
+    from elasticsearch import NotFoundError
+
+    graph = org_graph_store.graph
+    if graph is not None and (root is None or graph.lookup(root) is not None):
+        if root is None:
+            start, end = 0, len(graph)
+        else:
+            start = graph.lookup(root)
+            end = int(graph.subtree_end(start))
+        # Holds on to this graph for the whole stream, so a concurrent swap cannot mix versions
+        return StreamingResponse(_export_graph(graph, start, end), media_type="application/json")
+
+    try:
+        es = get_es_client()
+        root_doc = None
+        if root is not None:
+            try:
+                async with bulkheads["es_search"].acquire():
+                    root_doc = (await es.get(index=HIERARCHY_INDEX, id=root, source_includes=["pre", "post"]))['_source']
+            except NotFoundError:
+                raise HTTPException(status_code=404, detail="Employee not found in hierarchy index")
+            if root_doc.get('pre') is None or root_doc.get('post') is None:
+                raise HTTPException(
+                    status_code=503,
+                    detail="Hierarchy index has no pre/post numbering yet; re-run populate_hierarchy_nodes.py"
+                )
+        return StreamingResponse(_export_es(es, root_doc), media_type="application/json")
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Org chart export failed: {str(e)}")
+
+
+def _format_node(emp_data, level, is_target=False, reports=None):
+    """Helper to create a consistent node structure."""
+    return {
+        "id": str(emp_data.get('employeeId')),
+        "name": emp_data.get('fullName', 'Unknown'),
+        "title": emp_data.get('designations', 'Unknown Title'),
+        "department": emp_data.get('departments', 'Unknown Department'),
+        "email": emp_data.get('emailAddress', f"{emp_data.get('fullName', 'unknown').lower().replace(' ', '.')}@company.com"),
+        "level": level,
+        "is_target": is_target,
+        "reports": reports or [],
+        "country": emp_data.get('country'), # Added
+        "userImageUrl": emp_data.get('userImageUrl'), # Added
+        "profileUrl": emp_data.get('profileUrl') # Added
+    }
+
+
+def _hierarchy_payload(employee_id, employee, management_chain_docs, direct_reports):
+    """Build the focused hierarchy tree and format the management chain for the response"""
+    if not management_chain_docs:
+        raise HTTPException(status_code=404, detail="Employee not found")
+
+    target_employee_level = len(management_chain_docs) - 1
+    direct_reports_nodes = [_format_node(report, target_employee_level + 1) for report in direct_reports]
+
+    hierarchy_tree = _format_node(management_chain_docs[-1], target_employee_level, is_target=True, reports=direct_reports_nodes)
+
+    for i in range(len(management_chain_docs) - 2, -1, -1):
+        manager_data = management_chain_docs[i]
+        hierarchy_tree = _format_node(manager_data, i, is_target=False, reports=[hierarchy_tree])
+
+    management_chain_response = [_format_node(emp, i, is_target=(str(emp.get('employeeId')) == employee_id)) for i, emp in enumerate(management_chain_docs)]
+
+    return {
+        "success": True,
+        "data": {
+            "employee": employee,
+            "hierarchy_tree": hierarchy_tree,
+            "management_chain": management_chain_response,
+            "total_employees": len(management_chain_docs) + len(direct_reports)
+        }
+    }
+
+
 @router.get("/{employee_id}/hierarchy")
-async def get_employee_hierarchy(employee_id: str):
+async def get_employee_hierarchy(employee_id: str, request: Request, response: Response):
     """
     Get employee hierarchy (org chart centered on the employee)
+
+    `data.employee` carries employeeId, managerEmpId, the org-chart display
+    fields (org_graph.FIELDS), reports and management_chain_ids, whether the
+    response comes from the in-memory graph or from Elasticsearch.
     """
+    from elasticsearch import NotFoundError
+
+    # Serve from the in-memory org graph when it is loaded and knows the employee;
+    # otherwise (still loading, or a newer hire) fall back to Elasticsearch
+    graph = org_graph_store.graph
+    node = graph.lookup(employee_id) if graph is not None else None
+    if node is not None:
+        # Rendered responses stay cached until a graph swap touches this employee's
+        # chain or reports (see hierarchy_cache), so unrelated edits keep them warm
+        entry = hierarchy_cache.get(employee_id)
+        if entry is None:
+            chain = graph.chain(node)
+            employee = graph.source(node, with_relations=True)
+            management_chain_docs = [graph.source(n) for n in chain]
+            direct_reports = [graph.source(child) for child in graph.children_of(node)]
+            payload = _hierarchy_payload(employee_id, employee, management_chain_docs, direct_reports)
+            entry = CachedHierarchy(
+                body=JSONResponse(payload).body,
+                etag=make_etag(employee_id, graph.generation),
+                chain_ids=[graph.ids[n] for n in chain],
+            )
+            hierarchy_cache.put(employee_id, entry)
+        cached = not_modified(request, entry.etag, settings.HIERARCHY_CACHE_CONTROL)
+        if cached:
+            return cached
+        rendered = Response(content=entry.body, media_type="application/json")
+        set_cache_headers(rendered, entry.etag, settings.HIERARCHY_CACHE_CONTROL)
+        return rendered
+
     try:
-        es = get_unified_es_client()
-        HIERARCHY_INDEX = "employee_hierarchy"
+        es = get_es_client()
 
         # 1. Get the target employee from the hierarchy index
         try:
-            employee_doc = es.get(index=HIERARCHY_INDEX, id=employee_id)
-            employee = employee_doc['_source']
+            async with bulkheads["es_search"].acquire():
+                employee_doc = await es.get(index=HIERARCHY_INDEX, id=employee_id, source_includes=PROJECTED_FIELDS)
+            employee = project_source(employee_doc['_source'])
         except NotFoundError:
             raise HTTPException(status_code=404, detail="Employee not found in hierarchy index")
 
-        # 2. Build management chain using the pre-calculated management_chain_ids
-        management_chain_docs = []
+        # 2. Fetch the management chain (pre-calculated management_chain_ids) and the
+        #    direct reports; both depend only on the target doc, so fetch them concurrently
         management_chain_ids = employee.get('management_chain_ids', [])
+        report_ids = employee.get('reports', [])
+        chain_docs, report_docs = await asyncio.gather(
+            _mget_docs(es, HIERARCHY_INDEX, management_chain_ids),
+            _mget_docs(es, HIERARCHY_INDEX, report_ids),
+        )
+        doc_versions = [doc_version(employee_doc)]
+        doc_versions.extend(doc_version(doc) for doc in chain_docs if doc['found'])
+        doc_versions.extend(doc_version(doc) for doc in report_docs if doc['found'])
 
+        management_chain_docs = []
         if management_chain_ids:
-            # Fetch all employees in the management chain in one go
-            mget_resp = es.mget(index=HIERARCHY_INDEX, body={'ids': management_chain_ids})
-            
             # Create a map for quick lookup of fetched documents
-            fetched_employees = {doc['_id']: doc['_source'] for doc in mget_resp['docs'] if doc['found']}
+            fetched_employees = {doc['_id']: doc['_source'] for doc in chain_docs if doc['found']}
             
             # Reconstruct the management chain in the correct order
             for emp_id in management_chain_ids:
@@ -132,85 +679,227 @@ async def get_employee_hierarchy(employee_id: str):
             # If management_chain_ids is empty, the employee is likely the CEO or top-level
             management_chain_docs.append(employee)
 
-        # 3. Get direct reports for the target employee
-        report_ids = employee.get('reports', [])
-        direct_reports = []
-        if report_ids:
-            reports_result = es.mget(index=HIERARCHY_INDEX, body={'ids': report_ids})
-            direct_reports = [doc['_source'] for doc in reports_result['docs'] if doc['found']]
-
-
-        # 4. Build the focused hierarchy tree and format the management chain for the response
-        def format_node(emp_data, level, is_target=False, reports=[]):
-            """Helper to create a consistent node structure."""
-            return {
-                "id": str(emp_data.get('employeeId')),
-                "name": emp_data.get('fullName', 'Unknown'),
-                "title": emp_data.get('designations', 'Unknown Title'),
-                "department": emp_data.get('departments', 'Unknown Department'),
-                "email": emp_data.get('emailAddress', f"{emp_data.get('fullName', 'unknown').lower().replace(' ', '.')}@company.com"),
-                "level": level,
-                "is_target": is_target,
-                "reports": reports,
-                "country": emp_data.get('country'), # Added
-                "userImageUrl": emp_data.get('userImageUrl'), # Added
-                "profileUrl": emp_data.get('profileUrl') # Added
-            }
+        # 3. Direct reports for the target employee
+        direct_reports = [doc['_source'] for doc in report_docs if doc['found']]
 
-        target_employee_level = len(management_chain_docs) - 1
-        direct_reports_nodes = [format_node(report, target_employee_level + 1) for report in direct_reports]
-        
-        if not management_chain_docs:
-             raise HTTPException(status_code=404, detail="Employee not found")
+        # The tree is fully determined by the versions of the docs it is built from
+        etag = make_etag(employee_id, *doc_versions)
+        cached = not_modified(request, etag, settings.HIERARCHY_CACHE_CONTROL)
+        if cached:
+            return cached
+
+        set_cache_headers(response, etag, settings.HIERARCHY_CACHE_CONTROL)
+        return _hierarchy_payload(employee_id, employee, management_chain_docs, direct_reports)
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Hierarchy retrieval failed: {str(e)}")
 
-        hierarchy_tree = format_node(management_chain_docs[-1], target_employee_level, is_target=True, reports=direct_reports_nodes)
 
-        for i in range(len(management_chain_docs) - 2, -1, -1):
-            manager_data = management_chain_docs[i]
-            hierarchy_tree = format_node(manager_data, i, is_target=False, reports=[hierarchy_tree])
+def _descendants_payload(employee, items, total, page, size, next_after):
+    return {
+        "success": True,
+        "data": {
+            "employee": employee,
+            "descendants": items,
+            "total": total,
+            "pagination": {
+                "page": page,
+                "size": size,
+                "total_pages": math.ceil(total / size) if size > 0 else 0,
+                # Pass as `after` to keep paging past the result window
+                "next_after": next_after,
+            },
+        },
+    }
 
-        management_chain_response = [format_node(emp, i, is_target=(str(emp.get('employeeId')) == employee_id)) for i, emp in enumerate(management_chain_docs)]
 
-        return {
-            "success": True,
-            "data": {
-                "employee": employee,
-                "hierarchy_tree": hierarchy_tree,
-                "management_chain": management_chain_response,
-                "total_employees": len(management_chain_docs) + len(direct_reports)
-            }
+@router.get("/{employee_id}/descendants")
+async def get_employee_descendants(
+    employee_id: str,
+    request: Request,
+    response: Response,
+    max_depth: Optional[int] = Query(None, description="Levels below the employee to include", ge=1),
+    page: int = Query(1, description="Page number for pagination", ge=1),
+    size: int = Query(100, description="Number of results to return", ge=1, le=1000),
+    after: Optional[int] = Query(None, description="Return descendants after this pre-order number", ge=0),
+    department: Optional[str] = Query(None, description="Filter by department"),
+    location: Optional[str] = Query(None, description="Filter by location")
+):
+    """
+    Get everyone under an employee (the whole subtree) in org-chart order.
+
+    Descendants of x are exactly the nodes with pre > x.pre and post < x.post,
+    so the subtree is one range scan over the in-memory graph or one range
+    query on the hierarchy index.
+    """
+    from elasticsearch import NotFoundError
+
+    filters = {}
+    if department:
+        filters["departments"] = department
+    if location:
+        filters["city"] = location
+    from_value = (page - 1) * size
+
+    graph = org_graph_store.graph
+    node = graph.lookup(employee_id) if graph is not None else None
+    if node is not None:
+        etag = make_etag(employee_id, "descendants", graph.generation, request.url.query)
+        cached = not_modified(request, etag, settings.HIERARCHY_CACHE_CONTROL)
+        if cached:
+            return cached
+        nodes = graph.descendants(node, max_depth, filters)
+        if after is not None:
+            nodes = nodes[nodes > after]
+        page_nodes = nodes[from_value:from_value + size]
+
+        def numbered(n):
+            # Same shape as the hierarchy index docs, which carry pre/post/depth
+            n = int(n)
+            return {**graph.source(n), "pre": n, "post": int(graph.post[n]), "depth": int(graph.depth[n])}
+
+        employee = numbered(node)
+        items = [{**numbered(n), "level": int(graph.depth[n]) - employee["depth"]} for n in page_nodes]
+        more = from_value + size < len(nodes)
+        set_cache_headers(response, etag, settings.HIERARCHY_CACHE_CONTROL)
+        return _descendants_payload(
+            employee, items, len(nodes), page, size, items[-1]["pre"] if more and items else None
+        )
+
+    try:
+        es = get_es_client()
+
+        try:
+            async with bulkheads["es_search"].acquire():
+                employee_doc = await es.get(
+                    index=HIERARCHY_INDEX, id=employee_id, source_excludes=["reports", "management_chain_ids"]
+                )
+        except NotFoundError:
+            raise HTTPException(status_code=404, detail="Employee not found in hierarchy index")
+        employee = employee_doc['_source']
+        if employee.get('pre') is None or employee.get('post') is None:
+            raise HTTPException(
+                status_code=503,
+                detail="Hierarchy index has no pre/post numbering yet; re-run populate_hierarchy_nodes.py"
+            )
+
+        async with bulkheads["es_admin"].acquire():
+            generation = await index_generation(es, HIERARCHY_INDEX)
+        etag = make_etag(employee_id, "descendants", generation, request.url.query)
+        cached = not_modified(request, etag, settings.HIERARCHY_CACHE_CONTROL)
+        if cached:
+            return cached
+
+        query_filters = [
+            {"range": {"pre": {"gt": max(employee['pre'], after if after is not None else -1)}}},
+            {"range": {"post": {"lt": employee['post']}}},
+        ]
+        if max_depth is not None:
+            query_filters.append({"range": {"depth": {"lte": employee['depth'] + max_depth}}})
+        for field, value in filters.items():
+            query_filters.append({"term": {field: value}})
+
+        search_body = {
+            "query": {"bool": {"filter": query_filters}},
+            "_source": {"excludes": ["reports", "management_chain_ids"]},
+            "from": from_value,
+            "size": size,
+            "sort": [{"pre": {"order": "asc"}}],
+            "track_total_hits": True
         }
+        async with bulkheads["es_search"].acquire():
+            result = await es.search(index=HIERARCHY_INDEX, **search_body)
+
+        items = [
+            {**hit['_source'], "level": hit['_source']['depth'] - employee['depth']}
+            for hit in result['hits']['hits']
+        ]
+        total = result['hits']['total']['value']
+        more = from_value + size < total
+        set_cache_headers(response, etag, settings.HIERARCHY_CACHE_CONTROL)
+        return _descendants_payload(employee, items, total, page, size, items[-1]['pre'] if more and items else None)
     except HTTPException:
         raise
     except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Hierarchy retrieval failed: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Descendants retrieval failed: {str(e)}")
+
+
+@router.get("/{employee_id}/org-stats")
+async def get_employee_org_stats(employee_id: str, request: Request, response: Response):
+    """
+    Get rollups for the employee's subtree: headcount, direct and indirect
+    reports, max depth below, and per-department and per-location counts
+    """
+    from elasticsearch import NotFoundError
+
+    graph = org_graph_store.graph
+    node = graph.lookup(employee_id) if graph is not None else None
+    if node is not None:
+        etag = make_etag(employee_id, "org-stats", graph.generation)
+        cached = not_modified(request, etag, settings.HIERARCHY_CACHE_CONTROL)
+        if cached:
+            return cached
+        set_cache_headers(response, etag, settings.HIERARCHY_CACHE_CONTROL)
+        return {"success": True, "data": {"employee_id": employee_id, "org_stats": graph.subtree_stats(node)}}
+
+    try:
+        es = get_es_client()
+        try:
+            async with bulkheads["es_search"].acquire():
+                employee_doc = await es.get(index=HIERARCHY_INDEX, id=employee_id, source_includes=["org_stats"])
+        except NotFoundError:
+            raise HTTPException(status_code=404, detail="Employee not found in hierarchy index")
+
+        org_stats = employee_doc['_source'].get('org_stats')
+        if org_stats is None:
+            raise HTTPException(
+                status_code=503,
+                detail="Hierarchy index has no org stats yet; re-run populate_hierarchy_nodes.py"
+            )
+
+        etag = make_etag(employee_id, "org-stats", doc_version(employee_doc))
+        cached = not_modified(request, etag, settings.HIERARCHY_CACHE_CONTROL)
+        if cached:
+            return cached
+        set_cache_headers(response, etag, settings.HIERARCHY_CACHE_CONTROL)
+        return {"success": True, "data": {"employee_id": employee_id, "org_stats": org_stats}}
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Org stats retrieval failed: {str(e)}")
+
+
 @router.get("/{employee_id}")
-async def get_employee(employee_id: str):
+async def get_employee(
+    employee_id: str,
+    request: Request,
+    response: Response,
+    fields: Optional[str] = Query(None, description="Comma-separated source fields to return (default: all)")
+):
     """
     Get employee by ID
     """
     try:
-        es = get_unified_es_client()
-        
-        # Search for employee in employees index
-        search_body = {
-            "query": {
-                "term": {"employeeId": employee_id}
-            },
-            "size": 1
-        }
-        
-        result = es.search(index="new_people", **search_body)
+        es = get_es_client()
 
-        if result['hits']['total']['value'] == 0:
+        # Documents are keyed by employeeId: a realtime GET (revalidated by version once cached) instead of a search
+        entry = await employee_cache.fetch(es, employee_id)
+        if entry is None:
             raise HTTPException(status_code=404, detail="Employee not found")
 
-        hit = result['hits']['hits'][0]
-        source = hit['_source']
+        requested = [field.strip() for field in fields.split(",") if field.strip()] if fields else []
+        etag = make_etag(entry.version, *requested)
+        cached = not_modified(request, etag, settings.EMPLOYEE_CACHE_CONTROL)
+        if cached:
+            return cached
 
-        # For employees index, data is directly in source
-        employee_data = source.copy()
+        if requested:
+            employee_data = {field: entry.source[field] for field in requested if field in entry.source}
+        else:
+            employee_data = entry.source.copy()
 
+        set_cache_headers(response, etag, settings.EMPLOYEE_CACHE_CONTROL)
         return {
             "success": True,
             "data": employee_data
@@ -222,47 +911,62 @@ async def get_employee(employee_id: str):
         raise HTTPException(status_code=500, detail=f"Search failed: {str(e)}")
 
 
+async def _catalog_response(name: str, request: Request, response: Response, prefix: Optional[str], page: int, size: int):
+    """Page through a cached catalog; the ETag follows the catalog's index generation"""
+    es = get_es_client()
+    catalog = await catalog_store.get(es, name)
+    etag = make_etag(name, catalog.generation, prefix or "", page, size)
+    cached = not_modified(request, etag, settings.CATALOG_CACHE_CONTROL)
+    if cached:
+        return cached
+
+    entries = catalog.matching(prefix)
+    page_entries = entries[(page - 1) * size:page * size]
+    set_cache_headers(response, etag, settings.CATALOG_CACHE_CONTROL)
+    return {
+        "success": True,
+        "data": {
+            name: [value for value, _ in page_entries],
+            "counts": [{"name": value, "count": count} for value, count in page_entries],
+            "total": len(entries),
+            "pagination": {"page": page, "size": size, "total_pages": math.ceil(len(entries) / size)}
+        }
+    }
+
+
 @router.get("/departments/list")
-async def get_departments():
+async def get_departments(
+    request: Request,
+    response: Response,
+    prefix: Optional[str] = Query(None, description="Only departments starting with this text (case-insensitive)"),
+    page: int = Query(1, description="Page number for pagination", ge=1),
+    size: int = Query(1000, description="Number of departments to return", ge=1, le=10000)
+):
     """
-    Get a list of all unique departments
+    Get all unique departments with employee counts
     """
     try:
-        es = get_unified_es_client()
-        
-        search_body = {
-            "size": 0,
-            "aggs": {
-                "departments": {
-                    "terms": {
-                        "field": "departments.keyword",
-                        "size": 100
-                    }
-                }
-            }
-        }
-        
-        result = es.search(index="new_people", **search_body)
-        departments = [bucket['key'] for bucket in result['aggregations']['departments']['buckets']]
-        
-        return {"success": True, "data": {"departments": departments}}
+        return await _catalog_response("departments", request, response, prefix, page, size)
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to get departments: {str(e)}")
 
 
 @router.get("/locations/list")
-async def get_locations():
+async def get_locations(
+    request: Request,
+    response: Response,
+    prefix: Optional[str] = Query(None, description="Only locations starting with this text (case-insensitive)"),
+    page: int = Query(1, description="Page number for pagination", ge=1),
+    size: int = Query(1000, description="Number of locations to return", ge=1, le=10000)
+):
     """
-    Get a list of all unique locations (cities)
+    Get all unique locations (cities) with employee counts
     """
     try:
-        es = get_unified_es_client()
-        
-        search_body = { "size": 0, "aggs": { "locations": { "terms": { "field": "city.keyword", "size": 100 } } } }
-        
-        result = es.search(index="new_people", **search_body)
-        locations = [bucket['key'] for bucket in result['aggregations']['locations']['buckets']]
-        
-        return {"success": True, "data": {"locations": locations}}
+        return await _catalog_response("locations", request, response, prefix, page, size)
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to get locations: {str(e)}")
@@ -1,8 +1,14 @@
-from fastapi import APIRouter, Depends
-from typing import Dict, Any
+import secrets
+
+from fastapi import APIRouter, Depends, HTTPException, Request, status
+from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
+from fastapi.responses import PlainTextResponse
+from typing import Dict, Any, Optional
+from api.config import settings
 from api.services.elasticsearch_service import ElasticsearchService
-from api.models.user import User
-from api.middleware.auth import get_optional_user
+from api.models.user import User, UserRole
+from api.middleware.auth import get_current_user, get_optional_user
+from api.services.metrics import registry
 
 router = APIRouter()
 
@@ -13,6 +19,45 @@ async def health_check() -> Dict[str, str]:
     return {"status": "healthy", "service": "enterprise-search-api"}
 
 
+async def authorize_metrics(
+    request: Request,
+    credentials: Optional[HTTPAuthorizationCredentials] = Depends(HTTPBearer(auto_error=False))
+) -> None:
+    """
+    Metrics expose pool limits, queue depths and cache sizes, so they need the
+    METRICS_TOKEN bearer token when one is configured, an admin JWT otherwise
+    """
+    if credentials is None:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Not authenticated",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+    if settings.METRICS_TOKEN:
+        if not secrets.compare_digest(credentials.credentials.encode("utf-8"), settings.METRICS_TOKEN.encode("utf-8")):
+            raise HTTPException(
+                status_code=status.HTTP_401_UNAUTHORIZED,
+                detail="Could not validate credentials",
+                headers={"WWW-Authenticate": "Bearer"},
+            )
+        return
+    user = await get_current_user(credentials, request)
+    if user.role != UserRole.ADMIN:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Admin access required"
+        )
+
+
+@router.get("/metrics", response_class=PlainTextResponse, dependencies=[Depends(authorize_metrics)])
+async def metrics() -> str:
+    """
+    Process metrics in the Prometheus text exposition format. Not meant for
+    public networks: scrape it with METRICS_TOKEN from inside the deployment.
+    """
+    return registry.render()
+
+
 @router.get("/health/elasticsearch")
 async def elasticsearch_health(
     current_user: User = Depends(get_optional_user)
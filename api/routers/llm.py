@@ -1,6 +1,8 @@
 from fastapi import APIRouter, Depends, HTTPException, Request
-from typing import Dict, Any
+from fastapi.responses import StreamingResponse
+from typing import AsyncIterator, Dict, Any, Tuple
 import json
+import logging
 from api.models.llm import (
     SummaryRequest, ComprehensiveSummaryRequest, ChatRequest, 
     SummaryResponse, ChatResponse
@@ -8,11 +10,13 @@ from api.models.llm import (
 from api.models.user import User
 from api.services.llm_service import LLMService
 from api.middleware.auth import get_current_user
+from api.middleware.rate_limit import rate_limit
 
 router = APIRouter()
+logger = logging.getLogger(__name__)
 
 
-@router.post("/llm/summary", response_model=SummaryResponse)
+@router.post("/llm/summary", response_model=SummaryResponse, dependencies=[Depends(rate_limit("llm"))])
 async def generate_summary(
     request: SummaryRequest,
     current_user: User = Depends(get_current_user)
@@ -29,7 +33,7 @@ async def generate_summary(
         raise HTTPException(status_code=500, detail=f"Summary generation failed: {str(e)}")
 
 
-@router.post("/llm/comprehensive-summary")
+@router.post("/llm/comprehensive-summary", dependencies=[Depends(rate_limit("llm"))])
 async def generate_comprehensive_summary(
     request: ComprehensiveSummaryRequest,
     current_user: User = Depends(get_current_user)
@@ -45,7 +49,7 @@ async def generate_comprehensive_summary(
         raise HTTPException(status_code=500, detail=f"Comprehensive summary generation failed: {str(e)}")
 
 
-@router.post("/llm/chat", response_model=ChatResponse)
+@router.post("/llm/chat", response_model=ChatResponse, dependencies=[Depends(rate_limit("llm"))])
 async def chat(
     raw_request: Request,
     current_user: User = Depends(get_current_user)
@@ -69,4 +73,60 @@ async def chat(
             response=f"I'm sorry, I'm having trouble accessing the AI system right now. Error: {str(e)}. Please try again later or check the system configuration.",
             context_used=len(request.search_context) > 0,
             sources_referenced=[]
-        )
\ No newline at end of file
+        )
+
+
+# Server-sent events: keep proxies from buffering or caching the stream
+SSE_HEADERS = {"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+
+
+async def _sse(events: AsyncIterator[Tuple[str, Dict[str, Any]]]) -> AsyncIterator[str]:
+    # Headers are already sent once the body starts, so failures (e.g. while building
+    # the prompt) end the stream with an error event instead of a broken connection
+    try:
+        async for event, data in events:
+            yield f"event: {event}\ndata: {json.dumps(data)}\n\n"
+    except Exception as e:
+        logger.error(f"Streaming response failed: {e}")
+        yield f"event: error\ndata: {json.dumps({'detail': 'Generation failed'})}\n\n"
+
+
+def _sse_response(events: AsyncIterator[Tuple[str, Dict[str, Any]]]) -> StreamingResponse:
+    return StreamingResponse(_sse(events), media_type="text/event-stream", headers=SSE_HEADERS)
+
+
+@router.post("/llm/summary/stream", dependencies=[Depends(rate_limit("llm"))])
+async def stream_summary(
+    request: SummaryRequest,
+    current_user: User = Depends(get_current_user)
+) -> StreamingResponse:
+    """
+    Streaming /llm/summary over server-sent events: `delta` events carry text
+    as it is generated, then one `done` event carries the SummaryResponse
+    fields plus usage
+    """
+    return _sse_response(LLMService().stream_summary(request, current_user))
+
+
+@router.post("/llm/comprehensive-summary/stream", dependencies=[Depends(rate_limit("llm"))])
+async def stream_comprehensive_summary(
+    request: ComprehensiveSummaryRequest,
+    current_user: User = Depends(get_current_user)
+) -> StreamingResponse:
+    """
+    Streaming /llm/comprehensive-summary over server-sent events: `delta`
+    events, then a `done` event with the full summary and usage
+    """
+    return _sse_response(LLMService().stream_comprehensive_summary(request, current_user))
+
+
+@router.post("/llm/chat/stream", dependencies=[Depends(rate_limit("llm"))])
+async def stream_chat(
+    request: ChatRequest,
+    current_user: User = Depends(get_current_user)
+) -> StreamingResponse:
+    """
+    Streaming /llm/chat over server-sent events: `delta` events, then a `done`
+    event with the ChatResponse fields (sources_referenced, context_used) and usage
+    """
+    return _sse_response(LLMService().stream_chat_response(request, current_user))
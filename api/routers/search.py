@@ -1,12 +1,13 @@
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, Depends, HTTPException
 from typing import Dict, Any
 from api.models.search import SearchRequest, SearchResponse
 from api.services.elasticsearch_service import ElasticsearchService
+from api.middleware.rate_limit import rate_limit
 
 router = APIRouter()
 
 
-@router.post("/search", response_model=SearchResponse)
+@router.post("/search", response_model=SearchResponse, dependencies=[Depends(rate_limit("search"))])
 async def search_documents(
     request: SearchRequest
 ) -> SearchResponse:
@@ -17,6 +18,8 @@ async def search_documents(
         elasticsearch_service = ElasticsearchService()
         result = await elasticsearch_service.search(request, None)
         return result
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Search failed: {str(e)}")
 
@@ -3,7 +3,9 @@ from pydantic import BaseModel
 from typing import Dict, Any
 from api.services.elasticsearch_service import ElasticsearchService
 from api.services.llm_service import LLMService
+from api.services.bulkhead import bulkheads
 from api.middleware.auth import get_current_user
+from api.middleware.rate_limit import rate_limit
 from api.models.user import User
 
 router = APIRouter()
@@ -17,7 +19,7 @@ class SummaryResponseEnvelope(BaseModel):
     msg: str
     data: str
 
-@router.post("/summary", response_model=SummaryResponseEnvelope)
+@router.post("/summary", response_model=SummaryResponseEnvelope, dependencies=[Depends(rate_limit("llm"))])
 async def summarize_document(
     request: SummaryRequestInput,
     current_user: User = Depends(get_current_user)
@@ -32,8 +34,10 @@ async def summarize_document(
             # Use httpx directly for a single doc fetch
             import httpx
             url = f"{es_service.endpoint}/{request.index}/_doc/{request.docId}"
-            async with httpx.AsyncClient() as client:
+            async with bulkheads["es_search"].acquire() as slot, httpx.AsyncClient() as client:
                 resp = await client.get(url, headers=headers)
+                if resp.status_code >= 500:
+                    slot.mark_failed()
                 if resp.status_code != 200:
                     return SummaryResponseEnvelope(code=404, msg="Document not found", data="")
                 doc = resp.json()['_source']
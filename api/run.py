@@ -2,6 +2,9 @@
 """
 Simple script to run the Enterprise Search API.
 Run this from the project root: `python api/run.py`
+
+Pass `--production` (or set SERVER_MODE=production) to run multiple workers
+on uvloop/httptools without auto-reload.
 """
 import sys
 import os
@@ -10,19 +13,22 @@ import os
 # No need to modify sys.path if the project structure is correct.
 
 if __name__ == "__main__":
-    import uvicorn
+    import argparse
     # Use absolute import path
     from api.config import settings
+    from api.server import run_development, run_production, worker_count
+
+    parser = argparse.ArgumentParser(description="Run the Enterprise Search API")
+    parser.add_argument("--production", action="store_true", help="Run multi-worker production server")
+    args = parser.parse_args()
+    production = args.production or settings.SERVER_MODE == "production"
     
     print("🚀 Starting Enterprise Search API...")
     print(f"📡 Server will run on http://{settings.HOST}:{settings.PORT}")
     print(f"📖 API Documentation: http://{settings.HOST}:{settings.PORT}/docs")
-    print(f"🔧 Debug mode: {settings.DEBUG}")
-    
-    uvicorn.run(
-        "api.main:app", # Use absolute path to the app
-        host=settings.HOST,
-        port=settings.PORT,
-        reload=settings.DEBUG,
-        reload_dirs=["api"] # Optional: specify reload directory
-    )
\ No newline at end of file
+    if production:
+        print(f"🏭 Production mode: {worker_count()} workers (uvloop + httptools)")
+        run_production()
+    else:
+        print(f"🔧 Debug mode: {settings.DEBUG}")
+        run_development()
@@ -0,0 +1,113 @@
+"""
+Server launchers for the Enterprise Search API.
+
+Development runs a single uvicorn process, auto-reloading when DEBUG is set. Production runs
+several workers sized to the available cores on the uvloop event loop and the
+httptools parser, preloading the app in the master before forking (gunicorn)
+and draining in-flight requests on SIGTERM.
+"""
+import importlib
+import os
+
+from api.config import settings
+
+APP = "api.main:app"
+
+# Imported on first use by the app; warmed in the gunicorn master when preloading
+LAZY_MODULES = ("elasticsearch", "httpx", "jose.jwt")
+
+
+def worker_count() -> int:
+    """Configured worker count, or one async worker per available core when WORKERS is 0"""
+    if settings.WORKERS > 0:
+        return settings.WORKERS
+    try:
+        cores = len(os.sched_getaffinity(0))
+    except AttributeError:
+        cores = os.cpu_count() or 1
+    return cores
+
+
+def run_development() -> None:
+    import uvicorn
+
+    uvicorn.run(
+        APP,
+        host=settings.HOST,
+        port=settings.PORT,
+        reload=settings.DEBUG,
+        reload_dirs=["api"]
+    )
+
+
+def run_production() -> None:
+    """Run with gunicorn + uvicorn workers when available, plain uvicorn workers otherwise"""
+    try:
+        import gunicorn  # noqa: F401
+    except ImportError:
+        _run_uvicorn_workers()
+    else:
+        _run_gunicorn()
+
+
+def _run_uvicorn_workers() -> None:
+    # uvicorn's own supervisor forks workers that import the app themselves (no preload)
+    import uvicorn
+
+    uvicorn.run(
+        APP,
+        host=settings.HOST,
+        port=settings.PORT,
+        workers=worker_count(),
+        loop="uvloop",
+        http="httptools",
+        backlog=settings.BACKLOG,
+        timeout_keep_alive=settings.KEEP_ALIVE_TIMEOUT,
+        timeout_graceful_shutdown=settings.GRACEFUL_SHUTDOWN_TIMEOUT,
+        access_log=False,
+    )
+
+
+def _run_gunicorn() -> None:
+    from gunicorn.app.base import BaseApplication
+
+    class ProductionApplication(BaseApplication):
+        def load_config(self):
+            options = {
+                "bind": f"{settings.HOST}:{settings.PORT}",
+                "workers": worker_count(),
+                "worker_class": "api.server.ProductionUvicornWorker",
+                "preload_app": settings.PRELOAD_APP,
+                "backlog": settings.BACKLOG,
+                "keepalive": settings.KEEP_ALIVE_TIMEOUT,
+                # SIGTERM stops accepting connections and waits this long for in-flight requests
+                "graceful_timeout": settings.GRACEFUL_SHUTDOWN_TIMEOUT,
+                "timeout": settings.WORKER_TIMEOUT,
+            }
+            for key, value in options.items():
+                self.cfg.set(key, value)
+
+        def load(self):
+            from api.main import app
+            if settings.PRELOAD_APP:
+                # Import once before fork so workers share the pages and skip the cost
+                for module in LAZY_MODULES:
+                    importlib.import_module(module)
+            return app
+
+    ProductionApplication().run()
+
+
+try:
+    from uvicorn.workers import UvicornWorker
+except ImportError:  # pragma: no cover - uvicorn without gunicorn support
+    UvicornWorker = None
+else:
+    class ProductionUvicornWorker(UvicornWorker):
+        """Uvicorn worker pinned to uvloop and httptools instead of 'auto'"""
+
+        CONFIG_KWARGS = {
+            "loop": "uvloop",
+            "http": "httptools",
+            "access_log": False,
+        }
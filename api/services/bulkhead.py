@@ -0,0 +1,255 @@
+"""
+Upstream bulkheads with adaptive (AIMD) concurrency limits.
+
+Each upstream gets its own pool so a slow dependency (e.g. the LLM provider)
+can only tie up its own slots. The limit grows additively while calls finish
+under the pool's latency target and shrinks multiplicatively when they run
+slow or fail, so a degrading upstream sees less load instead of more.
+
+Only errors that say the upstream itself is struggling (connection errors,
+timeouts, 5xx and 429 responses) count as failures. A 404 for an unknown id,
+an HTTPException raised by our own code or a client disconnect leaves the
+limit alone, so callers cannot shrink a pool by sending bad requests. The
+limit is cut at most once per latency window, however many calls fail in it.
+"""
+import asyncio
+import functools
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Deque, Dict, Optional, Tuple
+
+from fastapi import HTTPException, status
+
+from api.config import settings
+from api.services.metrics import registry
+
+_limit_gauge = registry.gauge("upstream_concurrency_limit", "Current adaptive concurrency limit per upstream pool")
+_in_flight_gauge = registry.gauge("upstream_in_flight", "Calls currently running against the upstream")
+_queue_gauge = registry.gauge("upstream_queue_depth", "Calls waiting for a slot in the upstream pool")
+_limit_changes = registry.counter("upstream_limit_changes_total", "Adaptive limit adjustments by direction")
+_rejected = registry.counter("upstream_rejected_total", "Calls rejected because the pool queue was full or timed out")
+_latency = registry.histogram("upstream_latency_seconds", "Upstream call latency per pool")
+
+
+class BulkheadFullError(HTTPException):
+    """Raised when a pool cannot admit a call; surfaces as 503 Service Unavailable"""
+
+    def __init__(self, pool: str):
+        super().__init__(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail=f"Upstream '{pool}' is saturated, please retry shortly",
+            headers={"Retry-After": "1"},
+        )
+
+
+@functools.lru_cache(maxsize=None)
+def _transport_errors() -> Tuple[type, ...]:
+    errors = []
+    try:
+        from elastic_transport import ConnectionError as ESConnectionError, ConnectionTimeout
+
+        errors += [ESConnectionError, ConnectionTimeout]
+    except ImportError:
+        pass
+    try:
+        import httpx
+
+        errors.append(httpx.TransportError)
+    except ImportError:
+        pass
+    return tuple(errors)
+
+
+def _status_of(error: BaseException) -> Optional[int]:
+    """HTTP status of an upstream error response (elasticsearch ApiError, httpx HTTPStatusError)"""
+    response = getattr(error, "response", None)
+    for candidate in (getattr(error, "status_code", None), getattr(response, "status_code", None)):
+        if isinstance(candidate, int):
+            return candidate
+    return None
+
+
+def is_upstream_failure(error: BaseException) -> bool:
+    """Whether an exception raised while holding a slot means the upstream is failing"""
+    if isinstance(error, HTTPException):
+        return False
+    if isinstance(error, (asyncio.TimeoutError, TimeoutError, ConnectionError)):
+        return True
+    if isinstance(error, _transport_errors()):
+        return True
+    status_code = _status_of(error)
+    return status_code is not None and (status_code >= 500 or status_code == 429)
+
+
+class Slot:
+    """Handle for a held slot; a caller that got an error response without an exception can mark_failed()"""
+
+    def __init__(self):
+        self.outcome = "ok"
+
+    def mark_failed(self) -> None:
+        self.outcome = "failed"
+
+
+class AdaptiveBulkhead:
+    def __init__(
+        self,
+        name: str,
+        initial_limit: int,
+        min_limit: int,
+        max_limit: int,
+        latency_target: float,
+        max_queue: int,
+        queue_timeout: float,
+        backoff_ratio: float = 0.9,
+    ):
+        self.name = name
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.latency_target = latency_target
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self.backoff_ratio = backoff_ratio
+        self._limit = float(initial_limit)
+        self._in_flight = 0
+        self._last_decrease = float("-inf")
+        self._waiters: Deque[asyncio.Future] = deque()
+        self._labels = {"pool": name}
+        self._publish()
+
+    @property
+    def limit(self) -> int:
+        return int(self._limit)
+
+    @asynccontextmanager
+    async def acquire(self) -> AsyncIterator[Slot]:
+        """Hold one slot of the pool for the duration of an upstream call"""
+        await self._enter()
+        slot = Slot()
+        started = time.monotonic()
+        try:
+            yield slot
+        except BaseException as e:
+            # Cancellation and request errors (4xx, HTTPException) say nothing about upstream health
+            if slot.outcome == "ok":
+                slot.outcome = "failed" if is_upstream_failure(e) else "neutral"
+            raise
+        finally:
+            self._exit(time.monotonic() - started, slot.outcome)
+
+    async def _enter(self) -> None:
+        if self._in_flight < self.limit and not self._waiters:
+            self._in_flight += 1
+            self._publish()
+            return
+
+        if len(self._waiters) >= self.max_queue:
+            _rejected.inc(labels=self._labels)
+            raise BulkheadFullError(self.name)
+
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        self._publish()
+        try:
+            # The slot is handed over (and counted as in flight) by _wake()
+            await asyncio.wait_for(waiter, self.queue_timeout)
+        except asyncio.TimeoutError:
+            _rejected.inc(labels=self._labels)
+            raise BulkheadFullError(self.name)
+        except BaseException:
+            if waiter.done() and not waiter.cancelled():
+                # The slot was handed over just before we were cancelled
+                self._in_flight -= 1
+                self._wake()
+            raise
+        finally:
+            if waiter in self._waiters:
+                self._waiters.remove(waiter)
+            self._publish()
+
+    def _exit(self, elapsed: float, outcome: str) -> None:
+        self._in_flight -= 1
+        _latency.observe(elapsed, labels=self._labels)
+        self._adjust(elapsed, outcome)
+        self._wake()
+
+    def _adjust(self, elapsed: float, outcome: str) -> None:
+        if outcome == "neutral":
+            return
+        previous = self.limit
+        if outcome == "ok" and elapsed <= self.latency_target:
+            # Additive increase: roughly +1 per limit's worth of fast calls
+            self._limit = min(self.max_limit, self._limit + 1.0 / max(self._limit, 1.0))
+        else:
+            # Multiplicative decrease, once per latency window: a burst of failures is one congestion signal
+            now = time.monotonic()
+            if now - self._last_decrease < self.latency_target:
+                return
+            self._last_decrease = now
+            self._limit = max(self.min_limit, self._limit * self.backoff_ratio)
+
+        if self.limit > previous:
+            _limit_changes.inc(labels={"pool": self.name, "direction": "increase"})
+        elif self.limit < previous:
+            _limit_changes.inc(labels={"pool": self.name, "direction": "decrease"})
+        self._publish()
+
+    def _wake(self) -> None:
+        while self._waiters and self._in_flight < self.limit:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                self._in_flight += 1
+                waiter.set_result(None)
+        self._publish()
+
+    def _publish(self) -> None:
+        _limit_gauge.set(self.limit, labels=self._labels)
+        _in_flight_gauge.set(self._in_flight, labels=self._labels)
+        _queue_gauge.set(len(self._waiters), labels=self._labels)
+
+
+def _create_bulkheads() -> Dict[str, AdaptiveBulkhead]:
+    return {
+        "es_search": AdaptiveBulkhead(
+            "es_search",
+            initial_limit=settings.BULKHEAD_ES_SEARCH_LIMIT,
+            min_limit=2,
+            max_limit=settings.BULKHEAD_ES_SEARCH_MAX_LIMIT,
+            latency_target=settings.BULKHEAD_ES_SEARCH_LATENCY_TARGET,
+            max_queue=settings.BULKHEAD_MAX_QUEUE,
+            queue_timeout=settings.BULKHEAD_QUEUE_TIMEOUT,
+        ),
+        "es_admin": AdaptiveBulkhead(
+            "es_admin",
+            initial_limit=settings.BULKHEAD_ES_ADMIN_LIMIT,
+            min_limit=1,
+            max_limit=settings.BULKHEAD_ES_ADMIN_LIMIT,
+            latency_target=settings.BULKHEAD_ES_ADMIN_LATENCY_TARGET,
+            max_queue=settings.BULKHEAD_MAX_QUEUE,
+            queue_timeout=settings.BULKHEAD_QUEUE_TIMEOUT,
+        ),
+        "llm": AdaptiveBulkhead(
+            "llm",
+            initial_limit=settings.BULKHEAD_LLM_LIMIT,
+            min_limit=1,
+            max_limit=settings.BULKHEAD_LLM_MAX_LIMIT,
+            latency_target=settings.BULKHEAD_LLM_LATENCY_TARGET,
+            max_queue=settings.BULKHEAD_MAX_QUEUE,
+            queue_timeout=settings.BULKHEAD_QUEUE_TIMEOUT,
+        ),
+        # Held for a whole streamed completion (the "llm" pool only covers the wait for headers).
+        # Stream length is set by the answer, not upstream health, so the limit is fixed.
+        "llm_stream": AdaptiveBulkhead(
+            "llm_stream",
+            initial_limit=settings.BULKHEAD_LLM_STREAM_LIMIT,
+            min_limit=settings.BULKHEAD_LLM_STREAM_LIMIT,
+            max_limit=settings.BULKHEAD_LLM_STREAM_LIMIT,
+            latency_target=settings.LLM_READ_TIMEOUT,
+            max_queue=settings.BULKHEAD_MAX_QUEUE,
+            queue_timeout=settings.BULKHEAD_QUEUE_TIMEOUT,
+        ),
+    }
+
+
+bulkheads = _create_bulkheads()
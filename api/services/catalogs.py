@@ -0,0 +1,126 @@
+"""
+Department and location catalogs for the directory filter dropdowns.
+
+Each catalog is the full list of distinct values with employee counts, read
+with `composite` aggregations paged by `after_key` (so large lists are not
+truncated) and held in memory. A background task reloads the catalogs when
+the `new_people` index generation changes; requests only ever read memory.
+"""
+import asyncio
+import logging
+from bisect import bisect_left
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+
+from api.config import settings
+from api.services.bulkhead import bulkheads
+
+logger = logging.getLogger(__name__)
+
+EMPLOYEE_INDEX = "new_people"
+
+# Catalog name -> keyword field aggregated
+CATALOG_FIELDS = {
+    "departments": "departments.keyword",
+    "locations": "city.keyword",
+}
+
+
+@dataclass
+class Catalog:
+    # (value, employee count), sorted case-insensitively
+    entries: List[Tuple[str, int]]
+    # Lowercased values in the same order, for prefix lookups
+    folded: List[str]
+    generation: str
+
+    @classmethod
+    def build(cls, counts: Dict[str, int], generation: str) -> "Catalog":
+        entries = sorted(counts.items(), key=lambda item: (item[0].lower(), item[0]))
+        return cls(entries, [value.lower() for value, _ in entries], generation)
+
+    def matching(self, prefix: Optional[str] = None) -> List[Tuple[str, int]]:
+        """Entries whose value starts with prefix (case-insensitive), via binary search"""
+        if not prefix:
+            return self.entries
+        prefix = prefix.lower()
+        start = bisect_left(self.folded, prefix)
+        end = start
+        while end < len(self.folded) and self.folded[end].startswith(prefix):
+            end += 1
+        return self.entries[start:end]
+
+
+class CatalogStore:
+    def __init__(self):
+        self.catalogs: Dict[str, Catalog] = {}
+        self._lock = asyncio.Lock()
+        self._task: Optional[asyncio.Task] = None
+
+    async def _read(self, es, field: str) -> Dict[str, int]:
+        counts: Dict[str, int] = {}
+        after_key = None
+        while True:
+            composite = {
+                "size": settings.CATALOG_PAGE_SIZE,
+                "sources": [{"value": {"terms": {"field": field}}}],
+            }
+            if after_key:
+                composite["after"] = after_key
+            async with bulkheads["es_search"].acquire():
+                result = await es.search(index=EMPLOYEE_INDEX, size=0, aggs={"catalog": {"composite": composite}})
+            aggregation = result['aggregations']['catalog']
+            for bucket in aggregation['buckets']:
+                counts[bucket['key']['value']] = bucket['doc_count']
+            after_key = aggregation.get('after_key')
+            if not after_key or not aggregation['buckets']:
+                return counts
+
+    async def refresh(self, es) -> None:
+        """Reload every catalog whose data predates the current index generation"""
+        from api.services.es_client import index_generation
+
+        async with self._lock:
+            async with bulkheads["es_admin"].acquire():
+                generation = await index_generation(es, EMPLOYEE_INDEX)
+            for name, field in CATALOG_FIELDS.items():
+                current = self.catalogs.get(name)
+                if current is None or current.generation != generation:
+                    self.catalogs[name] = Catalog.build(await self._read(es, field), generation)
+                    logger.info(f"Catalog {name} loaded: {len(self.catalogs[name].entries)} values")
+
+    async def get(self, es, name: str) -> Catalog:
+        """Return the cached catalog, loading it on first use"""
+        catalog = self.catalogs.get(name)
+        if catalog is None:
+            await self.refresh(es)
+            catalog = self.catalogs[name]
+        return catalog
+
+    async def _refresh_loop(self) -> None:
+        from api.services.es_client import get_es_client
+
+        while True:
+            try:
+                await self.refresh(get_es_client())
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"Catalog refresh failed: {e}")
+            await asyncio.sleep(settings.CATALOG_REFRESH_SECONDS)
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._refresh_loop())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+
+catalog_store = CatalogStore()
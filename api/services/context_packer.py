@@ -0,0 +1,165 @@
+"""
+Token-budgeted context packing for LLM prompts.
+
+Instead of cutting every document at a fixed character offset, each document
+is split into sentence-aligned passages, passages are scored against the query
+by lexical overlap (terms weighted by rarity across all passages, with terms
+Elasticsearch highlighted counting double), and the best passages are packed
+greedily into a token budget. Every document first gets its best passage so
+none disappears from the prompt; remaining budget goes to the highest-scoring
+passages anywhere, and passages that share nothing with the query are left
+out rather than padding the prompt.
+
+Token counts are a local estimate (about four characters per token for words,
+one per punctuation mark), close enough to budget prompts without a tokenizer.
+"""
+import math
+import re
+from typing import Dict, List, Optional, Sequence, Set
+
+_WORD = re.compile(r"\w+|[^\w\s]")
+_TERM = re.compile(r"[a-z0-9]{2,}")
+_SENTENCE_BREAK = re.compile(r"(?<=[.!?])\s+|\n\s*\n")
+_HIGHLIGHT = re.compile(r"<(mark|em)>(.*?)</\1>", re.IGNORECASE)
+
+STOPWORDS = frozenset(
+    "a an and are as at be but by can do for from has have how i in is it its me my not of on or our "
+    "so that the their there these this to was we what when where which who why will with you your".split()
+)
+
+# Joins non-adjacent passages taken from the same document
+GAP = " … "
+
+
+def estimate_tokens(text: str) -> int:
+    return sum(math.ceil(len(piece) / 4) if piece[0].isalnum() or piece[0] == "_" else 1
+               for piece in _WORD.findall(text))
+
+
+def terms(text: str) -> Set[str]:
+    return {term for term in _TERM.findall(text.lower()) if term not in STOPWORDS}
+
+
+def highlight_terms(highlights: Optional[Dict[str, List[str]]]) -> Set[str]:
+    """Terms Elasticsearch marked (<mark>, or the default <em>) in highlight fragments"""
+    found: Set[str] = set()
+    if not isinstance(highlights, dict):
+        return found
+    for fragments in highlights.values():
+        for fragment in fragments or []:
+            for _, marked in _HIGHLIGHT.findall(fragment):
+                found |= terms(marked)
+    return found
+
+
+def split_passages(text: str, passage_tokens: int) -> List[str]:
+    """Sentence-aligned passages of about passage_tokens; overlong sentences are cut by words"""
+    passages: List[str] = []
+    current: List[str] = []
+    size = 0
+    for sentence in _SENTENCE_BREAK.split(text):
+        sentence = " ".join(sentence.split())
+        if not sentence:
+            continue
+        tokens = estimate_tokens(sentence)
+        if tokens > passage_tokens:
+            words = sentence.split()
+            step = max(1, len(words) * passage_tokens // tokens)
+            pieces = [" ".join(words[i:i + step]) for i in range(0, len(words), step)]
+        else:
+            pieces = [sentence]
+        for piece in pieces:
+            piece_tokens = estimate_tokens(piece)
+            if current and size + piece_tokens > passage_tokens:
+                passages.append(" ".join(current))
+                current, size = [], 0
+            current.append(piece)
+            size += piece_tokens
+    if current:
+        passages.append(" ".join(current))
+    return passages
+
+
+def trim(text: str, budget: int) -> str:
+    """Leading words of text within budget tokens"""
+    kept: List[str] = []
+    for word in text.split():
+        budget -= estimate_tokens(word)
+        if budget < 0:
+            break
+        kept.append(word)
+    return " ".join(kept)
+
+
+def pack(
+    texts: Sequence[str],
+    query: str,
+    budget: int,
+    passage_tokens: int = 80,
+    highlights: Optional[Sequence[Optional[Dict[str, List[str]]]]] = None,
+) -> List[str]:
+    """
+    Excerpts of texts (same order) whose estimated tokens together fit budget,
+    made of each text's passages most relevant to query, in their original order
+    """
+    query_terms = terms(query)
+    boosted = [highlight_terms(highlights[i]) if highlights else set() for i in range(len(texts))]
+
+    passages = [split_passages(text or "", passage_tokens) for text in texts]
+    passage_terms = [[terms(passage) for passage in doc] for doc in passages]
+
+    # Rarer query terms say more about a passage than ones every passage contains
+    total = sum(len(doc) for doc in passages) or 1
+    frequency: Dict[str, int] = {}
+    for doc in passage_terms:
+        for found in doc:
+            for term in found & (query_terms | set().union(*boosted)):
+                frequency[term] = frequency.get(term, 0) + 1
+
+    def score(i: int, j: int) -> float:
+        found = passage_terms[i][j]
+        weight = sum(1 + math.log(total / (1 + frequency.get(term, 0)) + 1) for term in found & query_terms)
+        return weight + sum(2 * (1 + math.log(total / (1 + frequency.get(term, 0)) + 1)) for term in found & boosted[i])
+
+    candidates = [
+        (score(i, j), i, j, estimate_tokens(passage))
+        for i, doc in enumerate(passages)
+        for j, passage in enumerate(doc)
+    ]
+
+    chosen: List[Set[int]] = [set() for _ in texts]
+    remaining = budget
+
+    # Every document's best passage (its opening one when nothing matches) goes in first
+    best: Dict[int, tuple] = {}
+    for candidate in candidates:
+        current = best.get(candidate[1])
+        if current is None or candidate[0] > current[0]:
+            best[candidate[1]] = candidate
+    for _, i, j, tokens in sorted(best.values(), key=lambda c: (-c[0], c[1])):
+        if tokens > remaining:
+            # Cut to what is left rather than leave the document out
+            passages[i][j] = trim(passages[i][j], remaining)
+            tokens = estimate_tokens(passages[i][j])
+        if passages[i][j]:
+            chosen[i].add(j)
+            remaining -= tokens
+
+    for points, i, j, tokens in sorted(candidates, key=lambda c: (-c[0], c[1], c[2])):
+        if points <= 0 or remaining <= 0:
+            break
+        if j not in chosen[i] and tokens <= remaining:
+            chosen[i].add(j)
+            remaining -= tokens
+
+    excerpts = []
+    for i, doc in enumerate(passages):
+        parts: List[str] = []
+        previous = None
+        for j in sorted(chosen[i]):
+            if parts:
+                parts.append(" " if j == previous + 1 else GAP)
+            parts.append(doc[j])
+            previous = j
+        excerpts.append("".join(parts))
+    return excerpts
@@ -1,9 +1,9 @@
-import httpx
 import json
 from typing import List, Dict, Any, Optional
 from api.models.search import SearchRequest, SearchResult, SearchResponse, SearchFilter
 from api.models.user import User
 from api.config import settings
+from api.services.bulkhead import bulkheads
 import logging
 
 logger = logging.getLogger(__name__)
@@ -48,8 +48,10 @@ class ElasticsearchService:
 
     async def test_connection(self) -> Dict[str, Any]:
         """Test Elasticsearch connection and configuration"""
+        import httpx
+
         try:
-            async with httpx.AsyncClient() as client:
+            async with bulkheads["es_admin"].acquire(), httpx.AsyncClient() as client:
                 # Test cluster health
                 health_response = await client.get(
                     f"{self.endpoint}/_cluster/health",
@@ -142,7 +144,9 @@ class ElasticsearchService:
         if request.filters.date_range and request.filters.date_range != "all":
             search_params["date_range"] = request.filters.date_range
 
-        async with httpx.AsyncClient() as client:
+        import httpx
+
+        async with bulkheads["es_search"].acquire(), httpx.AsyncClient() as client:
             response = await client.post(
                 f"{self.endpoint}/_application/search_application/{self.search_application}/_search",
                 headers=self._get_headers(),
@@ -157,7 +161,9 @@ class ElasticsearchService:
         """Direct Elasticsearch query"""
         search_body = self._build_search_body(request, user)
 
-        async with httpx.AsyncClient() as client:
+        import httpx
+
+        async with bulkheads["es_search"].acquire(), httpx.AsyncClient() as client:
             response = await client.post(
                 f"{self.endpoint}/{self.index}/_search",
                 headers=self._get_headers(),
@@ -0,0 +1,133 @@
+"""
+In-process email -> employee directory for login.
+
+Holds the few fields a login needs for every employee in `new_people`, keyed
+by lowercased email address, so `/auth/login` resolves with one dict lookup
+instead of an Elasticsearch search. Misses are answered from memory too: the
+map is the whole directory, so a wrong address costs the same as a right one.
+
+Loaded in the background at startup, then kept current by pulling docs whose
+`modified` timestamp moved (applied in place), with a periodic full reload to
+drop deleted employees. Until the first load completes, logins fall back to
+Elasticsearch.
+"""
+import asyncio
+import logging
+import time
+from typing import Any, Dict, Optional, Tuple
+
+from api.config import settings
+from api.services.metrics import registry
+
+logger = logging.getLogger(__name__)
+
+EMPLOYEE_INDEX = "new_people"
+
+# Fields kept per employee (what login puts into the user and token)
+LOGIN_FIELDS = ("employeeId", "fullName", "emailAddress", "departments", "designations", "city", "managerEmpId")
+SOURCE_FIELDS = [*LOGIN_FIELDS, "modified"]
+
+_lookups = registry.counter("email_directory_lookups_total", "Login email lookups by result")
+_entries = registry.gauge("email_directory_entries", "Employees held in the login email directory")
+
+
+def _email_key(email: Any) -> str:
+    return str(email).strip().lower()
+
+
+class EmailDirectory:
+    def __init__(self):
+        # email -> values of LOGIN_FIELDS; tuples keep 100k entries compact
+        self._by_email: Dict[str, Tuple[Any, ...]] = {}
+        # employeeId -> email, to drop the old address when an employee's email changes
+        self._email_of: Dict[str, str] = {}
+        self.modified = ""
+        self.loaded = False
+        self._task: Optional[asyncio.Task] = None
+
+    def __len__(self) -> int:
+        return len(self._by_email)
+
+    def lookup(self, email: str) -> Optional[Dict[str, Any]]:
+        """Login fields for an email (case-insensitive), or None when no employee has it"""
+        row = self._by_email.get(_email_key(email))
+        _lookups.inc(labels={"result": "hit" if row is not None else "miss"})
+        if row is None:
+            return None
+        # Fields absent from the source doc stay absent so the caller's defaults still apply
+        return {field: value for field, value in zip(LOGIN_FIELDS, row) if value is not None}
+
+    def _apply(self, source: Dict[str, Any]) -> None:
+        employee_id = str(source.get("employeeId") or "")
+        email = _email_key(source.get("emailAddress") or "")
+        if not employee_id:
+            return
+        previous = self._email_of.pop(employee_id, None)
+        if previous is not None and self._by_email.get(previous, (None,))[0] == source.get("employeeId"):
+            del self._by_email[previous]
+        if email:
+            self._by_email[email] = tuple(source.get(field) for field in LOGIN_FIELDS)
+            self._email_of[employee_id] = email
+        modified = str(source.get("modified") or "")
+        if modified > self.modified:
+            self.modified = modified
+
+    async def _scan(self, es, query: Dict[str, Any]):
+        from api.services.es_client import scan_sources
+
+        async for source in scan_sources(es, EMPLOYEE_INDEX, {"query": query, "source": SOURCE_FIELDS}, pool="es_admin"):
+            yield source
+
+    async def load(self, es) -> None:
+        """Replace the whole directory; drops employees deleted since the last load"""
+        started = time.perf_counter()
+        fresh = EmailDirectory()
+        async for source in self._scan(es, {"match_all": {}}):
+            fresh._apply(source)
+        self._by_email, self._email_of, self.modified = fresh._by_email, fresh._email_of, fresh.modified
+        self.loaded = True
+        _entries.set(len(self))
+        logger.info(f"Email directory loaded: {len(self)} employees in {time.perf_counter() - started:.2f}s")
+
+    async def refresh(self, es) -> None:
+        """Apply docs modified since the newest one seen"""
+        if not self.loaded or not self.modified:
+            await self.load(es)
+            return
+        async for source in self._scan(es, {"range": {"modified": {"gte": self.modified}}}):
+            self._apply(source)
+        _entries.set(len(self))
+
+    async def _refresh_loop(self) -> None:
+        from api.services.es_client import get_es_client
+
+        last_full_load = 0.0
+        while True:
+            try:
+                es = get_es_client()
+                if time.monotonic() - last_full_load >= settings.EMAIL_DIRECTORY_FULL_RELOAD_SECONDS:
+                    await self.load(es)
+                    last_full_load = time.monotonic()
+                else:
+                    await self.refresh(es)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"Email directory refresh failed: {e}")
+            await asyncio.sleep(settings.EMAIL_DIRECTORY_REFRESH_SECONDS)
+
+    def start(self) -> None:
+        if settings.EMAIL_DIRECTORY_ENABLED and self._task is None:
+            self._task = asyncio.create_task(self._refresh_loop())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+
+email_directory = EmailDirectory()
@@ -0,0 +1,122 @@
+"""
+Read-through cache of `new_people` documents keyed by employeeId.
+
+Holds full `_source` docs so callers can project whatever fields they need.
+Entries are fresh for EMPLOYEE_CACHE_TTL_SECONDS and the least recently used
+are evicted past EMPLOYEE_CACHE_SIZE. Single lookups revalidate an expired
+entry by its version (a realtime GET without `_source`) and only re-read the
+document when it has changed.
+"""
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Dict, Iterable, List, Optional
+
+from api.config import settings
+from api.middleware.http_cache import doc_version
+from api.services.bulkhead import bulkheads
+from api.services.metrics import registry
+
+EMPLOYEE_INDEX = "new_people"
+
+_requests = registry.counter("employee_cache_requests_total", "Employee document cache lookups by result")
+_revalidations = registry.counter("employee_cache_revalidations_total", "Expired employee docs checked against their current version")
+
+
+@dataclass
+class CachedEmployee:
+    source: Dict[str, Any]
+    version: str
+    expires_at: float
+
+
+class EmployeeCache:
+    def __init__(self, max_entries: int, ttl_seconds: float):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[str, CachedEmployee]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, employee_id: str) -> Optional[CachedEmployee]:
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(employee_id)
+            # Expired entries stay until evicted so fetch() can revalidate them by version
+            if entry is not None and entry.expires_at <= now:
+                entry = None
+            if entry is not None:
+                self._entries.move_to_end(employee_id)
+        _requests.inc(labels={"result": "hit" if entry is not None else "miss"})
+        return entry
+
+    def _stale(self, employee_id: str) -> Optional[CachedEmployee]:
+        with self._lock:
+            return self._entries.get(employee_id)
+
+    def put(self, employee_id: str, source: Dict[str, Any], version: str = "") -> CachedEmployee:
+        entry = CachedEmployee(source, version, time.monotonic() + self.ttl_seconds)
+        if self.max_entries <= 0:
+            return entry
+        with self._lock:
+            self._entries[employee_id] = entry
+            self._entries.move_to_end(employee_id)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return entry
+
+    def invalidate(self, employee_id: str) -> None:
+        with self._lock:
+            self._entries.pop(employee_id, None)
+
+    async def fetch(self, es, employee_id: str) -> Optional[CachedEmployee]:
+        """Resolve one id with realtime GETs by _id (None when missing)"""
+        from elasticsearch import NotFoundError
+
+        entry = self.get(employee_id)
+        if entry is not None:
+            return entry
+
+        stale = self._stale(employee_id)
+        try:
+            if stale is not None:
+                async with bulkheads["es_search"].acquire():
+                    head = await es.get(index=EMPLOYEE_INDEX, id=employee_id, source=False)
+                if doc_version(head) == stale.version:
+                    _revalidations.inc(labels={"result": "unchanged"})
+                    return self.put(employee_id, stale.source, stale.version)
+                _revalidations.inc(labels={"result": "changed"})
+            async with bulkheads["es_search"].acquire():
+                doc = await es.get(index=EMPLOYEE_INDEX, id=employee_id)
+        except NotFoundError:
+            self.invalidate(employee_id)
+            return None
+        return self.put(employee_id, doc['_source'], doc_version(doc))
+
+    async def get_many(self, es, employee_ids: Iterable[str]) -> Dict[str, Optional[Dict[str, Any]]]:
+        """
+        Resolve ids to `_source` docs (None when missing): cache first, then one
+        mget on new_people (documents there are keyed by employeeId) for the rest
+        """
+        found: Dict[str, Optional[Dict[str, Any]]] = {}
+        misses: List[str] = []
+        for employee_id in dict.fromkeys(employee_ids):
+            entry = self.get(employee_id)
+            if entry is not None:
+                found[employee_id] = entry.source
+            else:
+                misses.append(employee_id)
+
+        if misses:
+            async with bulkheads["es_search"].acquire():
+                response = await es.mget(index=EMPLOYEE_INDEX, ids=misses)
+            for doc in response['docs']:
+                if doc.get('found'):
+                    self.put(doc['_id'], doc['_source'], doc_version(doc))
+                    found[doc['_id']] = doc['_source']
+                else:
+                    found[doc['_id']] = None
+        return found
+
+
+employee_cache = EmployeeCache(settings.EMPLOYEE_CACHE_SIZE, settings.EMPLOYEE_CACHE_TTL_SECONDS)
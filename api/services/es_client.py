@@ -0,0 +1,106 @@
+"""
+Shared AsyncElasticsearch client for the employee directory and auth routers.
+
+One pooled client is created in the app lifespan and reused by every request,
+instead of building (and pinging) a synchronous client per call.
+"""
+from typing import TYPE_CHECKING, Any, AsyncIterator, Dict, Optional
+
+from api.config import settings
+
+if TYPE_CHECKING:
+    from elasticsearch import AsyncElasticsearch
+
+_client: Optional["AsyncElasticsearch"] = None
+
+
+def _create_client() -> "AsyncElasticsearch":
+    from elasticsearch import AsyncElasticsearch
+
+    params = {
+        "hosts": [settings.ELASTICSEARCH_URL or "http://localhost:9200"],
+        "connections_per_node": settings.ES_CONNECTIONS_PER_NODE,
+        "request_timeout": settings.ES_REQUEST_TIMEOUT,
+        "retry_on_timeout": True,
+        "max_retries": settings.ES_MAX_RETRIES,
+    }
+    if settings.ELASTICSEARCH_API_KEY:
+        params["api_key"] = settings.ELASTICSEARCH_API_KEY
+    return AsyncElasticsearch(**params)
+
+
+async def init_es_client() -> None:
+    """Create the shared client; called from the app lifespan"""
+    global _client
+    if _client is None:
+        _client = _create_client()
+
+
+async def close_es_client() -> None:
+    global _client
+    if _client is not None:
+        await _client.close()
+        _client = None
+
+
+def get_es_client() -> "AsyncElasticsearch":
+    """Return the shared client, creating it on first use outside the lifespan"""
+    global _client
+    if _client is None:
+        _client = _create_client()
+    return _client
+
+
+async def scan_sources(
+    es: "AsyncElasticsearch", index: str, body: Dict[str, Any], pool: str, size: int = 5000
+) -> AsyncIterator[Dict[str, Any]]:
+    """
+    Scroll through every hit of `body` on `index`, yielding each _source.
+
+    The bulkhead slot from `pool` is held per scroll page, not for the whole
+    scan: a multi-second reload then never looks like one slow call to the
+    pool's latency target, and calls sharing the pool get slots between pages.
+    """
+    from api.services.bulkhead import bulkheads
+
+    async with bulkheads[pool].acquire():
+        page = await es.search(index=index, scroll="2m", size=size, **body)
+    scroll_id = page.get("_scroll_id")
+    try:
+        while page["hits"]["hits"]:
+            for hit in page["hits"]["hits"]:
+                yield hit["_source"]
+            async with bulkheads[pool].acquire():
+                page = await es.scroll(scroll_id=scroll_id, scroll="2m")
+            scroll_id = page.get("_scroll_id", scroll_id)
+    finally:
+        if scroll_id:
+            await es.clear_scroll(scroll_id=scroll_id, ignore_status=(404,))
+
+
+async def index_generation(es: "AsyncElasticsearch", index: str) -> str:
+    """
+    Cheap generation token for an index: changes whenever documents are
+    indexed or deleted, without running a search or aggregation.
+
+    Built from values that survive node restarts and never repeat for
+    different data: each index's uuid (a recreated index gets a new one) and
+    the sum of its primary shards' max sequence numbers (every write takes a
+    new one). Sequence numbers advance before a refresh makes the write
+    searchable, so the docs count and deleted count, which come from the
+    refreshed Lucene reader, are included too: a tag handed out with
+    pre-refresh content is not repeated once the refresh lands.
+    """
+    stats = await es.indices.stats(index=index, metric="docs", level="shards")
+    parts = []
+    for name in sorted(stats["indices"]):
+        entry = stats["indices"][name]
+        max_seq_no = sum(
+            copy["seq_no"]["max_seq_no"]
+            for copies in entry["shards"].values()
+            for copy in copies
+            if copy["routing"]["primary"]
+        )
+        docs = entry["primaries"]["docs"]
+        parts.append(f"{entry.get('uuid', name)}:{max_seq_no}:{docs['count']}:{docs['deleted']}")
+    return "-".join(parts)
@@ -0,0 +1,106 @@
+"""
+Cache of rendered `/employees/{id}/hierarchy` responses.
+
+Entries are keyed by employee id and hold the serialized JSON body, so a hit
+skips both tree assembly and response encoding. A reverse index maps every
+employee to the cached entries whose management chain contains them. When the
+org graph is swapped, only entries the change can affect are dropped:
+
+- a moved employee's whole subtree (entries whose chain contains them)
+- the old and new managers and their ancestors (from the chain ids)
+- for added, removed or edited employees: entries whose chain contains them,
+  and their manager's entry, which lists them as a direct report
+"""
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Optional, Set
+
+from api.config import settings
+from api.services.metrics import registry
+from api.services.org_graph import GraphChanges, org_graph_store
+
+_requests = registry.counter("hierarchy_cache_requests_total", "Hierarchy response cache lookups by result")
+_invalidations = registry.counter("hierarchy_cache_invalidations_total", "Hierarchy responses dropped by reason")
+_entries = registry.gauge("hierarchy_cache_entries", "Hierarchy responses currently cached")
+
+
+@dataclass
+class CachedHierarchy:
+    body: bytes
+    etag: str
+    chain_ids: List[str]
+
+
+class HierarchyCache:
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, CachedHierarchy]" = OrderedDict()
+        # employee id -> cached employee ids whose management chain includes it
+        self._by_ancestor: Dict[str, Set[str]] = {}
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, employee_id: str) -> Optional[CachedHierarchy]:
+        with self._lock:
+            entry = self._entries.get(employee_id)
+            if entry is not None:
+                self._entries.move_to_end(employee_id)
+        _requests.inc(labels={"result": "hit" if entry is not None else "miss"})
+        return entry
+
+    def put(self, employee_id: str, entry: CachedHierarchy) -> None:
+        if self.max_entries <= 0:
+            return
+        with self._lock:
+            self._remove(employee_id)
+            self._entries[employee_id] = entry
+            for ancestor_id in entry.chain_ids:
+                self._by_ancestor.setdefault(ancestor_id, set()).add(employee_id)
+            while len(self._entries) > self.max_entries:
+                self._remove(next(iter(self._entries)))
+            _entries.set(len(self._entries))
+
+    def _remove(self, employee_id: str) -> bool:
+        entry = self._entries.pop(employee_id, None)
+        if entry is None:
+            return False
+        for ancestor_id in entry.chain_ids:
+            dependents = self._by_ancestor.get(ancestor_id)
+            if dependents is not None:
+                dependents.discard(employee_id)
+                if not dependents:
+                    del self._by_ancestor[ancestor_id]
+        return True
+
+    def _invalidate(self, employee_ids: Iterable[str], reason: str) -> None:
+        dropped = sum(self._remove(employee_id) for employee_id in employee_ids)
+        if dropped:
+            _invalidations.inc(dropped, labels={"reason": reason})
+
+    def _invalidate_subtree(self, employee_id: str, reason: str) -> None:
+        # The chain of every cached entry ends with its own id, so this includes employee_id
+        self._invalidate(list(self._by_ancestor.get(employee_id, ())), reason)
+
+    def apply(self, changes: Optional[GraphChanges]) -> None:
+        """Drop the entries a graph swap can affect; everything when the change set is unknown"""
+        with self._lock:
+            if changes is None:
+                self._invalidate(list(self._entries), "reload")
+            else:
+                for employee_id, (old_chain, new_chain) in changes.moved.items():
+                    self._invalidate_subtree(employee_id, "moved")
+                    self._invalidate(old_chain + new_chain, "manager_changed")
+                for employee_id, managers in changes.touched.items():
+                    self._invalidate_subtree(employee_id, "updated")
+                    self._invalidate(managers, "updated")
+            _entries.set(len(self._entries))
+
+    def clear(self) -> None:
+        self.apply(None)
+
+
+hierarchy_cache = HierarchyCache(settings.HIERARCHY_RESPONSE_CACHE_SIZE)
+org_graph_store.subscribe(hierarchy_cache.apply)
@@ -0,0 +1,193 @@
+"""
+Conversation history compaction for chat prompts.
+
+Clients send the whole conversation on every chat turn. Forwarded as-is,
+prompt size and latency grow with every turn until the context limit is hit.
+Instead the last LLM_HISTORY_KEEP_TURNS turns go to the model verbatim, and
+older turns are replaced by a running summary kept per chat session.
+
+The summary is produced off the request path: a turn that finds unsummarized
+older messages schedules a background fold (previous summary + those
+messages -> new summary) and meanwhile sends them verbatim. The next turn
+picks the summary up. Each summary remembers a digest of the messages it
+covers, so a session whose history was edited or restarted is summarized
+afresh instead of reusing a summary of a different conversation.
+
+Whatever is sent is then held to LLM_HISTORY_TOKENS, working in whole turns
+(a user message and the replies after it) so no reply is sent without its
+question. The newest turn always goes in, then the other recent turns while
+they fit, then the summary, cut short if it must be, then any older turns not
+yet summarized. Estimated tokens before and after compaction are counted so
+the savings show on /metrics.
+"""
+import asyncio
+import hashlib
+import json
+import logging
+from collections import OrderedDict
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple
+
+from api.config import settings
+from api.services.context_packer import estimate_tokens, trim
+from api.services.metrics import registry
+
+logger = logging.getLogger(__name__)
+
+Message = Dict[str, str]
+# (previous summary or None, messages to fold in) -> new summary
+Summarizer = Callable[[Optional[str], List[Message]], Awaitable[str]]
+
+_history_tokens = registry.counter(
+    "chat_history_tokens_total", "Estimated conversation history tokens, as received and as sent to the LLM"
+)
+_saved_tokens = registry.counter("chat_history_tokens_saved_total", "Estimated history tokens kept out of chat prompts")
+_folds = registry.counter("chat_history_summaries_total", "Background history summary updates by result")
+
+SUMMARY_PREFIX = "Summary of the earlier conversation:\n"
+
+
+def _digest(messages: List[Message]) -> str:
+    return hashlib.sha256(
+        json.dumps([(m["role"], m["content"]) for m in messages]).encode("utf-8")
+    ).hexdigest()
+
+
+def _tokens(messages: List[Message]) -> int:
+    # A few tokens of per-message framing on top of the content
+    return sum(estimate_tokens(m["content"]) + 4 for m in messages)
+
+
+def _turns(messages: List[Message]) -> List[List[Message]]:
+    """Split messages into turns, each starting at a user message"""
+    turns: List[List[Message]] = []
+    for message in messages:
+        if message["role"] == "user" or not turns:
+            turns.append([])
+        turns[-1].append(message)
+    return turns
+
+
+class HistoryCompactor:
+    def __init__(self, keep_turns: int, budget: int, max_sessions: int):
+        self.keep_turns = keep_turns
+        self.budget = budget
+        self.max_sessions = max_sessions
+        # session -> (messages covered, digest of those messages, summary)
+        self._summaries: "OrderedDict[str, Tuple[int, str, str]]" = OrderedDict()
+        self._pending: Dict[str, asyncio.Task] = {}
+
+    def _summary_for(self, session: str, older: List[Message]) -> Tuple[int, Optional[str]]:
+        """(messages covered, summary) for this session, if it still matches the history"""
+        entry = self._summaries.get(session)
+        if entry is None:
+            return 0, None
+        covered, digest, summary = entry
+        if covered > len(older) or _digest(older[:covered]) != digest:
+            del self._summaries[session]
+            return 0, None
+        self._summaries.move_to_end(session)
+        return covered, summary
+
+    def _store(self, session: str, covered: int, digest: str, summary: str) -> None:
+        self._summaries[session] = (covered, digest, summary)
+        self._summaries.move_to_end(session)
+        while len(self._summaries) > self.max_sessions:
+            self._summaries.popitem(last=False)
+
+    async def _fold(self, session: str, older: List[Message], covered: int, summary: Optional[str],
+                    summarize: Summarizer) -> None:
+        # Fold at most a few budgets' worth per update; the rest goes in on later turns
+        batch: List[Message] = []
+        size = 0
+        for message in older[covered:]:
+            size += _tokens([message])
+            if batch and size > self.budget * 4:
+                break
+            batch.append(message)
+        try:
+            folded = await summarize(summary, batch)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            _folds.inc(labels={"result": "error"})
+            logger.warning(f"Conversation summary update failed: {e}")
+            return
+        covered += len(batch)
+        self._store(session, covered, _digest(older[:covered]), folded.strip())
+        _folds.inc(labels={"result": "ok"})
+
+    def _schedule(self, session: str, older: List[Message], covered: int, summary: Optional[str],
+                  summarize: Summarizer) -> None:
+        if session in self._pending:
+            return
+        task = asyncio.create_task(self._fold(session, older, covered, summary, summarize))
+        self._pending[session] = task
+        task.add_done_callback(lambda _: self._pending.pop(session, None))
+
+    def compact(self, session: Optional[str], history: List[Message], summarize: Summarizer) -> List[Message]:
+        """
+        Messages to send in place of `history`. Older turns are folded into a
+        session summary when `session` is given; without one they are only
+        trimmed to the token budget.
+        """
+        split = max(0, len(history) - self.keep_turns * 2)
+        older = history[:split]
+
+        covered, summary = 0, None
+        if session and older:
+            covered, summary = self._summary_for(session, older)
+            if covered < len(older):
+                self._schedule(session, older, covered, summary, summarize)
+
+        turns = _turns(history[covered:])
+        recent_count = min(len(turns), max(1, self.keep_turns))
+        recent, unsummarized = turns[len(turns) - recent_count:], turns[:len(turns) - recent_count]
+
+        # Newest first: the last turn always goes in, earlier recent turns while they fit
+        kept: List[List[Message]] = []
+        room = self.budget
+        for turn in reversed(recent):
+            size = _tokens(turn)
+            if kept and size > room:
+                break
+            kept.insert(0, turn)
+            room -= size
+
+        head: List[Message] = []
+        if summary and room > _tokens([{"content": SUMMARY_PREFIX}]):
+            text = trim(summary, room - _tokens([{"content": SUMMARY_PREFIX}]))
+            if text:
+                head = [{"role": "system", "content": SUMMARY_PREFIX + text}]
+                room -= _tokens(head)
+
+        # Older turns not yet in the summary, only when nothing more recent was left out
+        if len(kept) == len(recent):
+            for turn in reversed(unsummarized):
+                size = _tokens(turn)
+                if size > room:
+                    break
+                kept.insert(0, turn)
+                room -= size
+        compacted = head + [message for turn in kept for message in turn]
+
+        before, after = _tokens(history), _tokens(compacted)
+        _history_tokens.inc(before, labels={"stage": "received"})
+        _history_tokens.inc(after, labels={"stage": "sent"})
+        if before > after:
+            _saved_tokens.inc(before - after)
+        return compacted
+
+    async def stop(self) -> None:
+        """Cancel summary updates still in flight; called from the app lifespan"""
+        tasks = list(self._pending.values())
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._pending.clear()
+
+
+history_compactor = HistoryCompactor(
+    settings.LLM_HISTORY_KEEP_TURNS,
+    settings.LLM_HISTORY_TOKENS,
+    settings.LLM_HISTORY_SESSIONS,
+)
@@ -0,0 +1,189 @@
+"""
+Content-addressed cache of generated summaries.
+
+The key is a SHA-256 over everything the prompt is built from: model and
+token limit, the query, each document's id and a hash of its content, and the
+persona (position and department) the system prompt is written for. The same
+documents summarized for the same kind of reader reuse one completion, and
+any edit to a document changes its hash and so misses.
+
+Entries live in a per-process LRU and, when LLM_CACHE_DIR is set, as one JSON
+file per key on disk, shared by all workers and surviving restarts. Both
+tiers expire entries after LLM_CACHE_TTL_SECONDS; the disk tier drops the
+oldest files once it grows past LLM_CACHE_DISK_MAX_MB.
+"""
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, Optional, Tuple
+
+from api.config import settings
+from api.services.metrics import registry
+
+logger = logging.getLogger(__name__)
+
+_requests = registry.counter("llm_cache_requests_total", "LLM response cache lookups by kind and result")
+
+
+def _digest(value: Any) -> str:
+    return hashlib.sha256(json.dumps(value, sort_keys=True, default=str).encode("utf-8")).hexdigest()
+
+
+def cache_key(kind: str, model: str, max_tokens: int, query: str, documents: Iterable[Dict[str, Any]],
+              position: str, department: str) -> str:
+    """Key for a summary: documents are identified by id plus a hash of their full content, in id order"""
+    docs = sorted((str(doc.get("id")), _digest(doc)) for doc in documents)
+    return _digest({
+        "kind": kind,
+        "model": model,
+        "max_tokens": max_tokens,
+        "query": query,
+        "documents": docs,
+        "position": position,
+        "department": department,
+    })
+
+
+class LLMResponseCache:
+    def __init__(self, directory: str, ttl_seconds: float, max_entries: int, disk_max_bytes: int):
+        self.directory = directory
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.disk_max_bytes = disk_max_bytes
+        # key -> (created wall-clock time, text)
+        self._entries: "OrderedDict[str, Tuple[float, str]]" = OrderedDict()
+        self._lock = threading.Lock()
+        # Bytes on disk, counted on first use and kept up to date by this process
+        self._disk_bytes: Optional[int] = None
+        self._disk_lock = threading.Lock()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, key[:2], f"{key}.json")
+
+    def _remember(self, key: str, created: float, text: str) -> None:
+        if self.max_entries <= 0:
+            return
+        with self._lock:
+            self._entries[key] = (created, text)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def _read_disk(self, key: str) -> Optional[Tuple[float, str]]:
+        path = self._path(key)
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                entry = json.load(f)
+            created, text = float(entry["created"]), entry["text"]
+            if not isinstance(text, str):
+                raise TypeError("text is not a string")
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError, KeyError, TypeError) as e:
+            # Valid JSON of the wrong shape is a miss too; the next put overwrites it
+            logger.warning(f"Unreadable LLM cache entry {path}: {e}")
+            return None
+        if created + self.ttl_seconds <= time.time():
+            self._unlink(path)
+            return None
+        return created, text
+
+    def _write_disk(self, key: str, created: float, text: str) -> None:
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump({"created": created, "text": text}, f)
+            with self._disk_lock:
+                try:
+                    replaced = os.path.getsize(path)
+                except FileNotFoundError:
+                    replaced = 0
+                os.replace(tmp_path, path)
+                if self._disk_bytes is None:
+                    self._disk_bytes = self._scan_disk_bytes()
+                else:
+                    self._disk_bytes += os.path.getsize(path) - replaced
+                if self._disk_bytes > self.disk_max_bytes:
+                    self._prune()
+        except BaseException:
+            self._unlink(tmp_path)
+            raise
+
+    def _files(self):
+        for root, _, names in os.walk(self.directory):
+            for name in names:
+                if name.endswith(".json"):
+                    path = os.path.join(root, name)
+                    try:
+                        stat = os.stat(path)
+                    except FileNotFoundError:
+                        continue
+                    yield path, stat.st_mtime, stat.st_size
+
+    def _scan_disk_bytes(self) -> int:
+        return sum(size for _, _, size in self._files())
+
+    def _unlink(self, path: str) -> None:
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+
+    def _prune(self) -> None:
+        """Drop expired files, then the oldest, until the disk tier is back under 90% of its cap"""
+        files = sorted(self._files(), key=lambda item: item[1])
+        total = sum(size for _, _, size in files)
+        expired_before = time.time() - self.ttl_seconds
+        for path, mtime, size in files:
+            if total <= self.disk_max_bytes * 0.9 and mtime > expired_before:
+                break
+            self._unlink(path)
+            total -= size
+        self._disk_bytes = total
+
+    async def get(self, kind: str, key: str) -> Optional[str]:
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] + self.ttl_seconds <= now:
+                del self._entries[key]
+                entry = None
+            if entry is not None:
+                self._entries.move_to_end(key)
+        if entry is not None:
+            _requests.inc(labels={"kind": kind, "result": "memory"})
+            return entry[1]
+
+        if self.directory:
+            entry = await asyncio.to_thread(self._read_disk, key)
+            if entry is not None:
+                self._remember(key, *entry)
+                _requests.inc(labels={"kind": kind, "result": "disk"})
+                return entry[1]
+        _requests.inc(labels={"kind": kind, "result": "miss"})
+        return None
+
+    async def put(self, key: str, text: str) -> None:
+        created = time.time()
+        self._remember(key, created, text)
+        if self.directory:
+            try:
+                await asyncio.to_thread(self._write_disk, key, created, text)
+            except OSError as e:
+                logger.warning(f"Could not persist LLM cache entry: {e}")
+
+
+llm_cache = LLMResponseCache(
+    settings.LLM_CACHE_DIR,
+    settings.LLM_CACHE_TTL_SECONDS,
+    settings.LLM_CACHE_MEMORY_ENTRIES,
+    settings.LLM_CACHE_DISK_MAX_MB * 1024 * 1024,
+)
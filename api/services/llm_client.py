@@ -0,0 +1,104 @@
+"""
+Shared httpx client for the LLM provider.
+
+One pooled keep-alive client (HTTP/2 when the `h2` package is installed) is
+created in the app lifespan and reused by every completion, instead of a new
+client, and a new TLS handshake, per call. Connect and read timeouts are set
+separately: connecting should fail fast, while a long completion may take
+a minute to produce its first byte.
+"""
+import email.utils
+import logging
+import random
+import time
+from typing import TYPE_CHECKING, Optional
+
+from api.config import settings
+
+if TYPE_CHECKING:
+    import httpx
+
+logger = logging.getLogger(__name__)
+
+# Provider responses worth retrying: rate limited or a transient server-side failure
+RETRY_STATUSES = frozenset({429, 500, 502, 503, 504})
+
+_client: Optional["httpx.AsyncClient"] = None
+
+
+def _http2_available() -> bool:
+    try:
+        import h2  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def _create_client() -> "httpx.AsyncClient":
+    import httpx
+
+    http2 = settings.LLM_HTTP2 and _http2_available()
+    if settings.LLM_HTTP2 and not http2:
+        logger.warning("LLM_HTTP2 is set but the h2 package is missing; using HTTP/1.1 keep-alive")
+    return httpx.AsyncClient(
+        http2=http2,
+        timeout=httpx.Timeout(
+            connect=settings.LLM_CONNECT_TIMEOUT,
+            read=settings.LLM_READ_TIMEOUT,
+            write=settings.LLM_CONNECT_TIMEOUT,
+            pool=settings.LLM_CONNECT_TIMEOUT,
+        ),
+        limits=httpx.Limits(
+            max_connections=settings.LLM_MAX_CONNECTIONS,
+            max_keepalive_connections=settings.LLM_MAX_CONNECTIONS,
+            keepalive_expiry=settings.LLM_KEEPALIVE_SECONDS,
+        ),
+    )
+
+
+async def init_llm_client() -> None:
+    """Create the shared client; called from the app lifespan"""
+    global _client
+    if _client is None:
+        _client = _create_client()
+
+
+async def close_llm_client() -> None:
+    global _client
+    if _client is not None:
+        await _client.aclose()
+        _client = None
+
+
+def get_llm_client() -> "httpx.AsyncClient":
+    """Return the shared client, creating it on first use outside the lifespan"""
+    global _client
+    if _client is None:
+        _client = _create_client()
+    return _client
+
+
+def _retry_after(value: Optional[str]) -> Optional[float]:
+    """Seconds to wait from a Retry-After header (delta-seconds or HTTP-date)"""
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, email.utils.parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+def retry_delay(attempt: int, retry_after: Optional[str] = None) -> float:
+    """
+    Backoff before retry number `attempt` (0-based): the provider's Retry-After
+    when it sent one, otherwise exponential backoff with full jitter. Capped at
+    LLM_RETRY_MAX_DELAY either way.
+    """
+    requested = _retry_after(retry_after)
+    if requested is not None:
+        return min(requested, settings.LLM_RETRY_MAX_DELAY)
+    return random.uniform(0, min(settings.LLM_RETRY_MAX_DELAY, settings.LLM_RETRY_BASE_DELAY * 2 ** attempt))
@@ -1,6 +1,7 @@
-import httpx
+import asyncio
 import json
-from typing import List, Dict, Any
+import time
+from typing import AsyncIterator, Callable, List, Dict, Any, Optional, Tuple
 from api.models.llm import (
     SummaryRequest, ComprehensiveSummaryRequest, ChatRequest, 
     ChatResponse, SummaryResponse, ChatMessage
@@ -8,10 +9,25 @@ from api.models.llm import (
 from api.models.search import SearchResult
 from api.models.user import User
 from api.config import settings
+from api.services import context_packer
+from api.services.bulkhead import BulkheadFullError, bulkheads
+from api.services.history_compactor import history_compactor
+from api.services.llm_cache import cache_key, llm_cache
+from api.services.llm_client import RETRY_STATUSES, get_llm_client, retry_delay
+from api.services.metrics import registry
 import logging
 
 logger = logging.getLogger(__name__)
 
+LLM_BUCKETS = (0.25, 0.5, 1.0, 2.0, 5.0, 10.0, 20.0, 30.0, 60.0, 120.0)
+
+_call_latency = registry.histogram("llm_call_seconds", "LLM provider call latency per attempt by outcome", LLM_BUCKETS)
+_tokens = registry.counter("llm_tokens_total", "Tokens billed by the LLM provider by type")
+_retries = registry.counter("llm_retries_total", "LLM provider calls retried by reason")
+_time_to_first_token = registry.histogram(
+    "llm_time_to_first_token_seconds", "Time from request to the first streamed token by endpoint", LLM_BUCKETS
+)
+
 
 class LLMService:
     def __init__(self):
@@ -25,127 +41,374 @@ class LLMService:
             "Authorization": f"Bearer {self.api_key}"
         }
 
+    @staticmethod
+    def _excerpts(texts: List[str], query: str, budget: int, highlights=None) -> List[str]:
+        """Query-relevant passages of each text, packed into `budget` estimated tokens"""
+        return context_packer.pack(texts, query, budget, settings.LLM_CONTEXT_PASSAGE_TOKENS, highlights)
+
+    def _summary_messages(self, request: SummaryRequest, user: User) -> List[Dict[str, str]]:
+        results = request.search_results
+        excerpts = self._excerpts(
+            [result.content or "" for result in results],
+            request.query,
+            settings.LLM_CONTEXT_SUMMARY_TOKENS,
+            [result.highlights for result in results],
+        )
+        context = [
+            {
+                "title": result.title,
+                "summary": result.summary,
+                "source": result.source,
+                "content": excerpt or result.summary,
+                "relevance_score": result.relevance_score
+            }
+            for result, excerpt in zip(results, excerpts)
+        ]
+
+        system_prompt = self._build_summary_system_prompt(user, len(context))
+        user_prompt = self._build_summary_user_prompt(request.query, context)
+        return [
+            {"role": "system", "content": system_prompt},
+            {"role": "user", "content": user_prompt}
+        ]
+
+    @staticmethod
+    def _source_distribution(results: List[SearchResult]) -> Dict[str, int]:
+        source_distribution = {}
+        for result in results:
+            source = result.source
+            source_distribution[source] = source_distribution.get(source, 0) + 1
+        return source_distribution
+
+    @staticmethod
+    def _fallback_summary(request: SummaryRequest) -> SummaryResponse:
+        sources = list(set(result.source for result in request.search_results))
+        fallback_summary = (
+            f"Found {len(request.search_results)} relevant documents across {', '.join(sources)}. "
+            f"The results include {', '.join(result.title for result in request.search_results[:3])}. "
+            "Unable to generate AI summary - please check OpenAI API configuration."
+        )
+        return SummaryResponse(
+            summary=fallback_summary,
+            source_distribution={source: sum(1 for r in request.search_results if r.source == source) for source in sources},
+            confidence_score=0.0
+        )
+
+    def _summary_cache_key(self, request: SummaryRequest, user: User) -> str:
+        documents = [result.model_dump() for result in request.search_results]
+        return cache_key("summary", self.model, 300, request.query, documents, user.position, user.department)
+
     async def generate_summary(self, request: SummaryRequest, user: User) -> SummaryResponse:
         """Generate a summary of search results"""
         try:
-            context = [
-                {
-                    "title": result.title,
-                    "summary": result.summary,
-                    "source": result.source,
-                    "content": result.content[:500] if result.content else result.summary,
-                    "relevance_score": result.relevance_score
-                }
-                for result in request.search_results
-            ]
-
-            system_prompt = self._build_summary_system_prompt(user, len(context))
-            user_prompt = self._build_summary_user_prompt(request.query, context)
-
-            response = await self._call_openai([
-                {"role": "system", "content": system_prompt},
-                {"role": "user", "content": user_prompt}
-            ], max_tokens=300)
-
-            # Calculate source distribution
-            source_distribution = {}
-            for result in request.search_results:
-                source = result.source
-                source_distribution[source] = source_distribution.get(source, 0) + 1
+            response = await self._cached_completion(
+                "summary", self._summary_cache_key(request, user), self._summary_messages(request, user), 300
+            )
 
             return SummaryResponse(
                 summary=response,
-                source_distribution=source_distribution,
+                source_distribution=self._source_distribution(request.search_results),
                 confidence_score=0.8  # Could be calculated based on relevance scores
             )
 
         except Exception as e:
             logger.error(f"Summary generation failed: {e}")
-            # Fallback summary
-            sources = list(set(result.source for result in request.search_results))
-            fallback_summary = (
-                f"Found {len(request.search_results)} relevant documents across {', '.join(sources)}. "
-                f"The results include {', '.join(result.title for result in request.search_results[:3])}. "
-                "Unable to generate AI summary - please check OpenAI API configuration."
-            )
-            return SummaryResponse(
-                summary=fallback_summary,
-                source_distribution={source: sum(1 for r in request.search_results if r.source == source) for source in sources},
-                confidence_score=0.0
-            )
+            return self._fallback_summary(request)
+
+    def _comprehensive_messages(self, request: ComprehensiveSummaryRequest, user: User) -> List[Dict[str, str]]:
+        system_prompt = self._build_comprehensive_system_prompt(user)
+        user_prompt = self._build_comprehensive_user_prompt(request.selected_documents, user)
+        return [
+            {"role": "system", "content": system_prompt},
+            {"role": "user", "content": user_prompt}
+        ]
+
+    def _comprehensive_cache_key(self, request: ComprehensiveSummaryRequest, user: User) -> str:
+        documents = [doc.model_dump() for doc in request.selected_documents]
+        return cache_key("comprehensive_summary", self.model, 1500, "", documents, user.position, user.department)
 
     async def generate_comprehensive_summary(self, request: ComprehensiveSummaryRequest, user: User) -> str:
         """Generate a comprehensive summary of selected documents"""
         try:
-            system_prompt = self._build_comprehensive_system_prompt(user)
-            user_prompt = self._build_comprehensive_user_prompt(request.selected_documents, user)
-
-            response = await self._call_openai([
-                {"role": "system", "content": system_prompt},
-                {"role": "user", "content": user_prompt}
-            ], max_tokens=1500)
-
-            return response
+            return await self._cached_completion(
+                "comprehensive_summary",
+                self._comprehensive_cache_key(request, user),
+                self._comprehensive_messages(request, user),
+                1500
+            )
 
         except Exception as e:
             logger.error(f"Comprehensive summary generation failed: {e}")
             return self._generate_fallback_comprehensive_summary(request.selected_documents, user)
 
+    def _chat_messages(self, request: ChatRequest, user: User) -> List[Dict[str, str]]:
+        has_context = len(request.search_context) > 0
+
+        system_prompt = self._build_chat_system_prompt(user, has_context)
+        user_prompt = self._build_chat_user_prompt(request.message, request.search_context, has_context)
+
+        # Build message history
+        messages = [{"role": "system", "content": system_prompt}]
+
+        # Add conversation history: recent turns verbatim, older ones as the session's running summary
+        history = [{"role": msg.role, "content": msg.content} for msg in request.conversation_history or []]
+        session = f"{user.id}:{request.session_id}" if request.session_id else None
+        messages.extend(history_compactor.compact(session, history, self._summarize_history))
+
+        # Add current user message
+        messages.append({"role": "user", "content": user_prompt})
+        return messages
+
+    async def _summarize_history(self, summary: Optional[str], messages: List[Dict[str, str]]) -> str:
+        """Fold chat turns into the running summary of a session's earlier conversation"""
+        transcript = "\n".join(f"{msg['role']}: {msg['content']}" for msg in messages)
+        return await self._call_openai([
+            {
+                "role": "system",
+                "content": "You keep a running summary of a conversation between a user and an enterprise search "
+                           "assistant. Merge the new turns into the existing summary. Keep facts, decisions, names, "
+                           "referenced documents and open questions; drop greetings and filler. Reply with the "
+                           "summary only, as short bullet points."
+            },
+            {"role": "user", "content": f"Existing summary:\n{summary or '(none)'}\n\nNew turns:\n{transcript}"}
+        ], max_tokens=settings.LLM_HISTORY_SUMMARY_TOKENS, temperature=0.2)
+
+    @staticmethod
+    def _chat_sources(request: ChatRequest) -> List[str]:
+        return list(set(result.get('source', 'unknown') for result in request.search_context))
+
     async def generate_chat_response(self, request: ChatRequest, user: User) -> ChatResponse:
         """Generate a chat response based on context and conversation history"""
         try:
-            has_context = len(request.search_context) > 0
-            
-            system_prompt = self._build_chat_system_prompt(user, has_context)
-            user_prompt = self._build_chat_user_prompt(request.message, request.search_context, has_context)
-            
-            # Build message history
-            messages = [{"role": "system", "content": system_prompt}]
-            
-            # Add conversation history
-            for msg in request.conversation_history:
-                messages.append({"role": msg.role, "content": msg.content})
-            
-            # Add current user message
-            messages.append({"role": "user", "content": user_prompt})
-
-            response = await self._call_openai(messages, max_tokens=500)
-            
-            sources_referenced = []
-            if has_context:
-                sources_referenced = list(set(result.get('source', 'unknown') for result in request.search_context))
+            response = await self._call_openai(self._chat_messages(request, user), max_tokens=500)
 
             return ChatResponse(
                 response=response,
-                context_used=has_context,
-                sources_referenced=sources_referenced
+                context_used=len(request.search_context) > 0,
+                sources_referenced=self._chat_sources(request)
             )
 
         except Exception as e:
             logger.error(f"Chat response generation failed: {e}")
             return self._generate_fallback_chat_response(request, e)
 
+    async def stream_summary(self, request: SummaryRequest, user: User) -> AsyncIterator[Tuple[str, Dict[str, Any]]]:
+        """Streaming generate_summary: delta events, then a done event shaped like SummaryResponse"""
+        def fallback(error: Exception) -> Dict[str, Any]:
+            return self._fallback_summary(request).model_dump()
+
+        final = {
+            "source_distribution": self._source_distribution(request.search_results),
+            "confidence_score": 0.8
+        }
+        async for event in self._stream_events(
+            self._summary_messages(request, user), 300, "summary", "summary", final, fallback,
+            cache_key=self._summary_cache_key(request, user)
+        ):
+            yield event
+
+    async def stream_comprehensive_summary(
+        self, request: ComprehensiveSummaryRequest, user: User
+    ) -> AsyncIterator[Tuple[str, Dict[str, Any]]]:
+        """Streaming generate_comprehensive_summary: delta events, then a done event with the summary"""
+        def fallback(error: Exception) -> Dict[str, Any]:
+            return {"summary": self._generate_fallback_comprehensive_summary(request.selected_documents, user)}
+
+        async for event in self._stream_events(
+            self._comprehensive_messages(request, user), 1500, "comprehensive_summary", "summary", {}, fallback,
+            cache_key=self._comprehensive_cache_key(request, user)
+        ):
+            yield event
+
+    async def stream_chat_response(self, request: ChatRequest, user: User) -> AsyncIterator[Tuple[str, Dict[str, Any]]]:
+        """Streaming generate_chat_response: delta events, then a done event shaped like ChatResponse"""
+        def fallback(error: Exception) -> Dict[str, Any]:
+            return self._generate_fallback_chat_response(request, error).model_dump()
+
+        final = {
+            "context_used": len(request.search_context) > 0,
+            "sources_referenced": self._chat_sources(request)
+        }
+        async for event in self._stream_events(
+            self._chat_messages(request, user), 500, "chat", "response", final, fallback
+        ):
+            yield event
+
+    async def _stream_events(
+        self,
+        messages: List[Dict[str, str]],
+        max_tokens: int,
+        endpoint: str,
+        text_field: str,
+        final: Dict[str, Any],
+        fallback: Callable[[Exception], Dict[str, Any]],
+        cache_key: Optional[str] = None
+    ) -> AsyncIterator[Tuple[str, Dict[str, Any]]]:
+        """
+        Relay a streamed completion as ("delta", {"content"}) events followed by
+        one ("done", final) event carrying the full text under text_field and the
+        provider's usage. If the provider fails before the first token, the
+        non-streaming fallback is sent instead; after it, an ("error", ...) event.
+        With a cache_key, a cached completion is sent as a single delta.
+        """
+        if cache_key is not None and settings.LLM_CACHE_ENABLED:
+            cached = await llm_cache.get(endpoint, cache_key)
+            if cached is not None:
+                yield "delta", {"content": cached}
+                yield "done", {**final, text_field: cached, "usage": None, "cached": True}
+                return
+
+        parts: List[str] = []
+        usage = None
+        try:
+            async for kind, value in self._stream_openai(messages, max_tokens, endpoint):
+                if kind == "delta":
+                    parts.append(value)
+                    yield "delta", {"content": value}
+                else:
+                    usage = value
+        except BulkheadFullError as e:
+            yield "error", {"detail": e.detail, "status_code": e.status_code}
+            return
+        except Exception as e:
+            logger.error(f"Streaming {endpoint} failed: {e}")
+            if parts:
+                yield "error", {"detail": f"Generation interrupted: {e}"}
+                return
+            done = fallback(e)
+            yield "delta", {"content": done[text_field]}
+            yield "done", {**done, "usage": None}
+            return
+        text = "".join(parts)
+        if cache_key is not None and settings.LLM_CACHE_ENABLED:
+            await llm_cache.put(cache_key, text)
+        yield "done", {**final, text_field: text, "usage": usage, "cached": False}
+
     async def _call_openai(self, messages: List[Dict[str, str]], max_tokens: int = 500, temperature: float = 0.7) -> str:
         """Make a call to OpenAI API"""
-        async with httpx.AsyncClient() as client:
-            response = await client.post(
-                self.endpoint,
-                headers=self._get_headers(),
-                json={
-                    "model": self.model,
-                    "messages": messages,
-                    "max_tokens": max_tokens,
-                    "temperature": temperature,
-                    "presence_penalty": 0.1,
-                    "frequency_penalty": 0.1
-                }
-            )
-            response.raise_for_status()
-            data = response.json()
-            return data["choices"][0]["message"]["content"]
+        data = await self._post_completion({
+            "model": self.model,
+            "messages": messages,
+            "max_tokens": max_tokens,
+            "temperature": temperature,
+            "presence_penalty": 0.1,
+            "frequency_penalty": 0.1
+        })
+        return data["choices"][0]["message"]["content"]
+
+    async def _cached_completion(self, kind: str, key: str, messages: List[Dict[str, str]], max_tokens: int) -> str:
+        """_call_openai through the response cache; only real completions are stored, never fallbacks"""
+        if not settings.LLM_CACHE_ENABLED:
+            return await self._call_openai(messages, max_tokens=max_tokens)
+        cached = await llm_cache.get(kind, key)
+        if cached is not None:
+            return cached
+        response = await self._call_openai(messages, max_tokens=max_tokens)
+        await llm_cache.put(key, response)
+        return response
+
+    async def _post_completion(self, payload: Dict[str, Any]) -> Dict[str, Any]:
+        response = await self._send(payload)
+        data = response.json()
+        self._record_usage(data.get("usage"))
+        return data
+
+    async def _stream_openai(
+        self, messages: List[Dict[str, str]], max_tokens: int, endpoint: str, temperature: float = 0.7
+    ) -> AsyncIterator[Tuple[str, Any]]:
+        """Yield ("delta", text) for each content delta and ("usage", usage) from a streamed completion"""
+        started = time.perf_counter()
+        payload = {
+            "model": self.model,
+            "messages": messages,
+            "max_tokens": max_tokens,
+            "temperature": temperature,
+            "presence_penalty": 0.1,
+            "frequency_penalty": 0.1,
+            "stream": True
+        }
+        if settings.LLM_STREAM_USAGE:
+            payload["stream_options"] = {"include_usage": True}
+
+        # The stream slot covers the whole body, which holds a pooled connection until it ends
+        async with bulkheads["llm_stream"].acquire():
+            response = await self._send(payload, stream=True)
+            first_token = True
+            try:
+                async for line in response.aiter_lines():
+                    if not line.startswith("data:"):
+                        continue
+                    data = line[len("data:"):].strip()
+                    if data == "[DONE]":
+                        break
+                    chunk = json.loads(data)
+                    if chunk.get("usage"):
+                        self._record_usage(chunk["usage"])
+                        yield "usage", chunk["usage"]
+                    for choice in chunk.get("choices") or []:
+                        content = (choice.get("delta") or {}).get("content")
+                        if content:
+                            if first_token:
+                                _time_to_first_token.observe(time.perf_counter() - started, labels={"endpoint": endpoint})
+                                first_token = False
+                            yield "delta", content
+            finally:
+                await response.aclose()
+
+    async def _send(self, payload: Dict[str, Any], stream: bool = False):
+        """
+        POST a completion on the shared client. 429/5xx responses and dropped
+        connections are retried up to LLM_MAX_RETRIES times, waiting for the
+        provider's Retry-After or a jittered exponential backoff; the bulkhead
+        slot is released while waiting. With stream=True the body is left
+        unread (the caller must aclose the response) and the bulkhead covers
+        the wait for response headers.
+        """
+        import httpx
+
+        client = get_llm_client()
+        attempt = 0
+        while True:
+            started = time.perf_counter()
+            retry_after: Optional[str] = None
+            error: Optional[Exception] = None
+            try:
+                async with bulkheads["llm"].acquire() as slot:
+                    request = client.build_request("POST", self.endpoint, headers=self._get_headers(), json=payload)
+                    response = await client.send(request, stream=stream)
+                    if response.status_code in RETRY_STATUSES:
+                        slot.mark_failed()
+            except (httpx.ConnectError, httpx.ConnectTimeout, httpx.RemoteProtocolError) as e:
+                outcome, error = "connect_error", e
+            else:
+                outcome = str(response.status_code)
+                if response.status_code not in RETRY_STATUSES:
+                    _call_latency.observe(time.perf_counter() - started, labels={"outcome": outcome})
+                    if response.is_error and stream:
+                        await response.aclose()
+                    response.raise_for_status()
+                    return response
+                retry_after = response.headers.get("retry-after")
+                if stream:
+                    await response.aclose()
+            _call_latency.observe(time.perf_counter() - started, labels={"outcome": outcome})
+
+            if attempt >= settings.LLM_MAX_RETRIES:
+                if error is not None:
+                    raise error
+                response.raise_for_status()
+            _retries.inc(labels={"reason": outcome})
+            await asyncio.sleep(retry_delay(attempt, retry_after))
+            attempt += 1
+
+    @staticmethod
+    def _record_usage(usage: Optional[Dict[str, Any]]) -> None:
+        for kind in ("prompt_tokens", "completion_tokens"):
+            if usage and usage.get(kind):
+                _tokens.inc(usage[kind], labels={"type": kind.removesuffix("_tokens")})
 
     def _build_summary_system_prompt(self, user: User, context_count: int) -> str:
-        return f"""You are an AI assistant for a Bank's enterprise search system. Your role is to analyze search results and provide concise, professional summaries for {user.name}, a {user.position} in {user.department}.
+        return f"""You are an AI assistant for a Bank's enterprise search system. Your role is to analyze search results and provide concise, professional summaries for a {user.position} in {user.department}.
 
 Context: You have access to {context_count} documents from various sources (Jira, Confluence, SharePoint) related to the user's query.
 
@@ -161,6 +424,7 @@ Guidelines:
             f"{i+1}. Title: {item['title']}\n"
             f"   Source: {item['source']}\n"
             f"   Summary: {item['summary']}\n"
+            f"   Excerpt: {item['content']}\n"
             f"   Relevance: {item['relevance_score']}%"
             for i, item in enumerate(context)
         ])
@@ -173,7 +437,7 @@ Search Results Context:
 Please provide a professional summary of these search results in response to the user's query."""
 
     def _build_comprehensive_system_prompt(self, user: User) -> str:
-        return f"""You are an AI assistant for a Bank's enterprise search system. Your role is to create comprehensive summaries for {user.name}, a {user.position} in {user.department}.
+        return f"""You are an AI assistant for a Bank's enterprise search system. Your role is to create comprehensive summaries for a {user.position} in {user.department}.
 
 Your task is to analyze multiple documents and create a unified, executive-level summary that:
 - Synthesizes key information across all selected documents
@@ -186,16 +450,24 @@ Your task is to analyze multiple documents and create a unified, executive-level
 Focus on insights that would be valuable for strategic decision-making and operational excellence."""
 
     def _build_comprehensive_user_prompt(self, documents: List[SearchResult], user: User) -> str:
+        # No query here: passages are ranked by overlap with what the selection is about
+        themes = " ".join(f"{doc.title} {doc.summary} {' '.join(doc.tags)}" for doc in documents)
+        excerpts = self._excerpts(
+            [doc.content or "" for doc in documents],
+            themes,
+            settings.LLM_CONTEXT_COMPREHENSIVE_TOKENS,
+            [doc.highlights for doc in documents],
+        )
         doc_summaries = "\n".join([
             f"Document {i+1}: {doc.title}\n"
             f"Source: {doc.source}\n"
             f"Author: {doc.author}\n"
             f"Date: {doc.date}\n"
             f"Summary: {doc.summary}\n"
-            f"Content Preview: {doc.content[:800] if doc.content else doc.summary}\n"
+            f"Content Preview: {excerpt or doc.summary}\n"
             f"Tags: {', '.join(doc.tags)}\n"
             f"Relevance Score: {doc.relevance_score}%\n\n---\n"
-            for i, doc in enumerate(documents)
+            for i, (doc, excerpt) in enumerate(zip(documents, excerpts))
         ])
 
         return f"""Please create a comprehensive summary of the following {len(documents)} documents:
@@ -228,13 +500,19 @@ Current context: {"Documents found and analyzed" if has_context else "No specifi
 
     def _build_chat_user_prompt(self, message: str, search_context: List[Dict[str, Any]], has_context: bool) -> str:
         if has_context:
+            excerpts = self._excerpts(
+                [result.get('content') or "" for result in search_context],
+                message,
+                settings.LLM_CONTEXT_CHAT_TOKENS,
+                [result.get('highlights') for result in search_context],
+            )
             context_summary = "\n".join([
                 f"{i+1}. {result.get('title', 'Unknown')} ({result.get('source', 'unknown')})\n"
                 f"   Summary: {result.get('summary', '')}\n"
                 f"   Relevance: {result.get('relevance_score', result.get('relevanceScore', 0))}%\n"
                 f"   URL: {result.get('url', '#')}\n"
-                f"   Content Preview: {result.get('content', result.get('summary', ''))[:300]}"
-                for i, result in enumerate(search_context)
+                f"   Content Preview: {excerpt or result.get('summary', '')}"
+                for i, (result, excerpt) in enumerate(zip(search_context, excerpts))
             ])
 
             return f"""{message}
@@ -272,7 +550,8 @@ Note: No specific search context is available. Please provide a helpful general
 
     def _generate_fallback_chat_response(self, request: ChatRequest, error: Exception) -> ChatResponse:
         context_count = len(request.search_context)
-        sources = list(set(result.source for result in request.search_context)) if request.search_context else []
+        # search_context items are plain dicts
+        sources = self._chat_sources(request)
         
         if "401" in str(error):
             response = f"I'm having trouble accessing the AI system - please check the OpenAI API key configuration. Based on the {context_count} search results currently displayed, I can see content from {', '.join(sources)}."
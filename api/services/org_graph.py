@@ -0,0 +1,178 @@
+"""
+In-memory reporting graph for the API.
+
+The whole `employee_hierarchy` index is loaded into an `OrgGraph` (see
+`api/services/org_tree.py` for the layout) so org-chart views are answered
+from memory instead of a get plus two mgets.
+
+A background task reloads the graph when the source index's generation changes.
+When ORG_GRAPH_SNAPSHOT_PATH points at a snapshot written by ingestion (see
+`api/services/org_snapshot.py`), workers mmap that file instead of scanning
+Elasticsearch and pick up a new one as soon as it is swapped into place.
+"""
+import asyncio
+import logging
+import os
+import time
+from typing import Callable, List, Optional, Tuple
+
+from api.config import settings
+from api.services.org_tree import (  # noqa: F401 (re-exported)
+    FIELDS,
+    HIERARCHY_INDEX,
+    PROJECTED_FIELDS,
+    ROLLUP_FIELDS,
+    GraphChanges,
+    OrgGraph,
+    diff_graphs,
+    project_source,
+)
+
+logger = logging.getLogger(__name__)
+
+
+class OrgGraphStore:
+    """Holds the current graph and keeps it in sync with the hierarchy index"""
+
+    def __init__(self):
+        self.graph: Optional[OrgGraph] = None
+        self._task: Optional[asyncio.Task] = None
+        self._snapshot_stamp = None
+        # Whether the current graph came from the snapshot, and the index generation
+        # first seen while serving it (None until the next index check)
+        self._from_snapshot = False
+        self._snapshot_generation: Optional[str] = None
+        self._listeners: List[Callable[[Optional[GraphChanges]], None]] = []
+
+    def subscribe(self, listener: Callable[[Optional[GraphChanges]], None]) -> None:
+        """
+        Call listener(changes) on the event loop after every graph swap; changes
+        is None when there is no previous graph to compare against
+        """
+        self._listeners.append(listener)
+
+    def _publish(self, graph: OrgGraph, changes: Optional[GraphChanges]) -> None:
+        self.graph = graph
+        for listener in self._listeners:
+            listener(changes)
+
+    async def _swap(self, graph: OrgGraph) -> None:
+        changes = None
+        if self.graph is not None and self._listeners:
+            changes = await asyncio.to_thread(diff_graphs, self.graph, graph)
+        self._publish(graph, changes)
+
+    async def load(self, es, generation: str) -> OrgGraph:
+        from api.services.es_client import scan_sources
+
+        body = {"query": {"match_all": {}}, "source": ["employeeId", "managerEmpId", *FIELDS]}
+        rows = [source async for source in scan_sources(es, HIERARCHY_INDEX, body, pool="es_admin")]
+        # Building is CPU-bound; keep the event loop responsive while it runs
+        graph = await asyncio.to_thread(OrgGraph.build, rows, generation)
+        await asyncio.to_thread(graph.jump_table)
+        await self._swap(graph)
+        logger.info(f"Org graph loaded: {len(graph)} employees, {len(graph.strings)} distinct strings")
+        return graph
+
+    def _read_snapshot(self, path: str) -> Tuple[bool, Optional[OrgGraph]]:
+        """(exists, graph) where graph is only set when the snapshot is new since the last check"""
+        try:
+            stat = os.stat(path)
+        except FileNotFoundError:
+            return False, None
+        # Writers replace the file atomically, so a new inode or mtime means a new snapshot
+        stamp = (stat.st_ino, stat.st_mtime_ns)
+        if stamp == self._snapshot_stamp:
+            return True, None
+        from api.services.org_snapshot import load_snapshot
+
+        graph = load_snapshot(path)
+        graph.jump_table()
+        self._snapshot_stamp = stamp
+        self._from_snapshot = True
+        self._snapshot_generation = None
+        logger.info(f"Org graph mapped from {path}: {len(graph)} employees, generation {graph.generation}")
+        return True, graph
+
+    def load_snapshot(self, path: str) -> Optional[OrgGraph]:
+        """Map the snapshot at path if it is new since the last check; None when missing"""
+        exists, graph = self._read_snapshot(path)
+        if graph is not None:
+            self._publish(graph, None)
+        return self.graph if exists else None
+
+    async def _refresh_loop(self) -> None:
+        from api.services.bulkhead import bulkheads
+        from api.services.es_client import get_es_client, index_generation
+
+        last_index_check = float("-inf")
+        while True:
+            snapshot = False
+            try:
+                if settings.ORG_GRAPH_SNAPSHOT_PATH:
+                    snapshot, graph = self._read_snapshot(settings.ORG_GRAPH_SNAPSHOT_PATH)
+                    if graph is not None:
+                        await self._swap(graph)
+                if not snapshot:
+                    self._from_snapshot = False
+                # With a snapshot the file is polled often and the index every ORG_GRAPH_REFRESH_SECONDS
+                if not snapshot or time.monotonic() - last_index_check >= settings.ORG_GRAPH_REFRESH_SECONDS:
+                    last_index_check = time.monotonic()
+                    es = get_es_client()
+                    async with bulkheads["es_admin"].acquire():
+                        generation = await index_generation(es, HIERARCHY_INDEX)
+                    if not self._snapshot_is_current(generation) and (
+                        self.graph is None or self.graph.generation != generation
+                    ):
+                        await self.load(es, generation)
+                        self._from_snapshot = False
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"Org graph refresh failed: {e}")
+            await asyncio.sleep(
+                settings.ORG_GRAPH_SNAPSHOT_POLL_SECONDS if snapshot else settings.ORG_GRAPH_REFRESH_SECONDS
+            )
+
+    def _snapshot_is_current(self, generation: str) -> bool:
+        """
+        Whether a snapshot-backed graph still matches the index. The first check
+        after mapping a snapshot records the index generation; if the index then
+        moves on before a newer snapshot is written, edits made directly in
+        Elasticsearch would never be served, so the graph is reloaded from there.
+        """
+        if not self._from_snapshot:
+            return False
+        if self._snapshot_generation is None:
+            self._snapshot_generation = generation
+            return True
+        if generation == self._snapshot_generation:
+            return True
+        logger.warning(
+            f"Org graph snapshot {settings.ORG_GRAPH_SNAPSHOT_PATH} is stale: {HIERARCHY_INDEX} changed since it "
+            "was mapped; serving the index until a new snapshot is written"
+        )
+        return False
+
+    def start(self) -> None:
+        """Load in the background; requests fall back to Elasticsearch until it is ready"""
+        if settings.ORG_GRAPH_ENABLED and self._task is None:
+            if settings.ORG_GRAPH_SNAPSHOT_PATH:
+                # Mapping a snapshot is near-instant, so have the graph ready before serving
+                try:
+                    self.load_snapshot(settings.ORG_GRAPH_SNAPSHOT_PATH)
+                except Exception as e:
+                    logger.warning(f"Org graph snapshot load failed: {e}")
+            self._task = asyncio.create_task(self._refresh_loop())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+
+org_graph_store = OrgGraphStore()
@@ -0,0 +1,179 @@
+"""
+Versioned binary snapshot of the org graph, shared by workers through mmap.
+
+Layout (little endian):
+
+    8 bytes   magic b"ORGSNAP\\0"
+    4 bytes   format version (uint32)
+    4 bytes   header length (uint32)
+    header    UTF-8 JSON: generation, count, and {name: offset/dtype/length} per array
+    arrays    raw NumPy arrays, each aligned to 64 bytes
+
+Arrays: parent, child_offsets, children, depth, pre, post, id_slots,
+id_order (nodes sorted by employee id), one slot array per display field,
+and the string table as string_offsets + string_blob.
+
+Writers build the file next to the target and os.replace() it into place, so
+readers only ever see a complete snapshot.
+"""
+import json
+import mmap
+import os
+import struct
+import tempfile
+from bisect import bisect_left
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+
+from api.services.org_tree import FIELDS, OrgGraph
+
+MAGIC = b"ORGSNAP\0"
+FORMAT_VERSION = 1
+ALIGNMENT = 64
+_PREAMBLE = struct.Struct("<8sII")
+
+
+class StringTable:
+    """Read-only string table decoded lazily from a mapped blob"""
+
+    def __init__(self, offsets: np.ndarray, blob: np.ndarray):
+        self._offsets = offsets
+        self._blob = memoryview(blob)
+
+    def __len__(self) -> int:
+        return len(self._offsets) - 1
+
+    def __getitem__(self, slot: int) -> str:
+        return str(self._blob[self._offsets[slot]:self._offsets[slot + 1]], "utf-8")
+
+
+class _SlotView:
+    """Sequence of strings addressed through a slot array"""
+
+    def __init__(self, strings: StringTable, slots: np.ndarray):
+        self._strings = strings
+        self._slots = slots
+
+    def __len__(self) -> int:
+        return len(self._slots)
+
+    def __getitem__(self, node: int) -> str:
+        return self._strings[self._slots[node]]
+
+
+class _SortedIdIndex:
+    """employeeId -> node lookup by binary search; avoids building a dict per worker"""
+
+    def __init__(self, ids: _SlotView, order: np.ndarray):
+        self._ids = ids
+        self._order = order
+        self._keys = _SlotView(ids._strings, ids._slots[order])
+
+    def get(self, employee_id: str, default: Optional[int] = None) -> Optional[int]:
+        position = bisect_left(self._keys, employee_id)
+        if position < len(self._keys) and self._keys[position] == employee_id:
+            return int(self._order[position])
+        return default
+
+
+def _string_table(graph: OrgGraph) -> Tuple[Dict[str, int], np.ndarray, np.ndarray]:
+    slots: Dict[str, int] = {}
+    encoded = []
+    for value in list(graph.strings) + list(graph.ids):
+        if value not in slots:
+            slots[value] = len(encoded)
+            encoded.append(value.encode("utf-8"))
+    offsets = np.zeros(len(encoded) + 1, dtype="<i8")
+    np.cumsum([len(e) for e in encoded], out=offsets[1:])
+    blob = np.frombuffer(b"".join(encoded), dtype=np.uint8)
+    return slots, offsets, blob
+
+
+def write_snapshot(graph: OrgGraph, path: str) -> None:
+    """Serialize the graph and atomically replace the snapshot at path"""
+    slots, string_offsets, string_blob = _string_table(graph)
+    count = len(graph)
+    id_slots = np.fromiter((slots[employee_id] for employee_id in graph.ids), dtype="<i4", count=count)
+
+    arrays = {
+        "parent": np.asarray(graph.parent, dtype="<i4"),
+        "child_offsets": np.asarray(graph.child_offsets, dtype="<i4"),
+        "children": np.asarray(graph.children, dtype="<i4"),
+        "depth": np.asarray(graph.depth, dtype="<i4"),
+        "pre": np.arange(count, dtype="<i4"),
+        "post": np.asarray(graph.post, dtype="<i4"),
+        "id_slots": id_slots,
+        "id_order": np.asarray(sorted(range(count), key=graph.ids.__getitem__), dtype="<i4"),
+        "string_offsets": string_offsets,
+        "string_blob": string_blob,
+    }
+    for field in FIELDS:
+        # Remap the graph's string slots onto the snapshot's combined table
+        remap = np.array([slots[s] for s in graph.strings] + [-1], dtype="<i4")
+        arrays[f"field_{field}"] = remap[np.asarray(graph.fields[field], dtype=np.int64)]
+
+    layout = {}
+    offset = 0
+    for name, array in arrays.items():
+        layout[name] = {"offset": offset, "dtype": array.dtype.str, "length": int(array.size)}
+        offset += -(-array.nbytes // ALIGNMENT) * ALIGNMENT
+
+    header = json.dumps({
+        "generation": graph.generation,
+        "count": count,
+        "fields": list(FIELDS),
+        "arrays": layout,
+    }).encode("utf-8")
+    data_start = -(-(_PREAMBLE.size + len(header)) // ALIGNMENT) * ALIGNMENT
+
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(prefix=".orgsnap-", dir=directory)
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(_PREAMBLE.pack(MAGIC, FORMAT_VERSION, len(header)))
+            f.write(header)
+            for name, array in arrays.items():
+                f.seek(data_start + layout[name]["offset"])
+                f.write(array.tobytes())
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.unlink(tmp_path)
+        raise
+
+
+def load_snapshot(path: str) -> OrgGraph:
+    """Map a snapshot read-only; pages are shared by every process mapping the file"""
+    with open(path, "rb") as f:
+        mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+    magic, version, header_length = _PREAMBLE.unpack_from(mapped, 0)
+    if magic != MAGIC:
+        raise ValueError(f"{path} is not an org graph snapshot")
+    if version != FORMAT_VERSION:
+        raise ValueError(f"Unsupported org graph snapshot version {version} (expected {FORMAT_VERSION})")
+    header = json.loads(mapped[_PREAMBLE.size:_PREAMBLE.size + header_length])
+    data_start = -(-(_PREAMBLE.size + header_length) // ALIGNMENT) * ALIGNMENT
+
+    def array(name: str) -> np.ndarray:
+        spec = header["arrays"][name]
+        return np.frombuffer(mapped, dtype=spec["dtype"], count=spec["length"], offset=data_start + spec["offset"])
+
+    strings = StringTable(array("string_offsets"), array("string_blob"))
+    ids = _SlotView(strings, array("id_slots"))
+    return OrgGraph(
+        ids=ids,
+        parent=array("parent"),
+        child_offsets=array("child_offsets"),
+        children=array("children"),
+        depth=array("depth"),
+        strings=strings,
+        fields={field: array(f"field_{field}") for field in header["fields"]},
+        generation=header["generation"],
+        post=array("post"),
+        index=_SortedIdIndex(ids, array("id_order")),
+    )
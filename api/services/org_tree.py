@@ -0,0 +1,398 @@
+"""
+Array-backed reporting graph, shared by the API and the ingestion scripts.
+
+The whole `employee_hierarchy` index fits in a compact structure:
+
+- employee ids map to dense ints assigned in DFS pre-order (roots first)
+- `parent[i]` is the manager's dense id (-1 for roots)
+- children are stored CSR-style: `children[child_offsets[i]:child_offsets[i + 1]]`
+- `depth[i]` is the distance from the root; `post[i]` is the post-order number
+- display attributes are indexes into one interned string table
+
+This module has no settings or web-framework dependencies (NumPy is imported
+where it is used), so `python/build_hierarchy_snapshot.py` can build graphs
+without the API's environment. The API-side store lives in `org_graph.py`.
+"""
+from array import array
+from collections import defaultdict
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Set, Tuple
+
+HIERARCHY_INDEX = "employee_hierarchy"
+
+# Attributes counted in subtree rollups: rollup key -> source field
+ROLLUP_FIELDS = {"departments": "departments", "locations": "city"}
+
+# Source fields kept in memory for org-chart nodes
+FIELDS = (
+    "fullName",
+    "designations",
+    "departments",
+    "emailAddress",
+    "city",
+    "country",
+    "userImageUrl",
+    "profileUrl",
+)
+
+
+def _manager_id(row: Dict[str, Any]) -> Optional[str]:
+    manager = row.get("managerEmpId")
+    if manager is None or str(manager) in ("", "null", "None"):
+        return None
+    return str(manager)
+
+
+def project_source(row: Dict[str, Any]) -> Dict[str, Any]:
+    """An employee_hierarchy _source cut down to what OrgGraph.source(node, with_relations=True) returns"""
+    doc = {field: row[field] for field in FIELDS if row.get(field) is not None}
+    doc["employeeId"] = str(row.get("employeeId"))
+    doc["managerEmpId"] = _manager_id(row)
+    doc["reports"] = [str(report) for report in row.get("reports") or []]
+    doc["management_chain_ids"] = [str(manager) for manager in row.get("management_chain_ids") or []]
+    return doc
+
+
+# Source fields the hierarchy endpoint reads for the target employee
+PROJECTED_FIELDS = ["employeeId", "managerEmpId", *FIELDS, "reports", "management_chain_ids"]
+
+
+class OrgGraph:
+    def __init__(
+        self,
+        ids: Sequence[str],
+        parent: Sequence[int],
+        child_offsets: Sequence[int],
+        children: Sequence[int],
+        depth: Sequence[int],
+        strings: Sequence[str],
+        fields: Dict[str, Sequence[int]],
+        generation: str = "",
+        post: Optional[Sequence[int]] = None,
+        index: Optional[Any] = None,
+    ):
+        self.ids = ids
+        # Any mapping-like object with .get() works (mmap snapshots use a sorted index)
+        self.index = index if index is not None else {employee_id: node for node, employee_id in enumerate(ids)}
+        self.parent = parent
+        self.child_offsets = child_offsets
+        self.children = children
+        self.depth = depth
+        self.strings = strings
+        self.fields = fields
+        self.generation = generation
+        self.post = post if post is not None else self._post_order(parent, depth)
+        self._jump = None
+
+    @classmethod
+    def build(cls, rows: Iterable[Dict[str, Any]], generation: str = "") -> "OrgGraph":
+        """Build the graph from employee docs (employeeId, managerEmpId and FIELDS)"""
+        docs: Dict[str, Dict[str, Any]] = {}
+        for row in rows:
+            if row.get("employeeId"):
+                docs[str(row["employeeId"])] = row
+
+        reports = defaultdict(list)
+        roots = []
+        for employee_id, row in docs.items():
+            manager_id = _manager_id(row)
+            if manager_id and manager_id in docs and manager_id != employee_id:
+                reports[manager_id].append(employee_id)
+            else:
+                roots.append(employee_id)
+        # Sorted siblings make the numbering independent of scan order, so ingestion,
+        # snapshots and workers scanning the index all agree on pre/post numbers
+        roots.sort()
+        for report_ids in reports.values():
+            report_ids.sort()
+
+        # Iterative DFS assigning dense ids in pre-order. Members of a reporting
+        # cycle are unreachable from any root; the first one seen becomes a root.
+        order: List[str] = []
+        parent = array("i")
+        depth = array("i")
+        position: Dict[str, int] = {}
+
+        def walk(root: str) -> None:
+            stack = [(root, -1)]
+            while stack:
+                employee_id, parent_node = stack.pop()
+                if employee_id in position:
+                    continue
+                node = len(order)
+                position[employee_id] = node
+                order.append(employee_id)
+                parent.append(parent_node)
+                depth.append(depth[parent_node] + 1 if parent_node >= 0 else 0)
+                for report_id in reversed(reports.get(employee_id, ())):
+                    if report_id not in position:
+                        stack.append((report_id, node))
+
+        for root in roots:
+            walk(root)
+        for employee_id in sorted(docs):
+            if employee_id not in position:
+                walk(employee_id)
+
+        # CSR child lists; pre-order numbering keeps each child list sorted
+        size = len(order)
+        counts = [0] * (size + 1)
+        for node in range(size):
+            if parent[node] >= 0:
+                counts[parent[node] + 1] += 1
+        child_offsets = array("i", [0]) * (size + 1)
+        for node in range(size):
+            child_offsets[node + 1] = child_offsets[node] + counts[node + 1]
+        children = array("i", [0]) * child_offsets[size]
+        fill = array("i", child_offsets)
+        for node in range(size):
+            p = parent[node]
+            if p >= 0:
+                children[fill[p]] = node
+                fill[p] += 1
+
+        strings: List[str] = []
+        interned: Dict[str, int] = {}
+
+        def intern(value: Any) -> int:
+            if value is None:
+                return -1
+            value = str(value)
+            slot = interned.get(value)
+            if slot is None:
+                slot = interned[value] = len(strings)
+                strings.append(value)
+            return slot
+
+        fields = {
+            field: array("i", (intern(docs[employee_id].get(field)) for employee_id in order))
+            for field in FIELDS
+        }
+
+        return cls(order, parent, child_offsets, children, depth, strings, fields, generation)
+
+    @staticmethod
+    def _post_order(parent: Sequence[int], depth: Sequence[int]) -> Sequence[int]:
+        # With pre-order ids a node's subtree is [i, i + size); the nodes finished
+        # before it are its earlier non-ancestors plus its own descendants
+        size = len(parent)
+        subtree = array("i", [1]) * size
+        for node in range(size - 1, 0, -1):
+            if parent[node] >= 0:
+                subtree[parent[node]] += subtree[node]
+        return array("i", (node - depth[node] + subtree[node] - 1 for node in range(size)))
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def lookup(self, employee_id: str) -> Optional[int]:
+        return self.index.get(str(employee_id))
+
+    def children_of(self, node: int) -> Sequence[int]:
+        return self.children[self.child_offsets[node]:self.child_offsets[node + 1]]
+
+    def subtree_end(self, node: int) -> int:
+        """Exclusive end of node's pre-order range: its descendants are node + 1 .. end - 1"""
+        return self.post[node] + self.depth[node] + 1
+
+    def descendant_count(self, node: int) -> int:
+        return int(self.subtree_end(node)) - node - 1
+
+    def roots(self) -> List[int]:
+        """Top-level nodes in order; each root's subtree is one contiguous pre-order range"""
+        roots = []
+        node = 0
+        while node < len(self):
+            roots.append(node)
+            node = int(self.subtree_end(node))
+        return roots
+
+    def descendants(self, node: int, max_depth: Optional[int] = None, filters: Optional[Dict[str, str]] = None):
+        """
+        Descendant nodes in pre-order as a NumPy array, optionally limited to
+        max_depth levels below node and to exact attribute matches
+        """
+        import numpy as np
+
+        start, end = node + 1, self.subtree_end(node)
+        nodes = np.arange(start, end, dtype=np.int32)
+        mask = np.ones(len(nodes), dtype=bool)
+        if max_depth is not None:
+            depth = np.frombuffer(self.depth, dtype=np.int32)[start:end]
+            mask &= depth <= self.depth[node] + max_depth
+        for field, value in (filters or {}).items():
+            column = np.frombuffer(self.fields[field], dtype=np.int32)[start:end]
+            # Subtrees hold few distinct values per field; decode those, not every row
+            wanted = [slot for slot in np.unique(column) if slot >= 0 and self.strings[slot] == value]
+            mask &= np.isin(column, wanted)
+        return nodes[mask]
+
+    def rollups(self) -> List[Dict[str, Any]]:
+        """
+        Subtree stats for every node in one bottom-up pass: reverse pre-order
+        visits each node after all of its descendants, so its totals are final
+        before they are folded into its manager.
+        """
+        size = len(self)
+        headcount = array("i", [1]) * size
+        max_depth_below = array("i", [0]) * size
+        counts = {key: [None] * size for key in ROLLUP_FIELDS}
+        stats: List[Dict[str, Any]] = [None] * size
+        for node in range(size - 1, -1, -1):
+            for key, field in ROLLUP_FIELDS.items():
+                node_counts = counts[key][node] or {}
+                value = self.attribute(node, field)
+                if value is not None:
+                    node_counts[value] = node_counts.get(value, 0) + 1
+                counts[key][node] = node_counts
+            direct = self.child_offsets[node + 1] - self.child_offsets[node]
+            stats[node] = {
+                "headcount": headcount[node],
+                "direct_reports": direct,
+                "indirect_reports": headcount[node] - 1 - direct,
+                "max_depth_below": max_depth_below[node],
+                **{key: dict(counts[key][node]) for key in ROLLUP_FIELDS},
+            }
+            parent = self.parent[node]
+            if parent >= 0:
+                headcount[parent] += headcount[node]
+                max_depth_below[parent] = max(max_depth_below[parent], max_depth_below[node] + 1)
+                for key in ROLLUP_FIELDS:
+                    parent_counts = counts[key][parent]
+                    if parent_counts is None:
+                        parent_counts = counts[key][parent] = {}
+                    for value, count in counts[key][node].items():
+                        parent_counts[value] = parent_counts.get(value, 0) + count
+            # Folded into the manager and copied into stats; the working counter can go
+            for key in ROLLUP_FIELDS:
+                counts[key][node] = None
+        return stats
+
+    def subtree_stats(self, node: int) -> Dict[str, Any]:
+        """Same stats as rollups() for a single node, from the contiguous pre-order range"""
+        import numpy as np
+
+        end = self.subtree_end(node)
+        depth = np.frombuffer(self.depth, dtype=np.int32)[node:end]
+        direct = self.child_offsets[node + 1] - self.child_offsets[node]
+        stats = {
+            "headcount": int(end - node),
+            "direct_reports": int(direct),
+            "indirect_reports": int(end - node - 1 - direct),
+            "max_depth_below": int(depth.max() - depth[0]),
+        }
+        for key, field in ROLLUP_FIELDS.items():
+            column = np.frombuffer(self.fields[field], dtype=np.int32)[node:end]
+            slots, slot_counts = np.unique(column[column >= 0], return_counts=True)
+            stats[key] = {self.strings[int(slot)]: int(count) for slot, count in zip(slots, slot_counts)}
+        return stats
+
+    def chain(self, node: int) -> List[int]:
+        """Management chain from the root down to (and including) node"""
+        chain = []
+        while node >= 0:
+            chain.append(node)
+            node = self.parent[node]
+        chain.reverse()
+        return chain
+
+    def jump_table(self):
+        """
+        Binary-lifting table: row k holds each node's 2**k-th manager (-1 past the root).
+        Built once per graph on first use (a few vectorized passes, log2(depth) rows).
+        """
+        if self._jump is None:
+            import numpy as np
+
+            parent = np.frombuffer(self.parent, dtype=np.int32)
+            max_depth = int(np.frombuffer(self.depth, dtype=np.int32).max()) if len(parent) else 0
+            rows = [parent]
+            for _ in range(max(max_depth.bit_length() - 1, 0)):
+                prev = rows[-1]
+                rows.append(np.where(prev >= 0, prev[np.maximum(prev, 0)], -1).astype(np.int32))
+            self._jump = np.stack(rows)
+        return self._jump
+
+    def ancestor(self, node: int, steps: int) -> int:
+        """The manager `steps` levels above node, in O(log steps)"""
+        jump = self.jump_table()
+        k = 0
+        while steps and node >= 0:
+            if steps & 1:
+                node = int(jump[k][node]) if k < len(jump) else -1
+            steps >>= 1
+            k += 1
+        return node
+
+    def lowest_common_manager(self, a: int, b: int) -> int:
+        """Deepest node managing both a and b (either may be the other); -1 if in different trees"""
+        if self.depth[a] < self.depth[b]:
+            a, b = b, a
+        a = self.ancestor(a, self.depth[a] - self.depth[b])
+        if a == b:
+            return a
+        jump = self.jump_table()
+        for k in range(len(jump) - 1, -1, -1):
+            if jump[k][a] != jump[k][b]:
+                a, b = int(jump[k][a]), int(jump[k][b])
+        return int(self.parent[a])
+
+    def attribute(self, node: int, field: str) -> Optional[str]:
+        slot = self.fields[field][node]
+        return self.strings[slot] if slot >= 0 else None
+
+    def source(self, node: int, with_relations: bool = False) -> Dict[str, Any]:
+        """Doc-shaped view of a node, mirroring the employee_hierarchy _source fields"""
+        # Fields absent from the source doc stay absent so callers' defaults still apply
+        doc = {}
+        for field in FIELDS:
+            slot = self.fields[field][node]
+            if slot >= 0:
+                doc[field] = self.strings[slot]
+        doc["employeeId"] = self.ids[node]
+        parent = self.parent[node]
+        doc["managerEmpId"] = self.ids[parent] if parent >= 0 else None
+        if with_relations:
+            doc["reports"] = [self.ids[child] for child in self.children_of(node)]
+            doc["management_chain_ids"] = [self.ids[n] for n in self.chain(node)]
+        return doc
+
+
+@dataclass
+class GraphChanges:
+    """What changed between two graphs, keyed by employee id"""
+    # Employees whose manager changed -> (old manager's chain, new manager's chain), root first
+    moved: Dict[str, Tuple[List[str], List[str]]] = field(default_factory=dict)
+    # Employees added, removed or with changed display fields -> their manager(s) in either graph
+    touched: Dict[str, Set[str]] = field(default_factory=dict)
+
+
+def diff_graphs(old: OrgGraph, new: OrgGraph) -> GraphChanges:
+    """Compare two graphs employee by employee (CPU-bound; run it off the event loop)"""
+    changes = GraphChanges()
+
+    def manager(graph: OrgGraph, node: int) -> Optional[str]:
+        parent = graph.parent[node]
+        return graph.ids[parent] if parent >= 0 else None
+
+    def manager_chain(graph: OrgGraph, node: int) -> List[str]:
+        parent = graph.parent[node]
+        return [graph.ids[n] for n in graph.chain(parent)] if parent >= 0 else []
+
+    for node in range(len(new)):
+        employee_id = new.ids[node]
+        old_node = old.lookup(employee_id)
+        new_manager = manager(new, node)
+        if old_node is None:
+            changes.touched[employee_id] = {new_manager} - {None}
+            continue
+        old_manager = manager(old, old_node)
+        if old_manager != new_manager:
+            changes.moved[employee_id] = (manager_chain(old, old_node), manager_chain(new, node))
+        elif any(old.attribute(old_node, name) != new.attribute(node, name) for name in FIELDS):
+            changes.touched[employee_id] = {new_manager} - {None}
+    for old_node in range(len(old)):
+        employee_id = old.ids[old_node]
+        if new.lookup(employee_id) is None:
+            changes.touched[employee_id] = {manager(old, old_node)} - {None}
+    return changes
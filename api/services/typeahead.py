@@ -0,0 +1,256 @@
+"""
+In-process employee typeahead.
+
+Name tokens, whole names, LAN ids and email local-parts are normalized
+(lowercased, accents stripped) into one sorted key list, so a keystroke is a
+bisect prefix scan instead of a fuzzy multi_match in Elasticsearch. Results
+are ordered by a static rank (seniority: fewer levels below the top of the
+org first, then name). When nothing matches, a small edit-distance pass over
+name tokens catches typos.
+
+The index is built from `new_people` in the background at startup; changed
+docs are pulled by their `modified` timestamp and the arrays rebuilt off the
+event loop, with a periodic full reload to drop deleted employees.
+"""
+import asyncio
+import logging
+import sys
+import time
+import unicodedata
+from bisect import bisect_left
+from typing import Any, Dict, List, Optional, Tuple
+
+from api.config import settings
+
+logger = logging.getLogger(__name__)
+
+EMPLOYEE_INDEX = "new_people"
+
+# Fields returned with each suggestion (and read from the index)
+SUGGESTION_FIELDS = ("employeeId", "fullName", "designations", "departments", "emailAddress", "userImageUrl")
+SOURCE_FIELDS = [*SUGGESTION_FIELDS, "lanIds", "managerEmpId", "modified"]
+
+# Prefixes up to this length get their top results precomputed; they match too many keys to scan
+SHORT_PREFIX = 2
+
+
+def normalize(text: Any) -> str:
+    decomposed = unicodedata.normalize("NFKD", str(text))
+    return "".join(c for c in decomposed if not unicodedata.combining(c)).lower().strip()
+
+
+def _as_list(value: Any) -> List[str]:
+    if value is None:
+        return []
+    return [str(v) for v in value] if isinstance(value, list) else [str(value)]
+
+
+def within_distance(a: str, b: str, limit: int) -> bool:
+    """Levenshtein distance <= limit, abandoning rows that already exceed it"""
+    if abs(len(a) - len(b)) > limit:
+        return False
+    previous = list(range(len(b) + 1))
+    for i, ca in enumerate(a, 1):
+        current = [i]
+        for j, cb in enumerate(b, 1):
+            current.append(min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (ca != cb)))
+        if min(current) > limit:
+            return False
+        previous = current
+    return previous[-1] <= limit
+
+
+class TypeaheadIndex:
+    def __init__(self, docs: Dict[str, Dict[str, Any]], modified: str = ""):
+        import numpy as np
+
+        self.docs = docs
+        self.modified = modified
+        ids = list(docs)
+        ranks = self._seniority(docs)
+        # Position in `people` is the static rank: lower is better
+        self.people: List[Dict[str, Any]] = [
+            {field: docs[i].get(field) for field in SUGGESTION_FIELDS}
+            for i in sorted(ids, key=lambda i: (ranks[i], normalize(docs[i].get("fullName", "")), i))
+        ]
+
+        pairs = set()
+        for person, doc in enumerate(self.people):
+            source = docs[doc["employeeId"]]
+            name = normalize(source.get("fullName") or "")
+            if name:
+                pairs.add((name, person))
+                pairs.update((token, person) for token in name.split())
+            pairs.update((normalize(lan_id), person) for lan_id in _as_list(source.get("lanIds")))
+            email = source.get("emailAddress")
+            if email:
+                pairs.add((normalize(str(email).split("@")[0]), person))
+
+        ordered = sorted(pair for pair in pairs if pair[0])
+        self.keys = [key for key, _ in ordered]
+        self.postings = np.fromiter((person for _, person in ordered), dtype=np.int32, count=len(ordered))
+        # Most keys any one person has, which bounds duplicates within a prefix range
+        self.max_keys_per_person = int(np.bincount(self.postings).max()) if len(ordered) else 1
+
+        self.short: Dict[str, List[int]] = {}
+        for key, person in ordered:
+            for length in range(1, min(SHORT_PREFIX, len(key)) + 1):
+                top = self.short.setdefault(key[:length], [])
+                if len(top) < settings.TYPEAHEAD_MAX_RESULTS or person < top[-1]:
+                    if person not in top:
+                        top.append(person)
+                        top.sort()
+                        del top[settings.TYPEAHEAD_MAX_RESULTS:]
+
+        # Name tokens bucketed by first letter for the edit-distance fallback
+        self.tokens_by_initial: Dict[str, List[str]] = {}
+        for token in sorted({t for doc in docs.values() for t in normalize(doc.get("fullName") or "").split()}):
+            self.tokens_by_initial.setdefault(token[0], []).append(token)
+
+    @staticmethod
+    def _seniority(docs: Dict[str, Dict[str, Any]]) -> Dict[str, int]:
+        """Levels between each employee and the top of their reporting line"""
+        levels: Dict[str, int] = {}
+        for employee_id in docs:
+            path = []
+            current = employee_id
+            while current in docs and current not in levels and current not in path:
+                path.append(current)
+                manager = docs[current].get("managerEmpId")
+                current = str(manager) if manager else None
+            base = levels.get(current, -1) if current is not None else -1
+            for offset, member in enumerate(reversed(path), 1):
+                levels[member] = base + offset
+        return levels
+
+    def __len__(self) -> int:
+        return len(self.people)
+
+    def _range(self, prefix: str) -> Tuple[int, int]:
+        """Slice of keys starting with prefix: two binary searches"""
+        start = bisect_left(self.keys, prefix)
+        # First string past every key with this prefix; the highest code point has no successor
+        stem = prefix.rstrip(chr(sys.maxunicode))
+        if not stem:
+            return start, len(self.keys)
+        end = bisect_left(self.keys, stem[:-1] + chr(ord(stem[-1]) + 1), start)
+        return start, end
+
+    def _top(self, prefix: str, limit: int):
+        """Best-ranked `limit` people with a key starting with prefix, without visiting the range in Python"""
+        import numpy as np
+
+        if len(prefix) <= SHORT_PREFIX:
+            return np.array(self.short.get(prefix, [])[:limit], dtype=np.int32)
+        start, end = self._range(prefix)
+        postings = self.postings[start:end]
+        # A person shows up at most max_keys_per_person times, so this many smallest hold `limit` distinct people
+        wanted = limit * self.max_keys_per_person
+        if len(postings) > wanted:
+            postings = np.partition(postings, wanted - 1)[:wanted]
+        return np.unique(postings)[:limit]
+
+    def _all(self, prefix: str):
+        import numpy as np
+
+        start, end = self._range(prefix)
+        return np.unique(self.postings[start:end])
+
+    def _fuzzy_matches(self, token: str):
+        import numpy as np
+
+        limit = 1 if len(token) <= 5 else 2
+        ranges = [
+            self.postings[slice(*self._range(candidate))]
+            for candidate in self.tokens_by_initial.get(token[0], ())
+            if within_distance(token, candidate, limit)
+        ]
+        return np.unique(np.concatenate(ranges)) if ranges else np.array([], dtype=np.int32)
+
+    def search(self, query: str, limit: int) -> List[Dict[str, Any]]:
+        import numpy as np
+
+        tokens = normalize(query).split()
+        if not tokens:
+            return []
+        # A whole-name key covers multi-word prefixes ("john sm") in one lookup
+        matches = self._top(" ".join(tokens), limit)
+        if len(tokens) > 1:
+            # ...and every query token matching some token of the person covers "sm john"
+            candidates = self._all(tokens[0])
+            for token in tokens[1:]:
+                candidates = np.intersect1d(candidates, self._all(token), assume_unique=True)
+            matches = np.union1d(matches, candidates[:limit])
+        if not len(matches) and len(tokens[-1]) >= 3:
+            matches = self._fuzzy_matches(tokens[-1])
+        return [self.people[int(person)] for person in matches[:limit]]
+
+
+class TypeaheadStore:
+    def __init__(self):
+        self.index: Optional[TypeaheadIndex] = None
+        self._task: Optional[asyncio.Task] = None
+
+    async def _scan(self, es, query: Dict[str, Any]) -> List[Dict[str, Any]]:
+        from api.services.es_client import scan_sources
+
+        return [source async for source in scan_sources(
+            es, EMPLOYEE_INDEX, {"query": query, "source": SOURCE_FIELDS}, pool="es_admin"
+        )]
+
+    async def _rebuild(self, docs: Dict[str, Dict[str, Any]]) -> None:
+        modified = max((str(doc.get("modified") or "") for doc in docs.values()), default="")
+        started = time.perf_counter()
+        # Sorting and tokenizing is CPU-bound; keep the event loop responsive while it runs
+        self.index = await asyncio.to_thread(TypeaheadIndex, docs, modified)
+        logger.info(f"Typeahead index built: {len(self.index)} employees, {len(self.index.keys)} keys "
+                    f"in {time.perf_counter() - started:.2f}s")
+
+    async def load(self, es) -> None:
+        rows = await self._scan(es, {"match_all": {}})
+        await self._rebuild({str(row["employeeId"]): row for row in rows if row.get("employeeId")})
+
+    async def refresh(self, es) -> None:
+        """Pull docs modified since the newest one indexed and rebuild if any changed"""
+        if self.index is None or not self.index.modified:
+            await self.load(es)
+            return
+        rows = await self._scan(es, {"range": {"modified": {"gte": self.index.modified}}})
+        changed = {str(row["employeeId"]): row for row in rows if row.get("employeeId")}
+        if any(self.index.docs.get(employee_id) != row for employee_id, row in changed.items()):
+            await self._rebuild({**self.index.docs, **changed})
+
+    async def _refresh_loop(self) -> None:
+        from api.services.es_client import get_es_client
+
+        last_full_load = 0.0
+        while True:
+            try:
+                es = get_es_client()
+                if time.monotonic() - last_full_load >= settings.TYPEAHEAD_FULL_RELOAD_SECONDS:
+                    await self.load(es)
+                    last_full_load = time.monotonic()
+                else:
+                    await self.refresh(es)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"Typeahead refresh failed: {e}")
+            await asyncio.sleep(settings.TYPEAHEAD_REFRESH_SECONDS)
+
+    def start(self) -> None:
+        """Build in the background; requests fall back to Elasticsearch until it is ready"""
+        if settings.TYPEAHEAD_ENABLED and self._task is None:
+            self._task = asyncio.create_task(self._refresh_loop())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+
+typeahead_store = TypeaheadStore()
@@ -294,7 +294,7 @@ def import_employees_from_csv(csv_file, clear_existing=False):
         bulk_data = []
         for employee in employees:
             # Index action
-            bulk_data.append(json.dumps({"index": {"_index": INDEX_NAME, "_id": employee.get('id')}}))
+            bulk_data.append(json.dumps({"index": {"_index": INDEX_NAME, "_id": employee.get('employeeId', employee.get('id'))}}))
             # Document data
             bulk_data.append(json.dumps(employee))
         
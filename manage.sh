@@ -233,7 +233,7 @@ start_backend() {
         print_debug "Starting backend in debug mode with auto-reload..."
         nohup uvicorn api.main:app --host 0.0.0.0 --port 8000 --reload --log-level debug > "$LOG_DIR/backend.log" 2>&1 &
     else
-        nohup uvicorn api.main:app --host 0.0.0.0 --port 8000 > "$LOG_DIR/backend.log" 2>&1 &
+        nohup python -m api.run --production > "$LOG_DIR/backend.log" 2>&1 &
     fi
     
     echo $! > "$PID_DIR/backend.pid"
@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+"""
+Script to write the org graph snapshot that API workers mmap instead of
+scanning the employee_hierarchy index on startup.
+
+The snapshot is a versioned binary file of NumPy arrays (parent, child
+offsets, depth, pre/post-order numbers) plus a string table; see
+api/services/org_snapshot.py for the layout. It is written next to the target
+path and atomically renamed into place, so running workers pick it up on their
+next poll without ever reading a partial file.
+
+Usage: python python/build_hierarchy_snapshot.py [output_path]
+(defaults to ORG_GRAPH_SNAPSHOT_PATH, the setting the API reads, then
+data/org_graph.snap; relative paths are taken from the project root)
+"""
+
+import os
+import sys
+import time
+from dotenv import load_dotenv
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+from api.services.org_tree import FIELDS, OrgGraph  # noqa: E402
+from api.services.org_snapshot import write_snapshot  # noqa: E402
+
+# Load environment variables; api/.env too, so the snapshot path matches the API's
+load_dotenv()
+load_dotenv(os.path.join(PROJECT_ROOT, 'api', '.env'))
+
+DEFAULT_SNAPSHOT_PATH = os.path.join(PROJECT_ROOT, "data", "org_graph.snap")
+SNAPSHOT_SOURCE_FIELDS = ["employeeId", "managerEmpId", *FIELDS]
+
+
+def snapshot_path():
+    return os.path.join(PROJECT_ROOT, os.getenv('ORG_GRAPH_SNAPSHOT_PATH') or DEFAULT_SNAPSHOT_PATH)
+
+
+def build_org_graph(rows):
+    """Build the org graph (DFS pre/post numbering, depth) from employee docs"""
+    return OrgGraph.build(rows, time.strftime("snap-%Y%m%dT%H%M%S"))
+
+
+def write_hierarchy_snapshot(graph, path):
+    write_snapshot(graph, path)
+    size_mb = os.path.getsize(path) / (1024 * 1024)
+    print(f"✅ Wrote org graph snapshot {path} ({len(graph)} employees, {size_mb:.1f} MB, generation {graph.generation})")
+
+
+def main():
+    from elasticsearch import helpers
+    from populate_hierarchy_nodes import HierarchyNodePopulator
+
+    path = sys.argv[1] if len(sys.argv) > 1 else snapshot_path()
+    print("Building Org Graph Snapshot")
+    print("=" * 50)
+
+    # Reuse the populator's connection settings; read from the source index
+    populator = HierarchyNodePopulator()
+    query = {"query": {"match_all": {}}, "_source": SNAPSHOT_SOURCE_FIELDS}
+    rows = []
+    for emp in helpers.scan(populator.es, index=populator.source_index, query=query):
+        rows.append(emp['_source'])
+        if len(rows) % 10000 == 0:
+            print(f"  ...read {len(rows)} employees")
+
+    if not rows:
+        print("No employees found to process.")
+        return
+    write_hierarchy_snapshot(build_org_graph(rows), path)
+
+
+if __name__ == "__main__":
+    main()
@@ -3,6 +3,12 @@
 Script to populate the employee_hierarchy index with individual employee nodes.
 This script is designed to handle a large number of employees by processing them
 in streams and batches, keeping memory usage low.
+
+Every node also gets DFS pre-order and post-order numbers plus its depth, so a
+whole subtree is one range query (pre > x AND post < y), and subtree rollups
+(org_stats) computed bottom-up in one pass. The same graph is
+written as an mmap-able snapshot (see build_hierarchy_snapshot.py) so API
+workers can share it instead of re-scanning Elasticsearch.
 """
 
 import os
@@ -62,20 +68,24 @@ class HierarchyNodePopulator:
         """
         print("Starting hierarchy population process...")
 
+        from build_hierarchy_snapshot import SNAPSHOT_SOURCE_FIELDS, build_org_graph, snapshot_path, write_hierarchy_snapshot
+
         # Pass 1: Build hierarchy relationship maps in memory.
         print("Pass 1: Building manager and report relationship maps...")
         reports_map = defaultdict(list)
         employee_to_manager_map = {}
+        graph_rows = []
         
         employee_count = 0
         try:
             query = {
                 "query": {"match_all": {}},
-                "_source": ["employeeId", "managerEmpId"]
+                "_source": SNAPSHOT_SOURCE_FIELDS
             }
             for emp in helpers.scan(self.es, index=self.source_index, query=query):
                 employee_count += 1
                 emp_source = emp['_source']
+                graph_rows.append(emp_source)
                 employee_id = emp_source.get('employeeId')
                 manager_id = emp_source.get('managerEmpId')
 
@@ -98,6 +108,12 @@ class HierarchyNodePopulator:
                 print("No employees found to process.")
                 return
 
+            # DFS numbering: pre-order id, post-order number and depth per employee
+            graph = build_org_graph(graph_rows)
+            del graph_rows
+            # Bottom-up subtree rollups (headcount, span of control, depth, department/location mix)
+            org_stats = graph.rollups()
+
         except Exception as e:
             print(f"Error during Pass 1 (building maps): {e}")
             return
@@ -135,6 +151,7 @@ class HierarchyNodePopulator:
                         break
                 
                 management_chain_ids.reverse()
+                node = graph.lookup(employee_id)
 
                 yield {
                     "_index": self.target_index,
@@ -143,6 +160,10 @@ class HierarchyNodePopulator:
                         **emp_source,
                         "reports": reports_map.get(str(employee_id), []),
                         "management_chain_ids": management_chain_ids,
+                        "pre": node,
+                        "post": graph.post[node],
+                        "depth": graph.depth[node],
+                        "org_stats": org_stats[node],
                     }
                 }
         
@@ -167,6 +188,9 @@ class HierarchyNodePopulator:
             
             print("\n✅ Hierarchy node population completed!")
 
+            print("\nWriting org graph snapshot...")
+            write_hierarchy_snapshot(graph, snapshot_path())
+
         except Exception as e:
             print(f"An unrecoverable error occurred during bulk indexing: {e}")
 
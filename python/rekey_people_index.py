@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+"""
+Script to re-key existing employee indices so every document's _id is its
+employeeId.
+
+The API fetches single employees with a realtime GET by _id (and batches with
+mget), which only finds documents indexed under their employeeId. Indices
+loaded by older scripts used random or numeric ids; this rewrites them in
+place: each mis-keyed document is indexed again under its employeeId and the
+old copy deleted, in the same bulk request. Documents already keyed correctly
+are left alone, so the script is safe to re-run.
+
+Usage: python python/rekey_people_index.py [--index new_people employee_hierarchy] [--dry-run]
+"""
+
+import argparse
+import sys
+from elasticsearch import helpers
+from dotenv import load_dotenv
+
+from populate_hierarchy_nodes import HierarchyNodePopulator
+
+# Load environment variables
+load_dotenv()
+
+
+class IndexRekeyer:
+    def __init__(self):
+        # Reuse the populator's connection settings
+        self.es = HierarchyNodePopulator().es
+
+    def rekey(self, index, dry_run=False):
+        """Re-key one index; returns (rekeyed, already_keyed, skipped) counts"""
+        if not self.es.indices.exists(index=index):
+            print(f"❌ Index '{index}' does not exist")
+            return 0, 0, 0
+
+        rekeyed, already_keyed, skipped = 0, 0, 0
+        seen = {}
+        moves = []
+        for hit in helpers.scan(self.es, index=index, query={"query": {"match_all": {}}}, size=1000):
+            employee_id = hit['_source'].get('employeeId')
+            if not employee_id:
+                skipped += 1
+                continue
+            employee_id = str(employee_id)
+            if employee_id in seen:
+                print(f"⚠️  Duplicate employeeId {employee_id}: documents {seen[employee_id]} and {hit['_id']}; the later one wins")
+            seen[employee_id] = hit['_id']
+            if hit['_id'] == employee_id:
+                already_keyed += 1
+                continue
+            rekeyed += 1
+            moves.append((hit['_id'], employee_id, hit['_source']))
+
+        actions = []
+        for old_id, employee_id, source in moves:
+            actions.append({"_op_type": "index", "_index": index, "_id": employee_id, "_source": source})
+            # An old id can collide with another employee's id; that document has just been written there
+            if old_id not in seen:
+                actions.append({"_op_type": "delete", "_index": index, "_id": old_id})
+
+        print(f"{index}: {rekeyed} to re-key, {already_keyed} already keyed by employeeId, {skipped} without employeeId")
+        if actions and not dry_run:
+            success, failed = helpers.bulk(self.es, actions, raise_on_error=False, chunk_size=1000)
+            if failed:
+                print(f"❌ {len(failed)} bulk operations failed in {index}")
+            self.es.indices.refresh(index=index)
+            print(f"✅ {index}: {success} bulk operations applied")
+        return rekeyed, already_keyed, skipped
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Re-key employee indices by employeeId")
+    parser.add_argument("--index", nargs="+", default=["new_people", "employee_hierarchy"],
+                        help="Indices to re-key (default: new_people employee_hierarchy)")
+    parser.add_argument("--dry-run", action="store_true", help="Only report what would change")
+    args = parser.parse_args()
+
+    print("Re-keying Employee Indices")
+    print("=" * 50)
+    rekeyer = IndexRekeyer()
+    for index in args.index:
+        rekeyer.rekey(index, dry_run=args.dry_run)
+
+    if args.dry_run:
+        print("\nDry run: no documents were changed")
+    else:
+        print("\n✅ Re-keying complete!")
+
+
+if __name__ == "__main__":
+    sys.exit(main())
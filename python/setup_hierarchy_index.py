@@ -86,7 +86,25 @@ class HierarchyIndexSetup:
                     "departments": {"type": "keyword"},
                     "emailAddress": {"type": "keyword"},
                     "managerEmpId": {"type": "keyword"},
-                    "reports": {"type": "keyword"}
+                    "reports": {"type": "keyword"},
+                    "management_chain_ids": {"type": "keyword"},
+                    "city": {"type": "keyword"},
+                    "country": {"type": "keyword"},
+                    # DFS interval numbering: descendants of x are pre > x.pre AND post < x.post
+                    "pre": {"type": "integer"},
+                    "post": {"type": "integer"},
+                    "depth": {"type": "integer"},
+                    # Subtree rollups; the per-department/location count maps are only returned, not searched
+                    "org_stats": {
+                        "properties": {
+                            "headcount": {"type": "integer"},
+                            "direct_reports": {"type": "integer"},
+                            "indirect_reports": {"type": "integer"},
+                            "max_depth_below": {"type": "integer"},
+                            "departments": {"type": "object", "enabled": False},
+                            "locations": {"type": "object", "enabled": False}
+                        }
+                    }
                 }
             }
         }
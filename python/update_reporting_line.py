@@ -0,0 +1,281 @@
+#!/usr/bin/env python3
+"""
+Script to move one employee (and their whole subtree) to a new manager without
+re-running the full hierarchy population.
+
+The moved subtree's own org_stats do not change, so the rollups are maintained
+incrementally: its totals are subtracted along the old management chain and
+added along the new one, and max_depth_below is recomputed only for those
+ancestors (one mget of their reports). The moved subtree's management_chain_ids and depth are rewritten.
+
+Pre/post numbers are shifted with interval arithmetic rather than rebuilt: the
+subtree occupies a contiguous pre-order and post-order range, so moving it
+only renumbers the subtree itself and the docs between its old and new
+positions (one update_by_query). The new position is after its previous
+sibling in id order, the same place a full rebuild would put it. The mmap
+snapshot, if one exists, is a whole-graph file and is still rebuilt from a
+full scan.
+
+Usage: python python/update_reporting_line.py EMPLOYEE_ID NEW_MANAGER_ID
+(pass "none" as NEW_MANAGER_ID to make the employee a top-level node)
+"""
+
+import argparse
+import os
+import sys
+from elasticsearch import helpers
+from dotenv import load_dotenv
+
+from build_hierarchy_snapshot import SNAPSHOT_SOURCE_FIELDS, build_org_graph, snapshot_path, write_hierarchy_snapshot
+from populate_hierarchy_nodes import HierarchyNodePopulator
+
+# Load environment variables
+load_dotenv()
+
+ROLLUP_MAPS = ("departments", "locations")
+
+# Applies numbering_shifts() to one doc, from its current (pre-move) pre/post
+RENUMBER_SCRIPT = """
+def pre = ctx._source.pre;
+def post = ctx._source.post;
+if (pre >= params.moved_lo && pre <= params.moved_hi) {
+  ctx._source.pre = pre + params.moved_pre;
+  ctx._source.post = post + params.moved_post;
+} else {
+  if (pre >= params.pre_lo && pre <= params.pre_hi) { ctx._source.pre = pre + params.pre_shift; }
+  if (post >= params.post_lo && post <= params.post_hi) { ctx._source.post = post + params.post_shift; }
+}
+"""
+
+
+def _adjust_counts(counts, delta, sign):
+    for value, count in delta.items():
+        updated = counts.get(value, 0) + sign * count
+        if updated > 0:
+            counts[value] = updated
+        else:
+            counts.pop(value, None)
+
+
+def adjust_ancestor_stats(stats, moved, sign, is_direct_manager):
+    """Add (sign=1) or remove (sign=-1) a moved subtree's rollups from an ancestor's"""
+    headcount = moved['headcount']
+    stats['headcount'] += sign * headcount
+    if is_direct_manager:
+        stats['direct_reports'] += sign
+        stats['indirect_reports'] += sign * (headcount - 1)
+    else:
+        stats['indirect_reports'] += sign * headcount
+    for key in ROLLUP_MAPS:
+        _adjust_counts(stats.setdefault(key, {}), moved.get(key, {}), sign)
+
+
+def subtree_size(doc):
+    """Employees in doc's subtree, itself included (see OrgGraph.subtree_end)"""
+    return doc['post'] + doc['depth'] + 1 - doc['pre']
+
+
+def numbering_shifts(moved, prev, parent):
+    """
+    Pre/post changes for moving the subtree rooted at `moved` so it directly
+    follows `prev`'s subtree (its previous sibling at the new position) or,
+    without one, opens `parent`'s subtree (parent None: becomes the first root).
+    All three docs carry their pre-move pre/post/depth.
+
+    Between the old and new positions everything shifts by the subtree's size
+    (pre and post ranges are shifted separately); the subtree itself shifts by
+    the distance moved.
+    """
+    k = subtree_size(moved)
+    pre_start, post_start = moved['pre'], moved['post'] - k + 1
+    if prev is not None:
+        pre_target, post_target = prev['pre'] + subtree_size(prev), prev['post'] + 1
+    elif parent is not None:
+        pre_target, post_target = parent['pre'] + 1, parent['post'] - subtree_size(parent) + 1
+    else:
+        pre_target, post_target = 0, 0
+
+    def shift(start, target):
+        if target >= start + k:
+            # Moving later: what sat between closes the gap
+            return start + k, target - 1, -k, target - k - start
+        return target, start - 1, k, target - start
+
+    pre_lo, pre_hi, pre_shift, moved_pre = shift(pre_start, pre_target)
+    post_lo, post_hi, post_shift, moved_post = shift(post_start, post_target)
+    return {
+        "moved_lo": pre_start, "moved_hi": pre_start + k - 1, "moved_pre": moved_pre, "moved_post": moved_post,
+        "pre_lo": pre_lo, "pre_hi": pre_hi, "pre_shift": pre_shift,
+        "post_lo": post_lo, "post_hi": post_hi, "post_shift": post_shift,
+    }
+
+
+class ReportingLineUpdater:
+    def __init__(self):
+        # Reuse the populator's connection settings and index names
+        populator = HierarchyNodePopulator()
+        self.es = populator.es
+        self.source_index = populator.source_index
+        self.target_index = populator.target_index
+
+    def _get_docs(self, ids, source_includes=None):
+        if not ids:
+            return {}
+        params = {"index": self.target_index, "ids": list(ids)}
+        if source_includes:
+            params["source_includes"] = source_includes
+        response = self.es.mget(**params)
+        return {doc['_id']: doc['_source'] for doc in response['docs'] if doc.get('found')}
+
+    def move(self, employee_id, new_manager_id):
+        docs = self._get_docs([employee_id] + ([new_manager_id] if new_manager_id else []))
+        employee = docs.get(employee_id)
+        if employee is None:
+            print(f"❌ Employee {employee_id} not found in {self.target_index}")
+            return False
+        if new_manager_id and new_manager_id not in docs:
+            print(f"❌ New manager {new_manager_id} not found in {self.target_index}")
+            return False
+        if 'org_stats' not in employee or 'pre' not in employee:
+            print("❌ Hierarchy index has no org stats / numbering yet; run populate_hierarchy_nodes.py first")
+            return False
+
+        employee_chain = employee.get('management_chain_ids') or [employee_id]
+        old_chain = employee_chain[:-1]
+        new_chain = (docs[new_manager_id].get('management_chain_ids') or [new_manager_id]) if new_manager_id else []
+        if employee_id in new_chain:
+            print(f"❌ {new_manager_id} reports to {employee_id}; the move would create a cycle")
+            return False
+        if (old_chain[-1] if old_chain else None) == new_manager_id:
+            print(f"ℹ️ {employee_id} already reports to {new_manager_id}")
+            return True
+
+        # 1. Rollups along both chains. For ancestors on both chains the totals
+        #    cancel out, but the direct/indirect split still moves when the old or
+        #    new manager is one of them.
+        affected = self._get_docs(list(dict.fromkeys(old_chain + new_chain)))
+        moved = employee['org_stats']
+        for ancestor_id in old_chain:
+            adjust_ancestor_stats(affected[ancestor_id]['org_stats'], moved, -1, ancestor_id == old_chain[-1])
+        for ancestor_id in new_chain:
+            adjust_ancestor_stats(affected[ancestor_id]['org_stats'], moved, 1, ancestor_id == new_chain[-1])
+
+        if old_chain:
+            old_manager = affected[old_chain[-1]]
+            old_manager['reports'] = [r for r in old_manager.get('reports', []) if r != employee_id]
+        if new_chain:
+            new_manager = affected[new_chain[-1]]
+            new_manager['reports'] = sorted(new_manager.get('reports', []) + [employee_id])
+
+        # max_depth_below is a max, not a sum: recompute bottom-up from each ancestor's reports
+        child_ids = {r for doc in affected.values() for r in doc.get('reports', [])} - set(affected) - {employee_id}
+        child_depths = {
+            child_id: doc['org_stats']['max_depth_below']
+            for child_id, doc in self._get_docs(child_ids, ["org_stats.max_depth_below"]).items()
+        }
+        child_depths[employee_id] = moved['max_depth_below']
+        for ancestor_id in sorted(affected, key=lambda a: -len(affected[a].get('management_chain_ids') or [a])):
+            reports = affected[ancestor_id].get('reports', [])
+            below = [
+                affected[r]['org_stats']['max_depth_below'] if r in affected else child_depths.get(r, 0)
+                for r in reports
+            ]
+            affected[ancestor_id]['org_stats']['max_depth_below'] = max(below) + 1 if below else 0
+            child_depths[ancestor_id] = affected[ancestor_id]['org_stats']['max_depth_below']
+
+        # Whole docs are re-indexed so count keys that dropped to zero disappear
+        actions = [{"_index": self.target_index, "_id": doc_id, "_source": doc} for doc_id, doc in affected.items()]
+
+        # 2. Management chains and depth for the moved subtree (its pre/post interval is still valid)
+        subtree_query = {
+            "query": {"bool": {"filter": [
+                {"range": {"pre": {"gte": employee['pre']}}},
+                {"range": {"post": {"lte": employee['post']}}},
+            ]}},
+            "_source": ["management_chain_ids", "depth"]
+        }
+        depth_shift = len(new_chain) - len(old_chain)
+        for hit in helpers.scan(self.es, index=self.target_index, query=subtree_query):
+            chain = hit['_source'].get('management_chain_ids') or []
+            update = {
+                "management_chain_ids": new_chain + chain[len(old_chain):],
+                "depth": hit['_source'].get('depth', len(chain) - 1) + depth_shift,
+            }
+            if hit['_id'] == employee_id:
+                update["managerEmpId"] = new_manager_id
+            actions.append({"_op_type": "update", "_index": self.target_index, "_id": hit['_id'], "doc": update})
+
+        success, errors = helpers.bulk(self.es, actions, raise_on_error=False, refresh="wait_for")
+        print(f"Updated {success} hierarchy documents ({len(affected)} ancestors), failures: {len(errors)}")
+        if errors:
+            for i, error in enumerate(errors[:5]):
+                print(f"  {i+1}: {error}")
+            return False
+
+        # Keep the source index in step (documents there are keyed by employeeId)
+        self.es.update(index=self.source_index, id=employee_id, doc={"managerEmpId": new_manager_id})
+
+        self.renumber(employee_id, employee, docs.get(new_manager_id))
+        self.rewrite_snapshot()
+        return True
+
+    def _previous_sibling(self, employee_id, parent):
+        """The sibling sorting right before employee_id under parent (or among the roots), if any"""
+        if parent is not None:
+            siblings = [r for r in parent.get('reports', []) if r < employee_id]
+            if not siblings:
+                return None
+            return self._get_docs([max(siblings)], ["pre", "post", "depth"]).get(max(siblings))
+        response = self.es.search(
+            index=self.target_index,
+            query={"bool": {"filter": [{"term": {"depth": 0}}, {"range": {"employeeId": {"lt": employee_id}}}]}},
+            sort=[{"employeeId": "desc"}],
+            size=1,
+            source=["pre", "post", "depth"],
+        )
+        hits = response['hits']['hits']
+        return hits[0]['_source'] if hits else None
+
+    def renumber(self, employee_id, employee, parent):
+        """Shift pre/post for the moved subtree and the docs between its old and new positions"""
+        params = numbering_shifts(employee, self._previous_sibling(employee_id, parent), parent)
+        query = {"bool": {"should": [
+            {"range": {"pre": {"gte": params['moved_lo'], "lte": params['moved_hi']}}},
+            {"range": {"pre": {"gte": params['pre_lo'], "lte": params['pre_hi']}}},
+            {"range": {"post": {"gte": params['post_lo'], "lte": params['post_hi']}}},
+        ], "minimum_should_match": 1}}
+        response = self.es.update_by_query(
+            index=self.target_index,
+            query=query,
+            script={"source": RENUMBER_SCRIPT, "lang": "painless", "params": params},
+            refresh=True,
+        )
+        print(f"Renumbered {response.get('updated', 0)} hierarchy documents, failures: {len(response.get('failures', []))}")
+
+    def rewrite_snapshot(self):
+        """Rebuild the mmap snapshot from the index if one is in use (it covers the whole graph)"""
+        path = snapshot_path()
+        if not os.path.exists(path):
+            return
+        query = {"query": {"match_all": {}}, "_source": SNAPSHOT_SOURCE_FIELDS}
+        rows = [hit['_source'] for hit in helpers.scan(self.es, index=self.target_index, query=query)]
+        write_hierarchy_snapshot(build_org_graph(rows), path)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Move an employee to a new manager")
+    parser.add_argument("employee_id")
+    parser.add_argument("new_manager_id", help='New manager\'s employee ID, or "none"')
+    args = parser.parse_args()
+    new_manager_id = None if args.new_manager_id.lower() in ("none", "null", "") else args.new_manager_id
+
+    print("Updating Reporting Line")
+    print("=" * 50)
+    updater = ReportingLineUpdater()
+    if not updater.move(args.employee_id, new_manager_id):
+        sys.exit(1)
+    print("\n✅ Reporting line updated!")
+
+
+if __name__ == "__main__":
+    main()